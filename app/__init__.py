@@ -1,9 +1,8 @@
+import click
 from flask import Flask
 from flask_cors import CORS
-from flask_migrate import Migrate
 from config import config
 import datetime
-import os
 
 # Try to import Flask-Session, but don't fail if not available
 try:
@@ -13,24 +12,49 @@ except ImportError:
     has_flask_session = False
 
 from app.models.database import db
+from app.models import sqlite
+from app.models.content import search, attempts, events
+from app import codec, logs, metrics
+from app.startup import StartupTimer
 
-def create_app(config_name='default'):
+def _loaded_by_cli():
+    """True when the app is being created for a `flask` command"""
+    return click.get_current_context(silent=True) is not None
+
+def create_app(config_name='default', overrides=None):
+    timer = StartupTimer()
     app = Flask(__name__)
+    app.extensions['startup'] = timer
     app.config.from_object(config[config_name])
+    if overrides:
+        # Used by benchmarks and tools that need e.g. a throwaway database
+        app.config.update(overrides)
     config[config_name].init_app(app)
+    timer.mark('config')
+    logs.init_app(app)
+    codec.init_app(app)
+    timer.mark('logging')
     
     # Initialize extensions
     CORS(app, supports_credentials=True)
     db.init_app(app)
-    Migrate(app, db)
+    sqlite.init_app(app, db)
+    metrics.init_app(app, db)
+    timer.mark('database')
+    if _loaded_by_cli():
+        # Flask-Migrate brings in Alembic, which is as slow to import as the
+        # rest of the app together, and only the `flask db` commands use it
+        from flask_migrate import Migrate
+        Migrate(app, db, render_as_batch=True)
+        timer.mark('migrate')
     
-    # Create session directory if using filesystem sessions and Flask-Session is available
+    # Use filesystem sessions if Flask-Session is available (it creates the session directory)
     if has_flask_session and app.config.get('SESSION_TYPE') == 'filesystem':
-        os.makedirs('flask_session', exist_ok=True)
         Session(app)
     else:
         app.logger.warning("Flask-Session not available, falling back to default sessions")
         app.config['SESSION_TYPE'] = None  # Fall back to Flask's default session
+    timer.mark('sessions')
     
     # Add template context processors
     @app.context_processor
@@ -41,15 +65,34 @@ def create_app(config_name='default'):
     from app.api import api as api_blueprint
     app.register_blueprint(api_blueprint, url_prefix='/api')
     
+    from app.api.cache import response_cache
+    response_cache.init_app(app)
+    
     from app.admin import admin as admin_blueprint
     app.register_blueprint(admin_blueprint, url_prefix='/admin')
     
     # Register main blueprint
     from app.routes import main as main_blueprint
     app.register_blueprint(main_blueprint)
+    timer.mark('blueprints')
+    
+    # Write-behind queues for graded quiz attempts and study events
+    attempts.init_app(app)
+    events.init_app(app)
+    timer.mark('write-behind queues')
+    
+    from app import commands
+    commands.init_app(app)
     
-    # Create database tables
-    with app.app_context():
-        db.create_all()
+    # Create database tables, unless migrations own the schema. They always
+    # do under the `flask` CLI: tables created here ahead of `flask db
+    # upgrade` would have the latest layout, which earlier revisions do not
+    # expect
+    if app.config.get('CREATE_SCHEMA_ON_STARTUP', True) and not _loaded_by_cli():
+        with app.app_context():
+            db.create_all()
+            # Full-text index tables and the triggers that keep them in sync
+            search.ensure_search_index()
+        timer.mark('schema')
     
     return app
@@ -1,31 +1,30 @@
-from flask import render_template, request, jsonify, current_app, redirect, url_for, session, flash
+from flask import render_template, request, jsonify, current_app, redirect, url_for, session, flash, Response
 from functools import wraps
+import hmac
+import logging
 from . import admin
-from app.models.content import add_flashcard, add_quiz, add_demo
+from app.models.content import add_flashcard, add_flashcards, add_quiz, add_demo, bump_content_version
 from app.models.database import db, Category, Chapter, Deck, Flashcard
 
+logger = logging.getLogger(__name__)
+
 def admin_required(f):
     @wraps(f)
     def decorated_function(*args, **kwargs):
         if not session.get('admin_logged_in'):
-            # Add a debug message
-            print("Not logged in, redirecting to login page")
+            logger.debug("No admin session for %s, redirecting to login", request.path)
             return redirect(url_for('admin.login'))
-        print("User is logged in as admin")
         return f(*args, **kwargs)
     return decorated_function
 
 @admin.route('/login', methods=['GET', 'POST'])
 def login():
-    # Debug output for the ADMIN_PASSWORD
-    print(f"Admin password: {current_app.config['ADMIN_PASSWORD']}")
-    
     if request.method == 'POST':
         password = request.form.get('password')
-        print(f"Submitted password: {password}")
-        if password == current_app.config['ADMIN_PASSWORD']:
+        if hmac.compare_digest((password or '').encode(), current_app.config['ADMIN_PASSWORD'].encode()):
             session['admin_logged_in'] = True
             return redirect(url_for('admin.dashboard'))
+        logger.warning("Failed admin login from %s", request.remote_addr)
         return render_template('admin/login.html', error='Invalid password')
     return render_template('admin/login.html')
 
@@ -112,6 +111,24 @@ def flashcards():
         flash(f"Error loading page: {str(e)}", "danger")
         return render_template('admin/error.html', error=str(e))
 
+@admin.route('/flashcards/batch', methods=['POST'])
+@admin_required
+def flashcards_batch():
+    try:
+        data = request.get_json(silent=True)
+        cards = data.get('cards') if isinstance(data, dict) else data
+        if not isinstance(cards, list) or not cards:
+            return jsonify({"success": False, "error": "Expected a non-empty list of flashcards"})
+        
+        max_batch = current_app.config['API_MAX_BATCH_SIZE']
+        if len(cards) > max_batch:
+            return jsonify({"success": False, "error": f"At most {max_batch} flashcards per batch"})
+        
+        return jsonify(add_flashcards(cards))
+    except Exception as e:
+        current_app.logger.error(f"Error adding flashcards: {str(e)}")
+        return jsonify({"success": False, "error": f"Server error: {str(e)}"})
+
 @admin.route('/flashcards/edit/<card_id>', methods=['GET', 'POST'])
 @admin_required
 def edit_flashcard(card_id):
@@ -136,6 +153,7 @@ def edit_flashcard(card_id):
                 card.answer = request.form['answer']
                 
                 db.session.commit()
+                bump_content_version()
                 flash('Flashcard updated successfully', 'success')
                 return redirect(url_for('admin.flashcards'))
             except Exception as e:
@@ -162,6 +180,7 @@ def delete_flashcard(card_id):
         try:
             db.session.delete(card)
             db.session.commit()
+            bump_content_version()
             flash('Flashcard deleted successfully', 'success')
         except Exception as e:
             db.session.rollback()
@@ -204,6 +223,7 @@ def chapters():
             )
             db.session.add(chapter)
             db.session.commit()
+            bump_content_version()
             
             return jsonify({"success": True, "chapter_id": chapter.id})
         except Exception as e:
@@ -224,6 +244,7 @@ def edit_chapter(chapter_id):
         chapter.name = data.get('name', chapter.name)
         chapter.category_id = data.get('category_id', chapter.category_id)
         db.session.commit()
+        bump_content_version()
         return jsonify({"success": True})
     except Exception as e:
         db.session.rollback()
@@ -237,6 +258,7 @@ def delete_chapter(chapter_id):
     try:
         db.session.delete(chapter)
         db.session.commit()
+        bump_content_version()
         flash('Chapter deleted successfully', 'success')
     except Exception as e:
         db.session.rollback()
@@ -270,6 +292,7 @@ def decks():
             )
             db.session.add(deck)
             db.session.commit()
+            bump_content_version()
             
             return jsonify({"success": True, "deck_id": deck.id})
         except Exception as e:
@@ -291,6 +314,7 @@ def edit_deck(deck_id):
         deck.difficulty = data.get('difficulty', deck.difficulty)
         deck.chapter_id = data.get('chapter_id', deck.chapter_id)
         db.session.commit()
+        bump_content_version()
         return jsonify({"success": True})
     except Exception as e:
         db.session.rollback()
@@ -304,6 +328,7 @@ def delete_deck(deck_id):
     try:
         db.session.delete(deck)
         db.session.commit()
+        bump_content_version()
         flash('Deck deleted successfully', 'success')
     except Exception as e:
         db.session.rollback()
@@ -345,7 +370,7 @@ def quizzes():
     try:
         # Use get_quizzes() function instead of direct database query
         # This will include the JSON fallback logic
-        quizzes_data = get_quizzes()
+        quizzes_data = get_quizzes(summary=True)
         if not quizzes_data:
             all_quizzes = []
         else:
@@ -447,14 +472,32 @@ def demos():
 @admin.route('/migrate-data', methods=['GET', 'POST'])
 @admin_required
 def migrate_data():
-    from app.models.content import migrate_json_to_db
+    from app.models.content import migrate_json_to_db, migrate_quizzes_to_db
     
     if request.method == 'POST':
-        result = migrate_json_to_db()
-        if result['success']:
-            flash('Data migration completed successfully', 'success')
-        else:
-            flash(f'Data migration failed: {result["message"]}', 'danger')
+        for label, migrate in (('Flashcard', migrate_json_to_db), ('Quiz', migrate_quizzes_to_db)):
+            result = migrate()
+            if result['success']:
+                flash(f'{label} migration completed: {result["message"]}', 'success')
+            else:
+                flash(f'{label} migration failed: {result["message"]}', 'danger')
         return redirect(url_for('admin.dashboard'))
     
     return render_template('admin/migrate.html')
+
+@admin.route('/queues')
+@admin_required
+def queues():
+    """Counters of this worker's write-behind queues (quiz attempts, study events)"""
+    return jsonify({name: queue.snapshot() for name, queue in current_app.extensions.get('write_behind', {}).items()})
+
+@admin.route('/metrics')
+def metrics():
+    """Prometheus scrape target; needs an admin session or the METRICS_TOKEN bearer token"""
+    from app.metrics import render_prometheus
+    
+    token = current_app.config.get('METRICS_TOKEN')
+    authorized = bool(token) and hmac.compare_digest(request.headers.get('Authorization', '').encode(), f"Bearer {token}".encode())
+    if not authorized and not session.get('admin_logged_in'):
+        return redirect(url_for('admin.login'))
+    return Response(render_prometheus(current_app), mimetype='text/plain; version=0.0.4')
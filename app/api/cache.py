@@ -0,0 +1,220 @@
+import gzip
+import hashlib
+import threading
+import time
+from collections import OrderedDict
+
+from flask import current_app, jsonify, request
+
+# Brotli is optional; without it clients are offered gzip only
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+from app.models.content.version import get_content_version
+from app.models.routing import use_primary
+
+class ResponseCache:
+    """Bounded LRU cache of read-API payloads, tied to the content version.
+
+    Entries are only valid for the content version they were built under.
+    When the version moves on, the whole cache is dropped on the next lookup,
+    so write paths never need to know which keys they affect. version_age()
+    tells how long ago this cache first saw its current version.
+    """
+
+    def __init__(self, maxsize=256):
+        self.maxsize = maxsize
+        self._entries = OrderedDict()
+        self._version = None
+        self._version_since = time.monotonic()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def init_app(self, app):
+        self.maxsize = app.config.get('RESPONSE_CACHE_SIZE', self.maxsize)
+        self.clear()
+
+    def _sync_version(self, version):
+        if version != self._version:
+            self._entries.clear()
+            self._version = version
+            self._version_since = time.monotonic()
+
+    def get(self, key, version):
+        with self._lock:
+            self._sync_version(version)
+            try:
+                value = self._entries[key]
+            except KeyError:
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return value
+
+    def set(self, key, value, version):
+        if self.maxsize <= 0:
+            return
+        with self._lock:
+            self._sync_version(version)
+            self._entries[key] = value
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.maxsize:
+                self._entries.popitem(last=False)
+                self.evictions += 1
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self._version = None
+            self._version_since = time.monotonic()
+
+    def version_age(self):
+        """Seconds since the current content version was first seen"""
+        with self._lock:
+            return time.monotonic() - self._version_since
+
+    def stats(self):
+        with self._lock:
+            return {
+                'size': len(self._entries),
+                'maxsize': self.maxsize,
+                'hits': self.hits,
+                'misses': self.misses,
+                'evictions': self.evictions
+            }
+
+response_cache = ResponseCache()
+
+class Payload:
+    """One JSON response serialized once, with its compressed variants.
+
+    The identity body is encoded when the payload is built, together with a
+    digest of it for the ETag. gzip and brotli variants are produced the
+    first time a client asks for them and then kept for as long as the
+    payload stays in the cache.
+    """
+
+    def __init__(self, body, catalog=False):
+        self.identity = body
+        self.digest = hashlib.sha1(body).hexdigest()[:32]
+        # Catalog payloads are compressed at the (slower) catalog levels
+        self.catalog = catalog
+        self._variants = {}
+
+    def encoded(self, encoding):
+        if encoding == 'identity':
+            return self.identity
+        body = self._variants.get(encoding)
+        if body is None:
+            config = current_app.config
+            if encoding == 'br':
+                quality = config.get('API_CATALOG_BROTLI_QUALITY', 11) if self.catalog \
+                    else config.get('API_BROTLI_QUALITY', 5)
+                body = brotli.compress(self.identity, quality=quality)
+            else:
+                level = config.get('API_CATALOG_GZIP_LEVEL', 9) if self.catalog \
+                    else config.get('API_GZIP_LEVEL', 6)
+                body = gzip.compress(self.identity, compresslevel=level, mtime=0)
+            self._variants[encoding] = body
+        return body
+
+def serialize_json(result):
+    """Encode a result exactly as jsonify() would, as UTF-8 bytes"""
+    return current_app.json.response(result).get_data()
+
+def cached_payload(key, builder, version=None, catalog=False):
+    """Return a Payload for this key, reusing it until content changes.
+
+    Results carrying an 'error' key are returned as a Payload but never cached.
+    The second value reports whether the payload is cacheable.
+
+    Builders read wherever the request routes its reads, usually the replica.
+    For the first REPLICA_LAG_SECONDS after a content-version bump they read
+    from the primary instead, so a replica that has not caught up with the
+    write yet cannot get its stale result cached under the new version.
+    """
+    if version is None:
+        version = get_content_version()
+    payload = response_cache.get(key, version)
+    if payload is not None:
+        return payload, True
+
+    if response_cache.version_age() < current_app.config.get('REPLICA_LAG_SECONDS', 5):
+        with use_primary():
+            result = builder()
+    else:
+        result = builder()
+    if result is None:
+        return None, False
+    payload = Payload(serialize_json(result), catalog=catalog)
+    cacheable = isinstance(result, dict) and 'error' not in result
+    if cacheable:
+        response_cache.set(key, payload, version)
+    return payload, cacheable
+
+def choose_encoding(body_size):
+    """Pick the best content-coding the client accepts for a body of this size"""
+    if body_size < current_app.config.get('API_COMPRESSION_MIN_SIZE', 1024):
+        return 'identity'
+    accepted = request.accept_encodings
+    candidates = ('br', 'gzip') if brotli is not None else ('gzip',)
+    best, best_quality = 'identity', 0
+    for encoding in candidates:
+        quality = accepted.quality(encoding)
+        if quality > best_quality:
+            best, best_quality = encoding, quality
+    return best
+
+def make_etag(payload, encoding='identity'):
+    """Strong ETag for one payload in one content coding"""
+    if encoding != 'identity':
+        return f"{payload.digest}-{encoding}"
+    return payload.digest
+
+def conditional_json(key, builder, not_found='Not found', catalog=False):
+    """Serve a cacheable JSON result with ETag, If-None-Match and compression.
+
+    The ETag is a digest of the serialized body, so it changes whenever the
+    response does, whether through a content write, a deploy that changes
+    the response shape or an edited data file. While the payload is cached a
+    matching If-None-Match is answered with 304 without building anything.
+    Every coding of the same result carries the same content, so a tag for
+    any of them counts as a match. A builder that returns None produces an
+    uncached 404 carrying the not_found message. catalog=True marks the
+    few catalog-wide payloads worth compressing at maximum effort.
+    """
+    payload, cacheable = cached_payload(key, builder, catalog=catalog)
+    if payload is None:
+        return jsonify({"error": not_found}), 404
+    if cacheable:
+        for encoding in ('identity', 'gzip', 'br'):
+            etag = make_etag(payload, encoding)
+            if request.if_none_match.contains(etag):
+                response = current_app.response_class(status=304)
+                response.set_etag(etag)
+                response.vary.add('Accept-Encoding')
+                return response
+
+    encoding = choose_encoding(len(payload.identity))
+    response = current_app.response_class(payload.encoded(encoding), mimetype=current_app.json.mimetype)
+    if encoding != 'identity':
+        response.headers['Content-Encoding'] = encoding
+    response.vary.add('Accept-Encoding')
+    if cacheable:
+        response.set_etag(make_etag(payload, encoding))
+    return response
+
+def set_cache_headers(response):
+    """Cache-Control for API responses: revalidate ETagged reads, never store the rest"""
+    if 'Cache-Control' in response.headers:
+        return response
+    if request.method in ('GET', 'HEAD') and response.get_etag()[0]:
+        response.headers['Cache-Control'] = current_app.config.get('API_CACHE_CONTROL', 'no-cache')
+    else:
+        response.headers['Cache-Control'] = 'no-store'
+    return response
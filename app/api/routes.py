@@ -1,11 +1,23 @@
-from flask import jsonify, request
+import logging
+
+from flask import jsonify, request, current_app, session
 from . import api
 from app.models.content import (
-    get_flashcards, add_flashcard, 
-    get_quizzes, add_quiz, get_quiz, update_quiz, delete_quiz,
-    get_demos, 
+    get_flashcards, add_flashcard, add_flashcards,
+    build_catalog_outline, get_deck_cards, list_cards,
+    get_quizzes, add_quiz, get_quiz, update_quiz, delete_quiz, public_quiz,
+    get_demos, search_content, SEARCH_TYPES, get_due_cards, grade_cards,
+    submit_attempt, record_events,
     migrate_json_to_db, migrate_quizzes_to_db
 )
+from app.models.database import generate_uuid
+from app.models.routing import route_reads_to_replica, primary_only
+from .cache import conditional_json, set_cache_headers
+
+logger = logging.getLogger(__name__)
+
+api.before_request(route_reads_to_replica)
+api.after_request(set_cache_headers)
 
 @api.route('/flashcards')
 def flashcards():
@@ -13,46 +25,180 @@ def flashcards():
     chapter = request.args.get('chapter')
     difficulty = request.args.get('difficulty')
     
-    print(f"[API] Received request for /api/flashcards with params: category={category}, chapter={chapter}, difficulty={difficulty}")
+    logger.debug("GET /api/flashcards: category=%s, chapter=%s, difficulty=%s", category, chapter, difficulty)
     
-    result = get_flashcards(category, chapter, difficulty)
+    return conditional_json(('flashcards', category, chapter, difficulty),
+                            lambda: get_flashcards(category, chapter, difficulty),
+                            catalog=not (category or chapter or difficulty))
+
+@api.route('/catalog/outline')
+def catalog_outline():
+    category = request.args.get('category')
+    chapter = request.args.get('chapter')
+    difficulty = request.args.get('difficulty')
     
-    print(f"[API] Responding to /api/flashcards request")
-    return jsonify(result)
+    return conditional_json(('catalog_outline', category, chapter, difficulty),
+                            lambda: build_catalog_outline(category, chapter, difficulty),
+                            catalog=not (category or chapter or difficulty))
+
+@api.route('/decks/<deck_id>/cards')
+def deck_cards(deck_id):
+    return conditional_json(('deck_cards', deck_id), lambda: get_deck_cards(deck_id),
+                            not_found="Deck not found")
+
+@api.route('/cards')
+def cards():
+    deck = request.args.get('deck')
+    chapter = request.args.get('chapter')
+    category = request.args.get('category')
+    difficulty = request.args.get('difficulty')
+    after = request.args.get('after')
+    
+    try:
+        limit = int(request.args.get('limit', current_app.config['API_DEFAULT_PAGE_SIZE']))
+    except ValueError:
+        return jsonify({"error": "limit must be an integer"}), 400
+    limit = max(1, min(limit, current_app.config['API_MAX_PAGE_SIZE']))
+    
+    return conditional_json(('cards', deck, chapter, category, difficulty, after, limit),
+                            lambda: list_cards(deck, chapter, category, difficulty, after, limit))
+
+@api.route('/search')
+def search():
+    query = request.args.get('q', '').strip()
+    if not query:
+        return jsonify({"error": "Missing search query (q)"}), 400
+    
+    search_type = request.args.get('type') or None
+    if search_type == 'all':
+        search_type = None
+    if search_type is not None and search_type not in SEARCH_TYPES:
+        return jsonify({"error": f"type must be one of: all, {', '.join(SEARCH_TYPES)}"}), 400
+    category = request.args.get('category')
+    
+    try:
+        limit = int(request.args.get('limit', current_app.config['API_SEARCH_DEFAULT_LIMIT']))
+    except ValueError:
+        return jsonify({"error": "limit must be an integer"}), 400
+    limit = max(1, min(limit, current_app.config['API_SEARCH_MAX_LIMIT']))
+    
+    return conditional_json(('search', query, search_type, category, limit),
+                            lambda: search_content(query, search_type, category, limit))
 
 @api.route('/flashcards', methods=['POST'])
 def create_flashcard():
     data = request.get_json()
     return jsonify(add_flashcard(data))
 
+@api.route('/flashcards/batch', methods=['POST'])
+def create_flashcards():
+    data = request.get_json(silent=True)
+    cards = data.get('cards') if isinstance(data, dict) else data
+    if not isinstance(cards, list) or not cards:
+        return jsonify({"success": False, "error": "Expected a non-empty list of flashcards"}), 400
+    
+    max_batch = current_app.config['API_MAX_BATCH_SIZE']
+    if len(cards) > max_batch:
+        return jsonify({"success": False, "error": f"At most {max_batch} flashcards per batch"}), 413
+    
+    result = add_flashcards(cards)
+    if result.get('success'):
+        return jsonify(result)
+    return jsonify(result), 500
+
+def _learner_id():
+    """Anonymous learner id, kept in the session cookie"""
+    if 'learner_id' not in session:
+        session['learner_id'] = generate_uuid()
+    return session['learner_id']
+
+@api.route('/review/due')
+@primary_only  # A replica may not have the grades just posted yet
+def review_due():
+    deck = request.args.get('deck')
+    try:
+        limit = int(request.args.get('limit', current_app.config['API_REVIEW_DEFAULT_LIMIT']))
+    except ValueError:
+        return jsonify({"error": "limit must be an integer"}), 400
+    limit = max(1, min(limit, current_app.config['API_REVIEW_MAX_LIMIT']))
+    
+    return jsonify(get_due_cards(_learner_id(), limit, deck))
+
+@api.route('/review/grade', methods=['POST'])
+def review_grade():
+    data = request.get_json(silent=True)
+    grades = data.get('grades') if isinstance(data, dict) else data
+    if not isinstance(grades, list) or not grades:
+        return jsonify({"success": False, "error": "Expected a non-empty list of grades"}), 400
+    
+    max_batch = current_app.config['API_MAX_BATCH_SIZE']
+    if len(grades) > max_batch:
+        return jsonify({"success": False, "error": f"At most {max_batch} grades per batch"}), 413
+    
+    result = grade_cards(_learner_id(), grades)
+    if result.get('success'):
+        return jsonify(result)
+    return jsonify(result), 500
+
+@api.route('/events', methods=['POST'])
+def events():
+    data = request.get_json(silent=True)
+    batch = data.get('events') if isinstance(data, dict) else data
+    if not isinstance(batch, list) or not batch:
+        return jsonify({"success": False, "error": "Expected a non-empty list of events"}), 400
+    
+    max_events = current_app.config['API_MAX_EVENTS_PER_REQUEST']
+    if len(batch) > max_events:
+        return jsonify({"success": False, "error": f"At most {max_events} events per request"}), 413
+    
+    return jsonify(record_events(_learner_id(), batch)), 202
+
 @api.route('/migrate-flashcards', methods=['POST'])
 def migrate_flashcards():
-    return jsonify(migrate_json_to_db())
+    return jsonify(migrate_json_to_db(batch_size=request.args.get('batch_size', type=int)))
 
 @api.route('/quizzes')
 def quizzes():
     category = request.args.get('category')
     difficulty = request.args.get('difficulty')
+    summary = request.args.get('summary', '').lower() in ('1', 'true', 'yes')
     
-    print(f"[API] Received request for /api/quizzes with params: category={category}, difficulty={difficulty}")
+    logger.debug("GET /api/quizzes: category=%s, difficulty=%s, summary=%s", category, difficulty, summary)
     
-    result = get_quizzes(category, difficulty)
+    def build():
+        result = get_quizzes(category, difficulty, summary)
+        # The answer key stays on the server; attempts are graded there
+        return dict(result, quizzes=[public_quiz(quiz) for quiz in result['quizzes']])
     
-    print(f"[API] Responding to /api/quizzes request")
-    return jsonify(result)
+    return conditional_json(('quizzes', category, difficulty, summary), build,
+                            catalog=not (category or difficulty))
 
 @api.route('/quizzes/<quiz_id>')
 def get_quiz_by_id(quiz_id):
-    print(f"[API] Received request for /api/quizzes/{quiz_id}")
+    logger.debug("GET /api/quizzes/%s", quiz_id)
     
     quiz = get_quiz(quiz_id)
     if quiz:
-        return jsonify(quiz)
+        return jsonify(public_quiz(quiz))
     return jsonify({"error": "Quiz not found"}), 404
 
+@api.route('/quizzes/<quiz_id>/attempts', methods=['POST'])
+def create_quiz_attempt(quiz_id):
+    data = request.get_json(silent=True)
+    if not isinstance(data, dict) or 'answers' not in data:
+        return jsonify({"success": False, "error": "Missing required field: answers"}), 400
+    
+    try:
+        result = submit_attempt(quiz_id, _learner_id(), data['answers'])
+    except ValueError as e:
+        return jsonify({"success": False, "error": str(e)}), 400
+    if result is None:
+        return jsonify({"success": False, "error": "Quiz not found"}), 404
+    return jsonify(result)
+
 @api.route('/quizzes', methods=['POST'])
 def create_quiz():
-    print(f"[API] Received POST request for /api/quizzes")
+    logger.debug("POST /api/quizzes")
     
     data = request.get_json()
     result = add_quiz(data)
@@ -63,7 +209,7 @@ def create_quiz():
 
 @api.route('/quizzes/<quiz_id>', methods=['PUT'])
 def update_quiz_by_id(quiz_id):
-    print(f"[API] Received PUT request for /api/quizzes/{quiz_id}")
+    logger.debug("PUT /api/quizzes/%s", quiz_id)
     
     data = request.get_json()
     result = update_quiz(quiz_id, data)
@@ -74,7 +220,7 @@ def update_quiz_by_id(quiz_id):
 
 @api.route('/quizzes/<quiz_id>', methods=['DELETE'])
 def delete_quiz_by_id(quiz_id):
-    print(f"[API] Received DELETE request for /api/quizzes/{quiz_id}")
+    logger.debug("DELETE /api/quizzes/%s", quiz_id)
     
     result = delete_quiz(quiz_id)
     
@@ -84,11 +230,11 @@ def delete_quiz_by_id(quiz_id):
 
 @api.route('/migrate-quizzes', methods=['POST'])
 def migrate_quizzes():
-    print(f"[API] Received POST request for /api/migrate-quizzes")
-    return jsonify(migrate_quizzes_to_db())
+    logger.debug("POST /api/migrate-quizzes")
+    return jsonify(migrate_quizzes_to_db(batch_size=request.args.get('batch_size', type=int)))
 
 @api.route('/demos')
 def demos():
     category = request.args.get('category')
-    print(f"[API] Received request for /api/demos with params: category={category}")
-    return jsonify(get_demos(category))
+    logger.debug("GET /api/demos: category=%s", category)
+    return conditional_json(('demos', category), lambda: get_demos(category), catalog=not category)
@@ -0,0 +1,86 @@
+"""JSON encoding and decoding for the whole app.
+
+Uses orjson when it is installed and falls back to the stdlib json module
+otherwise. Flask's jsonify(), the Quiz question setter, the static data file
+helpers and the content migrations all go through this module, so swapping
+the backend only takes a JSON_BACKEND config value.
+"""
+import json
+
+from flask.json.provider import DefaultJSONProvider
+
+# orjson is optional; without it everything runs on the stdlib json module
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+AVAILABLE_BACKENDS = ('orjson', 'stdlib') if orjson is not None else ('stdlib',)
+
+_backend = AVAILABLE_BACKENDS[0]
+
+def get_backend():
+    """Name of the backend currently in use"""
+    return _backend
+
+def set_backend(name):
+    """Select a backend by name; 'auto' picks the fastest one installed"""
+    global _backend
+    if name in (None, '', 'auto'):
+        name = AVAILABLE_BACKENDS[0]
+    if name not in AVAILABLE_BACKENDS:
+        raise ValueError(f"JSON backend '{name}' is not available (installed: {', '.join(AVAILABLE_BACKENDS)})")
+    _backend = name
+
+def dumps_bytes(obj, indent=False, sort_keys=False, default=None):
+    """Serialize obj to UTF-8 JSON bytes"""
+    if _backend == 'orjson':
+        option = orjson.OPT_PASSTHROUGH_DATETIME
+        if indent:
+            option |= orjson.OPT_INDENT_2
+        if sort_keys:
+            option |= orjson.OPT_SORT_KEYS
+        return orjson.dumps(obj, default=default, option=option)
+    return dumps(obj, indent=indent, sort_keys=sort_keys, default=default).encode('utf-8')
+
+def dumps(obj, indent=False, sort_keys=False, default=None):
+    """Serialize obj to a JSON string"""
+    if _backend == 'orjson':
+        return dumps_bytes(obj, indent=indent, sort_keys=sort_keys, default=default).decode('utf-8')
+    if indent:
+        return json.dumps(obj, indent=2, sort_keys=sort_keys, default=default)
+    return json.dumps(obj, separators=(',', ':'), sort_keys=sort_keys, default=default)
+
+def loads(s):
+    """Deserialize JSON from str or bytes"""
+    if _backend == 'orjson':
+        return orjson.loads(s)
+    return json.loads(s)
+
+def load(fp):
+    """Deserialize JSON from a file opened in text or binary mode"""
+    return loads(fp.read())
+
+class CodecJSONProvider(DefaultJSONProvider):
+    """Flask JSON provider that serializes through this module's backend.
+
+    With the stdlib backend it behaves exactly like DefaultJSONProvider. With
+    orjson, dates, UUIDs, dataclasses and Markup still go through Flask's
+    default() hook, so responses carry the same values either way.
+    """
+
+    def dumps(self, obj, **kwargs):
+        if _backend == 'stdlib':
+            return super().dumps(obj, **kwargs)
+        return dumps(obj, indent=bool(kwargs.get('indent')),
+                     sort_keys=kwargs.get('sort_keys', self.sort_keys),
+                     default=kwargs.get('default', self.default))
+
+    def loads(self, s, **kwargs):
+        if _backend == 'stdlib' or kwargs:
+            return super().loads(s, **kwargs)
+        return loads(s)
+
+def init_app(app):
+    set_backend(app.config.get('JSON_BACKEND', 'auto'))
+    app.json = CodecJSONProvider(app)
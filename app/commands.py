@@ -0,0 +1,121 @@
+"""Flask CLI commands (run as `flask --app wsgi <command>`)."""
+import time
+
+import click
+
+
+def _print_report(label, result, elapsed):
+    status = 'ok' if result.get('success') else 'FAILED'
+    click.echo(f"{label}: {status} in {elapsed:.2f}s - {result.get('message')}")
+    for kind, counts in result.get('counts', {}).items():
+        click.echo(f"  {kind:<12} inserted={counts['inserted']} skipped={counts['skipped']} failed={counts['failed']}")
+    for error in result.get('errors', []):
+        click.echo(f"  ! {error['type']} {error['id']}: {error['error']}", err=True)
+
+
+@click.command('import-content')
+@click.option('--flashcards', 'flashcards_path', type=click.Path(exists=True, dir_okay=False),
+              help='Flashcard pack to import (default: static/data/flashcards.json).')
+@click.option('--quizzes', 'quizzes_path', type=click.Path(exists=True, dir_okay=False),
+              help='Quiz pack to import (default: static/data/quizzes.json).')
+@click.option('--only', type=click.Choice(['flashcards', 'quizzes']),
+              help='Import just one kind of content.')
+@click.option('--format', 'file_format', type=click.Choice(['json', 'ndjson']),
+              help='Pack format (default: ndjson for .ndjson/.jsonl files, json otherwise).')
+@click.option('--batch-size', type=int, default=None,
+              help='Rows per executemany batch (default: IMPORT_BATCH_SIZE).')
+@click.option('--commit-each-batch', is_flag=True, default=None,
+              help='Commit after every batch instead of once at the end.')
+def import_content(flashcards_path, quizzes_path, only, file_format, batch_size, commit_each_batch):
+    """Bulk-import flashcard and quiz packs, skipping rows that already exist.
+
+    Pack files are streamed, so they can be far larger than available memory.
+    """
+    from app.models.content import import_flashcards, import_quizzes
+
+    jobs = []
+    if only != 'quizzes':
+        jobs.append(('Flashcards', import_flashcards, flashcards_path))
+    if only != 'flashcards':
+        jobs.append(('Quizzes', import_quizzes, quizzes_path))
+
+    failed = False
+    for label, run, path in jobs:
+        started = time.perf_counter()
+        result = run(path=path, batch_size=batch_size, commit_each_batch=commit_each_batch or None,
+                     file_format=file_format)
+        _print_report(label, result, time.perf_counter() - started)
+        failed = failed or not result.get('success')
+
+    if failed:
+        raise SystemExit(1)
+
+
+@click.command('check-query-plans')
+@click.option('--verbose', '-v', is_flag=True, help='Print every statement and its plan.')
+def check_query_plans(verbose):
+    """EXPLAIN the hot read queries and fail if any of them scans a whole table."""
+    from app.query_plans import check_query_plans as run_check
+
+    lines, failures = run_check(verbose=verbose)
+    for line in lines:
+        click.echo(line)
+    if failures:
+        click.echo(f"{failures} scenario(s) do full table scans", err=True)
+        raise SystemExit(1)
+    click.echo("No unexpected full table scans")
+
+
+@click.command('rebuild-search-index')
+def rebuild_search_index():
+    """Repopulate the full-text search index from the content tables."""
+    from app.models.content import rebuild_search_index as rebuild, bump_content_version
+
+    started = time.perf_counter()
+    counts = rebuild()
+    if not counts:
+        click.echo("This database has no full-text index; search uses LIKE matching")
+        return
+    bump_content_version()
+    click.echo(f"Indexed {counts['flashcards']} flashcards and {counts['quiz_questions']} quiz questions "
+               f"in {time.perf_counter() - started:.2f}s")
+
+
+@click.command('startup-profile')
+@click.option('--config', 'config_name', default='production',
+              type=click.Choice(['production', 'development', 'default']),
+              help='Configuration to boot (default: production, what gunicorn workers run).')
+@click.option('--top', type=int, default=25, help='How many import groups to list.')
+def startup_profile(config_name, top):
+    """Boot a fresh app and report import and initialization time by module.
+
+    Third-party imports are grouped by package, the app's own by module.
+    The app uses this command's database.
+    """
+    from flask import current_app
+    from app.startup import profile_startup
+
+    result = profile_startup(config_name, current_app.config['SQLALCHEMY_DATABASE_URI'])
+    total = result['import_s'] + result['create_app_s']
+    click.echo(f"Startup ({config_name}): {total * 1000:.1f} ms = imports {result['import_s'] * 1000:.1f} ms "
+               f"+ create_app() {result['create_app_s'] * 1000:.1f} ms")
+
+    imports = sorted(result['imports'].items(), key=lambda item: item[1][0], reverse=True)
+    click.echo(f"\n{'import (self time)':<40}{'ms':>9}{'modules':>9}")
+    for name, (seconds, modules) in imports[:top]:
+        click.echo(f"{name:<40}{seconds * 1000:>9.1f}{modules:>9}")
+    if len(imports) > top:
+        rest = imports[top:]
+        click.echo(f"{f'({len(rest)} more)':<40}{sum(s for _, (s, _) in rest) * 1000:>9.1f}"
+                   f"{sum(m for _, (_, m) in rest):>9}")
+
+    click.echo(f"\n{'create_app() step':<40}{'ms':>9}")
+    for step, seconds in result['steps']:
+        click.echo(f"{step:<40}{seconds * 1000:>9.1f}")
+
+
+def init_app(app):
+    app.cli.add_command(import_content)
+    app.cli.add_command(check_query_plans)
+    app.cli.add_command(rebuild_search_index)
+    app.cli.add_command(startup_profile)
@@ -0,0 +1,151 @@
+"""Non-blocking, structured logging.
+
+Every logger in the process hands its records to a QueueHandler on the root
+logger, which only puts them on an in-memory queue; a QueueListener thread
+formats them and does the actual write, so a slow stderr or pipe never
+holds up a request. Records are formatted as one JSON object per line
+(LOG_FORMAT = 'text' gives the classic human-readable layout instead).
+
+Each request gets an id, taken from an incoming X-Request-ID header or
+generated, which is stamped on every record logged while handling it and
+echoed back in the response's X-Request-ID header.
+
+Levels come from LOG_LEVEL (the root logger) and LOG_LEVELS, a mapping of
+logger name to level, e.g. {'app.api.routes': 'DEBUG'}.
+"""
+import atexit
+import copy
+import logging
+import logging.handlers
+import os
+import queue
+import re
+import uuid
+from datetime import datetime, timezone
+
+from flask import g, has_request_context, request
+from flask.logging import default_handler
+
+from app import codec
+
+REQUEST_ID_HEADER = 'X-Request-ID'
+# Incoming ids are only trusted if they look like an id
+_REQUEST_ID_PATTERN = re.compile(r'^[A-Za-z0-9._:-]{1,64}$')
+LOG_FORMATS = ('json', 'text')
+TEXT_FORMAT = '%(asctime)s %(levelname)s [%(name)s] [%(request_id)s] %(message)s'
+
+# The handler currently installed on the root logger, so that calling
+# create_app() again replaces it instead of stacking another one
+_installed = None
+
+class JsonFormatter(logging.Formatter):
+    def format(self, record):
+        data = {
+            'ts': datetime.fromtimestamp(record.created, timezone.utc).isoformat(),
+            'level': record.levelname,
+            'logger': record.name,
+            'message': record.getMessage(),
+            'request_id': getattr(record, 'request_id', None),
+            'pid': record.process,
+            'thread': record.threadName,
+        }
+        if record.exc_info and not record.exc_text:
+            record.exc_text = self.formatException(record.exc_info)
+        if record.exc_text:
+            data['exception'] = record.exc_text
+        return codec.dumps(data, default=str)
+
+class RequestIdFilter(logging.Filter):
+    """Stamp records with the id of the request being handled, if any"""
+
+    def filter(self, record):
+        if not hasattr(record, 'request_id'):
+            record.request_id = g.get('request_id') if has_request_context() else None
+        return True
+
+class AsyncQueueHandler(logging.handlers.QueueHandler):
+    """QueueHandler that owns its listener and restarts it in forked workers"""
+
+    def __init__(self, handlers):
+        super().__init__(queue.SimpleQueue())
+        self.addFilter(RequestIdFilter())
+        self._handlers = handlers
+        self._listener = None
+        self._pid = None
+
+    def start(self):
+        self._listener = logging.handlers.QueueListener(self.queue, *self._handlers, respect_handler_level=True)
+        self._listener.start()
+        self._pid = os.getpid()
+
+    def stop(self):
+        """Write out everything queued so far and stop the listener thread"""
+        if self._listener is not None and self._pid == os.getpid():
+            self._listener.stop()
+        self._listener = None
+
+    def prepare(self, record):
+        # Merge the args into the message and render any traceback here, on
+        # the calling thread, so the record can safely cross to the listener;
+        # the formatting itself is left to the listener's handlers
+        record = copy.copy(record)
+        record.message = record.getMessage()
+        record.msg = record.message
+        record.args = None
+        if record.exc_info:
+            if not record.exc_text:
+                record.exc_text = logging.Formatter().formatException(record.exc_info)
+            record.exc_info = None
+        return record
+
+    def emit(self, record):
+        # A forked gunicorn worker inherits the queue but not the thread
+        if self._pid != os.getpid():
+            self.start()
+        super().emit(record)
+
+def _assign_request_id():
+    incoming = request.headers.get(REQUEST_ID_HEADER, '')
+    g.request_id = incoming if _REQUEST_ID_PATTERN.match(incoming) else uuid.uuid4().hex
+
+def _echo_request_id(response):
+    request_id = g.get('request_id')
+    if request_id:
+        response.headers[REQUEST_ID_HEADER] = request_id
+    return response
+
+def init_app(app):
+    """Route all logging through the queue; call first thing in create_app"""
+    global _installed
+
+    log_format = app.config.get('LOG_FORMAT', 'json')
+    if log_format not in LOG_FORMATS:
+        raise ValueError(f"LOG_FORMAT must be one of: {', '.join(LOG_FORMATS)}")
+    stream = logging.StreamHandler()
+    if log_format == 'json':
+        stream.setFormatter(JsonFormatter())
+    else:
+        stream.setFormatter(logging.Formatter(TEXT_FORMAT))
+
+    handler = AsyncQueueHandler([stream])
+    handler.start()
+    atexit.register(handler.stop)
+
+    root = logging.getLogger()
+    if _installed is not None:
+        root.removeHandler(_installed)
+        _installed.stop()
+    for existing in list(root.handlers):
+        root.removeHandler(existing)
+    root.addHandler(handler)
+    root.setLevel(app.config.get('LOG_LEVEL', 'INFO'))
+    _installed = handler
+
+    for name, level in (app.config.get('LOG_LEVELS') or {}).items():
+        logging.getLogger(name).setLevel(level)
+
+    # Flask's own stderr handler would write synchronously
+    app.logger.removeHandler(default_handler)
+
+    app.before_request(_assign_request_id)
+    app.after_request(_echo_request_id)
@@ -0,0 +1,183 @@
+"""Request latency and SQL instrumentation, exported in Prometheus text format.
+
+before/after_request hooks time every request and SQLAlchemy cursor hooks
+count the queries each request runs and the time spent in them. Totals are
+kept per endpoint (the Flask endpoint name, so URL parameters do not create
+new series) and served at /admin/metrics. Each response also gets a
+Server-Timing header with its own numbers, which browser dev tools show
+next to the request.
+
+Metrics live in process memory, so with several gunicorn workers each
+scrape sees the worker that answered it; the pid label keeps their series
+apart.
+"""
+import os
+import threading
+import time
+
+from flask import current_app, g, request, has_app_context
+from sqlalchemy import event
+
+# Seconds
+LATENCY_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+# Queries per request
+QUERY_COUNT_BUCKETS = (0, 1, 2, 5, 10, 20, 50, 100, 200, 500)
+
+class Histogram:
+    """Cumulative-bucket histogram as Prometheus expects it"""
+
+    def __init__(self, buckets):
+        self.buckets = buckets
+        self.counts = [0] * len(buckets)
+        self.count = 0
+        self.sum = 0.0
+
+    def observe(self, value):
+        self.count += 1
+        self.sum += value
+        for i, bound in enumerate(self.buckets):
+            if value <= bound:
+                self.counts[i] += 1
+
+class Metrics:
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.reset()
+
+    def reset(self):
+        with self._lock:
+            # (endpoint, method) -> Histogram
+            self.latency = {}
+            self.query_counts = {}
+            # (endpoint, method, status) -> count
+            self.requests = {}
+            # (endpoint, method) -> seconds spent in SQL
+            self.db_seconds = {}
+
+    def observe_request(self, endpoint, method, status, duration, queries, db_time):
+        key = (endpoint, method)
+        with self._lock:
+            histogram = self.latency.get(key)
+            if histogram is None:
+                histogram = self.latency[key] = Histogram(LATENCY_BUCKETS)
+                self.query_counts[key] = Histogram(QUERY_COUNT_BUCKETS)
+                self.db_seconds[key] = 0.0
+            histogram.observe(duration)
+            self.query_counts[key].observe(queries)
+            self.db_seconds[key] += db_time
+            status_key = (endpoint, method, status)
+            self.requests[status_key] = self.requests.get(status_key, 0) + 1
+
+metrics = Metrics()
+
+def _labels(**labels):
+    return '{' + ','.join(f'{name}="{_escape(value)}"' for name, value in labels.items()) + '}'
+
+def _escape(value):
+    return str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+
+def _histogram_lines(name, histogram, labels):
+    lines = []
+    for bound, count in zip(histogram.buckets, histogram.counts):
+        lines.append(f"{name}_bucket{_labels(**labels, le=bound)} {count}")
+    lines.append(f"{name}_bucket{_labels(**labels, le='+Inf')} {histogram.count}")
+    lines.append(f"{name}_sum{_labels(**labels)} {histogram.sum}")
+    lines.append(f"{name}_count{_labels(**labels)} {histogram.count}")
+    return lines
+
+def render_prometheus(app):
+    """All metrics of this worker in Prometheus text exposition format"""
+    pid = os.getpid()
+    lines = []
+    with metrics._lock:
+        lines.append("# HELP hvac_request_duration_seconds Request latency by endpoint")
+        lines.append("# TYPE hvac_request_duration_seconds histogram")
+        for (endpoint, method), histogram in sorted(metrics.latency.items()):
+            lines.extend(_histogram_lines('hvac_request_duration_seconds', histogram,
+                                          dict(endpoint=endpoint, method=method, pid=pid)))
+
+        lines.append("# HELP hvac_request_db_queries SQL queries run per request")
+        lines.append("# TYPE hvac_request_db_queries histogram")
+        for (endpoint, method), histogram in sorted(metrics.query_counts.items()):
+            lines.extend(_histogram_lines('hvac_request_db_queries', histogram,
+                                          dict(endpoint=endpoint, method=method, pid=pid)))
+
+        lines.append("# HELP hvac_request_db_seconds_total Time spent in SQL queries by endpoint")
+        lines.append("# TYPE hvac_request_db_seconds_total counter")
+        for (endpoint, method), seconds in sorted(metrics.db_seconds.items()):
+            lines.append(f"hvac_request_db_seconds_total{_labels(endpoint=endpoint, method=method, pid=pid)} {seconds}")
+
+        lines.append("# HELP hvac_requests_total Requests by endpoint and status")
+        lines.append("# TYPE hvac_requests_total counter")
+        for (endpoint, method, status), count in sorted(metrics.requests.items()):
+            lines.append(f"hvac_requests_total{_labels(endpoint=endpoint, method=method, status=status, pid=pid)} {count}")
+
+    from app.api.cache import response_cache
+    lines.append("# HELP hvac_response_cache_events_total Read-API response cache lookups and evictions")
+    lines.append("# TYPE hvac_response_cache_events_total counter")
+    for result in ('hits', 'misses', 'evictions'):
+        lines.append(f"hvac_response_cache_events_total{_labels(result=result, pid=pid)} {getattr(response_cache, result)}")
+
+    queues = app.extensions.get('write_behind', {})
+    lines.append("# HELP hvac_write_behind_rows_total Rows through the write-behind queues")
+    lines.append("# TYPE hvac_write_behind_rows_total counter")
+    for name, queue in sorted(queues.items()):
+        for counter in ('enqueued', 'written', 'failed', 'dropped', 'backpressure', 'over_limit'):
+            lines.append(f"hvac_write_behind_rows_total{_labels(queue=name, counter=counter, pid=pid)} {queue.stats[counter]}")
+    lines.append("# HELP hvac_write_behind_pending Rows waiting in the write-behind queues")
+    lines.append("# TYPE hvac_write_behind_pending gauge")
+    for name, queue in sorted(queues.items()):
+        lines.append(f"hvac_write_behind_pending{_labels(queue=name, pid=pid)} {queue.pending()}")
+
+    return '\n'.join(lines) + '\n'
+
+def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    conn.info.setdefault('query_started', []).append(time.perf_counter())
+
+def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    started = conn.info['query_started'].pop()
+    # Only queries run inside a request are attributed; write-behind flushes
+    # and CLI commands have no request stats in their context
+    if has_app_context():
+        stats = g.get('db_stats')
+        if stats is not None:
+            stats[0] += 1
+            stats[1] += time.perf_counter() - started
+
+def _handle_error(context):
+    # A failed query never reaches after_cursor_execute
+    if context.connection is not None:
+        started = context.connection.info.get('query_started')
+        if started:
+            started.pop()
+
+def _start_timer():
+    g.request_started = time.perf_counter()
+    g.db_stats = [0, 0.0]
+
+def _record_request(response):
+    started = g.pop('request_started', None)
+    if started is None:
+        return response
+    duration = time.perf_counter() - started
+    queries, db_time = g.pop('db_stats', (0, 0.0))
+    metrics.observe_request(request.endpoint or '<unmatched>', request.method, response.status_code,
+                            duration, queries, db_time)
+    if current_app.config.get('METRICS_SERVER_TIMING', True):
+        response.headers.add('Server-Timing', f'app;dur={duration * 1000:.2f}')
+        response.headers.add('Server-Timing', f'db;dur={db_time * 1000:.2f};desc="{queries} queries"')
+    return response
+
+def init_app(app, db):
+    """Install the request hooks and the cursor hooks on every engine; call after db.init_app(app)"""
+    if not app.config.get('METRICS_ENABLED', True):
+        return
+    app.before_request(_start_timer)
+    app.after_request(_record_request)
+
+    with app.app_context():
+        engines = list(db.engines.values())
+    for engine in engines:
+        event.listen(engine, 'before_cursor_execute', _before_cursor_execute)
+        event.listen(engine, 'after_cursor_execute', _after_cursor_execute)
+        event.listen(engine, 'handle_error', _handle_error)
@@ -1,14 +1,28 @@
-from app.models.content.helpers import load_json, save_json, ensure_data_dir, DATA_DIR
-from app.models.content.flashcards import get_flashcards, add_flashcard, migrate_json_to_db
+from app.models.content.helpers import load_json, load_json_index, save_json, ensure_data_dir, DATA_DIR
+from app.models.content.flashcards import get_flashcards, add_flashcard, add_flashcards, migrate_json_to_db
 from app.models.content.quizzes import (
-    get_quizzes, add_quiz, get_quiz, update_quiz, delete_quiz, migrate_quizzes_to_db
+    get_quizzes, add_quiz, get_quiz, update_quiz, delete_quiz, migrate_quizzes_to_db, public_quiz
 )
 from app.models.content.demos import get_demos, add_demo
+from app.models.content.importer import import_flashcards, import_quizzes
+from app.models.content.catalog import build_catalog_outline, get_deck_cards, list_cards
+from app.models.content.search import search_content, rebuild_search_index, ensure_search_index, SEARCH_TYPES
+from app.models.content.review import get_due_cards, grade_cards
+from app.models.content.attempts import submit_attempt, get_answer_key
+from app.models.content.events import record_events, get_event_stats, EVENT_TYPES
+from app.models.content.version import get_content_version, bump_content_version
 
 # Export all functions
 __all__ = [
-    'DATA_DIR', 'load_json', 'save_json', 'ensure_data_dir',
-    'get_flashcards', 'add_flashcard', 'migrate_json_to_db',
-    'get_quizzes', 'add_quiz', 'get_quiz', 'update_quiz', 'delete_quiz', 'migrate_quizzes_to_db',
-    'get_demos', 'add_demo'
+    'DATA_DIR', 'load_json', 'load_json_index', 'save_json', 'ensure_data_dir',
+    'get_flashcards', 'add_flashcard', 'add_flashcards', 'migrate_json_to_db',
+    'build_catalog_outline', 'get_deck_cards', 'list_cards',
+    'get_quizzes', 'add_quiz', 'get_quiz', 'update_quiz', 'delete_quiz', 'migrate_quizzes_to_db', 'public_quiz',
+    'import_flashcards', 'import_quizzes',
+    'get_demos', 'add_demo',
+    'search_content', 'rebuild_search_index', 'ensure_search_index', 'SEARCH_TYPES',
+    'get_due_cards', 'grade_cards',
+    'submit_attempt', 'get_answer_key',
+    'record_events', 'get_event_stats', 'EVENT_TYPES',
+    'get_content_version', 'bump_content_version'
 ]
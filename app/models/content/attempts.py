@@ -0,0 +1,134 @@
+"""Server-side quiz grading and attempt recording.
+
+Each quiz's answer key (question id -> set of correct answer ids) is built
+once per content version and kept in memory, so grading a submission is a
+few set comparisons. Graded attempts go through a write-behind queue (see
+app/models/writebehind.py) and reach the quiz_attempts table in batches,
+not one INSERT per submission.
+
+Questions and answers are identified by their "id" in the quiz data, or by
+their position when they have none.
+"""
+from datetime import datetime
+
+from flask import current_app
+
+from app import codec
+from app.models.database import db, QuizAttempt, generate_uuid
+from app.models.writebehind import WriteBehindQueue
+from app.models.content.quizzes import get_quiz
+from app.models.content.version import get_content_version
+
+EXTENSION_KEY = 'quiz_attempts'
+
+# (content version, {quiz id: answer key}); replaced whenever content changes
+_answer_keys = (None, {})
+
+def _item_id(item, position):
+    return str(item['id']) if item.get('id') is not None else str(position)
+
+def build_answer_key(quiz):
+    """Map question id -> frozenset of correct answer ids"""
+    return {
+        _item_id(question, position): frozenset(
+            _item_id(answer, i) for i, answer in enumerate(question.get('answers') or []) if answer.get('correct')
+        )
+        for position, question in enumerate(quiz.get('questions') or [])
+    }
+
+def get_answer_key(quiz_id):
+    """The cached answer key for a quiz, or None if there is no such quiz"""
+    global _answer_keys
+    version = get_content_version()
+    cached_version, keys = _answer_keys
+    if cached_version != version:
+        keys = {}
+        _answer_keys = (version, keys)
+    key = keys.get(quiz_id)
+    if key is None:
+        quiz = get_quiz(quiz_id)
+        if quiz is None:
+            return None
+        key = keys[quiz_id] = build_answer_key(quiz)
+    return key
+
+def _normalize_answers(answers):
+    """Accept {question id: answer id or [answer ids]} or a list of
+    {"question_id", "answer_ids"} objects; returns {question id: [answer ids]}"""
+    if isinstance(answers, list):
+        pairs = []
+        for item in answers:
+            if not isinstance(item, dict) or 'question_id' not in item:
+                raise ValueError("Each answer must be an object with a question_id")
+            pairs.append((item['question_id'], item.get('answer_ids', item.get('answer_id'))))
+    elif isinstance(answers, dict):
+        pairs = answers.items()
+    else:
+        raise ValueError("answers must be an object or a list")
+
+    normalized = {}
+    for question_id, selected in pairs:
+        if selected is None:
+            selected = []
+        elif not isinstance(selected, list):
+            selected = [selected]
+        normalized[str(question_id)] = [str(answer_id) for answer_id in selected]
+    return normalized
+
+def grade_answers(answer_key, answers):
+    """Grade normalized answers; a question is correct when exactly its correct answers were chosen.
+
+    Each result also names the correct answers, for the learner's review.
+    """
+    results = [
+        {'question_id': question_id, 'correct': frozenset(answers.get(question_id, ())) == correct,
+         'correct_answers': sorted(correct)}
+        for question_id, correct in answer_key.items()
+    ]
+    score = sum(result['correct'] for result in results)
+    return score, results
+
+def _write_attempts(rows):
+    db.session.execute(QuizAttempt.__table__.insert(), rows)
+    db.session.commit()
+
+def submit_attempt(quiz_id, learner_id, answers):
+    """Grade a submission and queue it for recording; None if the quiz does not exist.
+
+    Raises ValueError for a malformed submission.
+    """
+    answer_key = get_answer_key(quiz_id)
+    if answer_key is None:
+        return None
+    answers = _normalize_answers(answers)
+    score, results = grade_answers(answer_key, answers)
+
+    attempt_id = generate_uuid()
+    current_app.extensions[EXTENSION_KEY].put({
+        'id': attempt_id,
+        'quiz_id': quiz_id,
+        'learner_id': learner_id,
+        'score': score,
+        'total': len(answer_key),
+        'answers': codec.dumps(answers),
+        'submitted_at': datetime.utcnow()
+    })
+    return {
+        'success': True,
+        'attempt_id': attempt_id,
+        'quiz_id': quiz_id,
+        'score': score,
+        'total': len(answer_key),
+        'results': results
+    }
+
+def init_app(app):
+    queue = WriteBehindQueue(
+        'quiz_attempts', _write_attempts,
+        batch_size=app.config['QUIZ_ATTEMPT_BATCH_SIZE'],
+        interval=app.config['QUIZ_ATTEMPT_FLUSH_INTERVAL'],
+        max_pending=app.config['QUIZ_ATTEMPT_MAX_PENDING'],
+        overflow='flush'
+    )
+    queue.init_app(app)
+    app.extensions[EXTENSION_KEY] = queue
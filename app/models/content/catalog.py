@@ -0,0 +1,219 @@
+from app.models.database import db, Category, Chapter, Deck, Flashcard
+
+def _catalog_statements(category=None, chapter=None, difficulty=None):
+    """Build the four SELECTs that make up the flashcard catalog.
+
+    Filters are pushed into each WHERE clause so the database only returns
+    rows that survive them. The chapter filter only applies together with a
+    category filter, matching the behaviour of the old nested to_dict() walk.
+    """
+    categories = db.select(Category.id, Category.name, Category.description)
+    chapters = db.select(Chapter.id, Chapter.name, Chapter.category_id)
+    decks = (
+        db.select(Deck.id, Deck.name, Deck.difficulty, Deck.chapter_id)
+        .join(Chapter, Deck.chapter_id == Chapter.id)
+    )
+    cards = (
+        db.select(Flashcard.id, Flashcard.question, Flashcard.answer,
+                  Flashcard.created_at, Flashcard.deck_id)
+        .join(Deck, Flashcard.deck_id == Deck.id)
+        .join(Chapter, Deck.chapter_id == Chapter.id)
+    )
+
+    if category:
+        categories = categories.where(Category.id == category)
+        chapters = chapters.where(Chapter.category_id == category)
+        decks = decks.where(Chapter.category_id == category)
+        cards = cards.where(Chapter.category_id == category)
+
+    if chapter and category:
+        chapters = chapters.where(Chapter.id == chapter)
+        decks = decks.where(Deck.chapter_id == chapter)
+        cards = cards.where(Deck.chapter_id == chapter)
+
+    if difficulty:
+        decks = decks.where(Deck.difficulty == difficulty)
+        cards = cards.where(Deck.difficulty == difficulty)
+
+    return categories, chapters, decks, cards
+
+def _card_dict(row):
+    return {
+        'id': row.id,
+        'question': row.question,
+        'answer': row.answer,
+        'created_at': row.created_at.isoformat() if row.created_at else None
+    }
+
+def build_flashcard_catalog(category=None, chapter=None, difficulty=None):
+    """Build the nested categories → chapters → decks → cards tree.
+
+    Always issues exactly four queries, one per level, regardless of how many
+    chapters or decks the catalog holds, and assembles the result in a single
+    pass over each result set. The output shape matches Category.to_dict().
+    """
+    category_stmt, chapter_stmt, deck_stmt, card_stmt = _catalog_statements(category, chapter, difficulty)
+
+    result = {"categories": []}
+    chapters_by_category = {}
+    for row in db.session.execute(category_stmt):
+        cat = {
+            'id': row.id,
+            'name': row.name,
+            'description': row.description,
+            'chapters': []
+        }
+        result['categories'].append(cat)
+        chapters_by_category[row.id] = cat['chapters']
+
+    decks_by_chapter = {}
+    for row in db.session.execute(chapter_stmt):
+        chapters = chapters_by_category.get(row.category_id)
+        if chapters is None:
+            continue
+        ch = {
+            'id': row.id,
+            'name': row.name,
+            'decks': []
+        }
+        chapters.append(ch)
+        decks_by_chapter[row.id] = ch['decks']
+
+    cards_by_deck = {}
+    for row in db.session.execute(deck_stmt):
+        decks = decks_by_chapter.get(row.chapter_id)
+        if decks is None:
+            continue
+        deck = {
+            'id': row.id,
+            'name': row.name,
+            'difficulty': row.difficulty,
+            'cards': []
+        }
+        decks.append(deck)
+        cards_by_deck[row.id] = deck['cards']
+
+    for row in db.session.execute(card_stmt):
+        cards = cards_by_deck.get(row.deck_id)
+        if cards is None:
+            continue
+        cards.append(_card_dict(row))
+
+    return result
+
+def build_catalog_outline(category=None, chapter=None, difficulty=None):
+    """Build the categories → chapters → decks hierarchy with card counts only.
+
+    Uses the same filtered statements as build_flashcard_catalog(), but swaps
+    the card SELECT for a GROUP BY count so no card bodies are read.
+    """
+    category_stmt, chapter_stmt, deck_stmt, card_stmt = _catalog_statements(category, chapter, difficulty)
+    count_stmt = (
+        card_stmt.with_only_columns(Flashcard.deck_id, db.func.count(Flashcard.id).label('card_count'))
+        .group_by(Flashcard.deck_id)
+    )
+
+    result = {"categories": []}
+    categories_by_id = {}
+    for row in db.session.execute(category_stmt):
+        cat = {
+            'id': row.id,
+            'name': row.name,
+            'description': row.description,
+            'card_count': 0,
+            'chapters': []
+        }
+        result['categories'].append(cat)
+        categories_by_id[row.id] = cat
+
+    chapters_by_id = {}
+    for row in db.session.execute(chapter_stmt):
+        cat = categories_by_id.get(row.category_id)
+        if cat is None:
+            continue
+        ch = {
+            'id': row.id,
+            'name': row.name,
+            'card_count': 0,
+            'decks': []
+        }
+        cat['chapters'].append(ch)
+        chapters_by_id[row.id] = (cat, ch)
+
+    card_counts = {row.deck_id: row.card_count for row in db.session.execute(count_stmt)}
+
+    for row in db.session.execute(deck_stmt):
+        parents = chapters_by_id.get(row.chapter_id)
+        if parents is None:
+            continue
+        cat, ch = parents
+        card_count = card_counts.get(row.id, 0)
+        ch['decks'].append({
+            'id': row.id,
+            'name': row.name,
+            'difficulty': row.difficulty,
+            'card_count': card_count
+        })
+        ch['card_count'] += card_count
+        cat['card_count'] += card_count
+
+    return result
+
+def get_deck_cards(deck_id):
+    """Get one deck and its cards, or None if the deck does not exist"""
+    deck = db.session.execute(
+        db.select(Deck.id, Deck.name, Deck.difficulty, Deck.chapter_id).where(Deck.id == deck_id)
+    ).first()
+    if deck is None:
+        return None
+
+    cards = db.session.execute(
+        db.select(Flashcard.id, Flashcard.question, Flashcard.answer, Flashcard.created_at)
+        .where(Flashcard.deck_id == deck_id)
+    )
+    return {
+        'id': deck.id,
+        'name': deck.name,
+        'difficulty': deck.difficulty,
+        'chapter_id': deck.chapter_id,
+        'cards': [_card_dict(row) for row in cards]
+    }
+
+def list_cards(deck=None, chapter=None, category=None, difficulty=None, after=None, limit=50):
+    """Get one page of flashcards using keyset pagination on Flashcard.id.
+
+    Cards are ordered by id. Pass the returned next_cursor back as `after`
+    to fetch the following page; it is None on the last page. Each page costs
+    one indexed range scan no matter how deep into the catalog it is.
+    """
+    stmt = db.select(Flashcard.id, Flashcard.question, Flashcard.answer,
+                     Flashcard.created_at, Flashcard.deck_id)
+
+    if chapter or category or difficulty:
+        stmt = stmt.join(Deck, Flashcard.deck_id == Deck.id)
+    if category:
+        stmt = stmt.join(Chapter, Deck.chapter_id == Chapter.id).where(Chapter.category_id == category)
+    if chapter:
+        stmt = stmt.where(Deck.chapter_id == chapter)
+    if difficulty:
+        stmt = stmt.where(Deck.difficulty == difficulty)
+    if deck:
+        stmt = stmt.where(Flashcard.deck_id == deck)
+    if after:
+        stmt = stmt.where(Flashcard.id > after)
+
+    # Fetch one extra row to learn whether another page exists
+    rows = db.session.execute(stmt.order_by(Flashcard.id).limit(limit + 1)).all()
+    has_more = len(rows) > limit
+    rows = rows[:limit]
+
+    cards = []
+    for row in rows:
+        card = _card_dict(row)
+        card['deck_id'] = row.deck_id
+        cards.append(card)
+
+    return {
+        'cards': cards,
+        'next_cursor': rows[-1].id if has_more else None
+    }
@@ -1,7 +1,11 @@
+import logging
 import uuid
 from datetime import datetime
 
 from app.models.content.helpers import load_json, save_json
+from app.models.content.version import bump_content_version
+
+logger = logging.getLogger(__name__)
 
 def get_demos(category=None):
     """Get interactive demos, optionally filtered by category"""
@@ -19,7 +23,7 @@ def get_demos(category=None):
 def add_demo(data):
     """Add a new interactive demo"""
     try:
-        demos = load_json('demos.json')
+        demos = load_json('demos.json', mutable=True)
         if not demos:
             demos = {"demos": []}
         
@@ -36,7 +40,8 @@ def add_demo(data):
         demos['demos'].append(demo)
         
         save_json(demos, 'demos.json')
+        bump_content_version()
         return {"success": True, "demo_id": demo['id']}
     except Exception as e:
-        print(f"Error adding demo: {str(e)}")
+        logger.error(f"Error adding demo: {str(e)}")
         return {"success": False, "error": str(e)}
@@ -0,0 +1,143 @@
+"""Study-event ingestion (card flips and grades, quiz starts, demo opens).
+
+Events are validated, stamped and appended to a per-worker ring buffer (a
+WriteBehindQueue in 'drop' mode), so a request never waits on the database.
+The buffer is flushed on a size or time threshold to the append-only
+study_events table, or, with EVENTS_SINK = 'ndjson', to rotating NDJSON
+files under EVENTS_DIR. When the buffer is full the oldest events are
+dropped; the queue's counters report how often that happened.
+"""
+import os
+from datetime import datetime
+
+from flask import current_app
+
+from app import codec
+from app.models.database import db, StudyEvent
+from app.models.writebehind import WriteBehindQueue
+from app.models.content.helpers import parse_client_timestamp
+
+EXTENSION_KEY = 'study_events'
+EVENT_TYPES = ('card_flipped', 'card_graded', 'quiz_started', 'demo_opened')
+EVENT_SINKS = ('database', 'ndjson')
+# Serialized size limit for an event's free-form data
+MAX_EVENT_DATA_BYTES = 2048
+MAX_REPORTED_ERRORS = 20
+
+def _validate_event(event):
+    """Return a study_events row for a client event, or raise ValueError"""
+    if not isinstance(event, dict):
+        raise ValueError("Event must be a JSON object")
+    event_type = event.get('type')
+    if event_type not in EVENT_TYPES:
+        raise ValueError(f"type must be one of: {', '.join(EVENT_TYPES)}")
+    subject_id = event.get('subject_id')
+    if subject_id is not None and (not isinstance(subject_id, str) or len(subject_id) > 50):
+        raise ValueError("subject_id must be a string of at most 50 characters")
+    data = event.get('data')
+    if data is not None:
+        if not isinstance(data, dict):
+            raise ValueError("data must be a JSON object")
+        data = codec.dumps(data)
+        if len(data) > MAX_EVENT_DATA_BYTES:
+            raise ValueError(f"data must serialize to at most {MAX_EVENT_DATA_BYTES} bytes")
+    try:
+        occurred_at = parse_client_timestamp(event.get('occurred_at'))
+    except (TypeError, ValueError):
+        raise ValueError("occurred_at must be an ISO 8601 timestamp")
+    return {
+        'type': event_type,
+        'subject_id': subject_id,
+        'data': data,
+        'occurred_at': occurred_at
+    }
+
+def record_events(learner_id, events):
+    """Validate a batch of events and buffer the valid ones.
+
+    Returns accepted/rejected counts and the first few validation errors.
+    """
+    received_at = datetime.utcnow()
+    rows = []
+    errors = []
+    for index, event in enumerate(events):
+        try:
+            row = _validate_event(event)
+        except ValueError as e:
+            if len(errors) < MAX_REPORTED_ERRORS:
+                errors.append({"index": index, "error": str(e)})
+            continue
+        row['learner_id'] = learner_id
+        row['occurred_at'] = min(row['occurred_at'], received_at)
+        row['received_at'] = received_at
+        rows.append(row)
+
+    if rows:
+        current_app.extensions[EXTENSION_KEY].put_many(rows)
+    return {
+        "success": True,
+        "accepted": len(rows),
+        "rejected": len(events) - len(rows),
+        "errors": errors
+    }
+
+def get_event_stats():
+    """Ring buffer counters for this worker"""
+    return current_app.extensions[EXTENSION_KEY].snapshot()
+
+def _write_events_to_database(rows):
+    db.session.execute(StudyEvent.__table__.insert(), rows)
+    db.session.commit()
+
+class NdjsonSink:
+    """Appends event batches to NDJSON files, starting a new file past max_bytes.
+
+    Each worker writes its own files (the pid is in the name), so lines from
+    different processes never interleave.
+    """
+
+    def __init__(self, directory, max_bytes):
+        self.directory = directory
+        self.max_bytes = max_bytes
+        self._path = None
+        self._size = 0
+        self._sequence = 0
+
+    def _next_path(self):
+        self._sequence += 1
+        stamp = datetime.utcnow().strftime('%Y%m%dT%H%M%S')
+        return os.path.join(self.directory, f"events-{stamp}-{os.getpid()}-{self._sequence}.ndjson")
+
+    def __call__(self, rows):
+        lines = b''.join(
+            codec.dumps_bytes({key: value.isoformat() if isinstance(value, datetime) else value
+                               for key, value in row.items()}) + b'\n'
+            for row in rows
+        )
+        if self._path is None or self._size + len(lines) > self.max_bytes:
+            os.makedirs(self.directory, exist_ok=True)
+            self._path = self._next_path()
+            self._size = 0
+        with open(self._path, 'ab') as f:
+            f.write(lines)
+        self._size += len(lines)
+
+def init_app(app):
+    sink = app.config['EVENTS_SINK']
+    if sink not in EVENT_SINKS:
+        raise ValueError(f"EVENTS_SINK must be one of: {', '.join(EVENT_SINKS)}")
+    if sink == 'ndjson':
+        directory = app.config.get('EVENTS_DIR') or os.path.join(app.instance_path, 'events')
+        write = NdjsonSink(directory, app.config['EVENTS_FILE_MAX_BYTES'])
+    else:
+        write = _write_events_to_database
+
+    queue = WriteBehindQueue(
+        'study_events', write,
+        batch_size=app.config['EVENTS_BATCH_SIZE'],
+        interval=app.config['EVENTS_FLUSH_INTERVAL'],
+        max_pending=app.config['EVENTS_BUFFER_SIZE'],
+        overflow='drop'
+    )
+    queue.init_app(app)
+    app.extensions[EXTENSION_KEY] = queue
@@ -1,59 +1,54 @@
 import logging
 from datetime import datetime
-import json
 
-from app.models.database import db, Category, Chapter, Deck, Flashcard
-from app.models.content.helpers import load_json, save_json, DATA_DIR
-import os
+from app.models.database import db, Category, Chapter, Deck, Flashcard, generate_uuid
+from app.models.content.catalog import build_flashcard_catalog
+from app.models.content.importer import import_flashcards
+from app.models.content.version import bump_content_version
+
+logger = logging.getLogger(__name__)
 
 def get_flashcards(category=None, chapter=None, difficulty=None):
     """Get flashcards, optionally filtered by category, chapter, and difficulty"""
-    print(f"[SERVER] Fetching flashcards from DATABASE. Filters: category={category}, chapter={chapter}, difficulty={difficulty}")
-    
-    query = Category.query
-    
-    if category:
-        query = query.filter_by(id=category)
+    logger.debug("Fetching flashcards from database: category=%s, chapter=%s, difficulty=%s",
+                 category, chapter, difficulty)
     
-    categories = query.all()
-    print(f"[SERVER] Found {len(categories)} categories in database")
+    result = build_flashcard_catalog(category, chapter, difficulty)
     
-    result = {"categories": [category.to_dict() for category in categories]}
+    # Counting walks the whole catalog, so only do it when it will be logged
+    if logger.isEnabledFor(logging.DEBUG):
+        total_cards = sum(len(deck['cards']) for cat in result['categories']
+                          for ch in cat['chapters'] for deck in ch['decks'])
+        logger.debug("Returning %d categories with %d cards from database", len(result['categories']), total_cards)
     
-    if chapter and category:
-        for cat in result['categories']:
-            cat['chapters'] = [ch for ch in cat['chapters'] if ch['id'] == chapter]
-    
-    if difficulty:
-        for cat in result['categories']:
-            for ch in cat['chapters']:
-                ch['decks'] = [d for d in ch['decks'] if d['difficulty'] == difficulty]
+    return result
+
+REQUIRED_FLASHCARD_FIELDS = ['category_id', 'category_name', 'chapter_id', 'chapter_name',
+                             'deck_id', 'deck_name', 'difficulty', 'question', 'answer']
+
+def _validate_flashcard(data):
+    """Return an error message for an invalid flashcard payload, or None"""
+    if not isinstance(data, dict):
+        return "Flashcard must be a JSON object"
     
-    # Count cards for logging
-    total_cards = 0
-    for cat in result['categories']:
-        for ch in cat['chapters']:
-            for deck in ch['decks']:
-                total_cards += len(deck['cards'])
+    # Validate required fields
+    for field in REQUIRED_FLASHCARD_FIELDS:
+        if field not in data:
+            return f"Missing required field: {field}"
     
-    print(f"[SERVER] Returning {len(result['categories'])} categories with {total_cards} total cards from DATABASE")
+    # Check for empty values in critical fields
+    for field in ['question', 'answer']:
+        if not data[field] or not str(data[field]).strip():
+            return f"Field '{field}' cannot be empty"
     
-    return result
+    return None
 
 def add_flashcard(data):
     """Add a new flashcard to the database"""
     try:
-        # Validate required fields
-        required_fields = ['category_id', 'category_name', 'chapter_id', 'chapter_name', 
-                          'deck_id', 'deck_name', 'difficulty', 'question', 'answer']
-        for field in required_fields:
-            if field not in data:
-                return {"success": False, "error": f"Missing required field: {field}"}
-        
-        # Check for empty values in critical fields
-        for field in ['question', 'answer']:
-            if not data[field] or not str(data[field]).strip():
-                return {"success": False, "error": f"Field '{field}' cannot be empty"}
+        error = _validate_flashcard(data)
+        if error:
+            return {"success": False, "error": error}
         
         try:
             # Check if category exists
@@ -65,7 +60,7 @@ def add_flashcard(data):
                     description=data.get('category_description', '')
                 )
                 db.session.add(category)
-                logging.info(f"Created new category: {data['category_id']}")
+                logger.info(f"Created new category: {data['category_id']}")
         
             # Check if chapter exists
             chapter = Chapter.query.filter_by(id=data['chapter_id'], category_id=data['category_id']).first()
@@ -76,7 +71,7 @@ def add_flashcard(data):
                     category_id=data['category_id']
                 )
                 db.session.add(chapter)
-                logging.info(f"Created new chapter: {data['chapter_id']}")
+                logger.info(f"Created new chapter: {data['chapter_id']}")
         
             # Check if deck exists
             deck = Deck.query.filter_by(id=data['deck_id'], chapter_id=data['chapter_id']).first()
@@ -88,10 +83,11 @@ def add_flashcard(data):
                     chapter_id=data['chapter_id']
                 )
                 db.session.add(deck)
-                logging.info(f"Created new deck: {data['deck_id']}")
+                logger.info(f"Created new deck: {data['deck_id']}")
             
             # First commit to ensure all parent entities exist
             db.session.commit()
+            bump_content_version()
             
             # Create new flashcard
             flashcard = Flashcard(
@@ -101,91 +97,115 @@ def add_flashcard(data):
             )
             db.session.add(flashcard)
             db.session.commit()
+            bump_content_version()
             
             return {"success": True, "card_id": flashcard.id}
         except Exception as db_error:
             db.session.rollback()
-            logging.error(f"Database error in add_flashcard: {str(db_error)}")
+            logger.error(f"Database error in add_flashcard: {str(db_error)}")
             return {"success": False, "error": f"Database error: {str(db_error)}"}
     except Exception as e:
-        logging.error(f"Unexpected error in add_flashcard: {str(e)}")
+        logger.error(f"Unexpected error in add_flashcard: {str(e)}")
         return {"success": False, "error": f"Server error: {str(e)}"}
 
-def migrate_json_to_db():
-    """Migrate existing JSON flashcards to the database"""
-    filepath = os.path.join(DATA_DIR, 'flashcards.json')
-    if not os.path.exists(filepath):
-        return {"success": False, "message": "JSON file not found"}
-    
-    with open(filepath, 'r') as f:
-        data = json.load(f)
+def _existing_rows(model, parent_column, ids):
+    """Map id -> parent id for the given ids, in one query"""
+    if not ids:
+        return {}
+    rows = db.session.execute(db.select(model.id, parent_column).where(model.id.in_(ids)))
+    return {row[0]: row[1] for row in rows}
+
+def add_flashcards(cards):
+    """Add many flashcards at once, creating missing categories, chapters and decks.
     
-    cards_migrated = 0
+    Each item takes the same fields as add_flashcard(). Existing parents are
+    looked up with one query per level, new parents and all valid cards are
+    inserted with executemany in a single transaction, and one result per
+    item is returned in input order.
+    """
+    results = [None] * len(cards)
+    valid = []
+    for index, data in enumerate(cards):
+        error = _validate_flashcard(data)
+        if error:
+            results[index] = {"index": index, "success": False, "error": error}
+        else:
+            valid.append((index, data))
     
-    for cat_data in data.get('categories', []):
-        category = Category.query.filter_by(id=cat_data['id']).first()
-        if not category:
-            category = Category(
-                id=cat_data['id'],
-                name=cat_data['name'],
-                description=cat_data.get('description', '')
-            )
-            db.session.add(category)
-            print(f"Added category: {cat_data['name']}")
+    try:
+        # Parent ids as they already are in the database
+        existing_categories = set(_existing_rows(Category, Category.id, {data['category_id'] for _, data in valid}))
+        chapter_parents = _existing_rows(Chapter, Chapter.category_id, {data['chapter_id'] for _, data in valid})
+        deck_parents = _existing_rows(Deck, Deck.chapter_id, {data['deck_id'] for _, data in valid})
         
-        for ch_data in cat_data.get('chapters', []):
-            chapter = Chapter.query.filter_by(id=ch_data['id'], category_id=cat_data['id']).first()
-            if not chapter:
-                chapter = Chapter(
-                    id=ch_data['id'],
-                    name=ch_data['name'],
-                    category_id=cat_data['id']
-                )
-                db.session.add(chapter)
-                print(f"Added chapter: {ch_data['name']}")
+        new_rows = {'categories': [], 'chapters': [], 'decks': [], 'flashcards': []}
+        for index, data in valid:
+            # A chapter or deck id can only live under one parent
+            if chapter_parents.get(data['chapter_id'], data['category_id']) != data['category_id']:
+                results[index] = {"index": index, "success": False,
+                                  "error": f"Chapter {data['chapter_id']} belongs to category {chapter_parents[data['chapter_id']]}"}
+                continue
+            if deck_parents.get(data['deck_id'], data['chapter_id']) != data['chapter_id']:
+                results[index] = {"index": index, "success": False,
+                                  "error": f"Deck {data['deck_id']} belongs to chapter {deck_parents[data['deck_id']]}"}
+                continue
             
-            for deck_data in ch_data.get('decks', []):
-                deck = Deck.query.filter_by(id=deck_data['id'], chapter_id=ch_data['id']).first()
-                if not deck:
-                    deck = Deck(
-                        id=deck_data['id'],
-                        name=deck_data['name'],
-                        difficulty=deck_data['difficulty'],
-                        chapter_id=ch_data['id']
-                    )
-                    db.session.add(deck)
-                    print(f"Added deck: {deck_data['name']}")
-                
-                # Make sure to commit the deck so it exists for the cards
-                db.session.commit()
-                
-                for i, card_data in enumerate(deck_data.get('cards', [])):
-                    # Create a unique card ID using the deck ID
-                    card_id = f"{deck_data['id']}_{card_data.get('id', f'card{i+1}')}"
-                    
-                    flashcard = Flashcard.query.filter_by(id=card_id).first()
-                    if not flashcard:
-                        created_at = datetime.utcnow()
-                        if 'created_at' in card_data:
-                            try:
-                                created_at = datetime.fromisoformat(card_data['created_at'])
-                            except:
-                                pass  # Use default if parsing fails
-                            
-                        flashcard = Flashcard(
-                            id=card_id,
-                            question=card_data['question'],
-                            answer=card_data['answer'],
-                            deck_id=deck_data['id'],
-                            created_at=created_at
-                        )
-                        db.session.add(flashcard)
-                        cards_migrated += 1
-                        
-                        # Commit every 10 cards to avoid large transactions
-                        if cards_migrated % 10 == 0:
-                            db.session.commit()
-                            print(f"Migrated {cards_migrated} cards so far...")
+            if data['category_id'] not in existing_categories:
+                existing_categories.add(data['category_id'])
+                new_rows['categories'].append({
+                    'id': data['category_id'],
+                    'name': data['category_name'],
+                    'description': data.get('category_description', '')
+                })
+            if data['chapter_id'] not in chapter_parents:
+                chapter_parents[data['chapter_id']] = data['category_id']
+                new_rows['chapters'].append({
+                    'id': data['chapter_id'],
+                    'name': data['chapter_name'],
+                    'category_id': data['category_id']
+                })
+            if data['deck_id'] not in deck_parents:
+                deck_parents[data['deck_id']] = data['chapter_id']
+                new_rows['decks'].append({
+                    'id': data['deck_id'],
+                    'name': data['deck_name'],
+                    'difficulty': data['difficulty'],
+                    'chapter_id': data['chapter_id']
+                })
+            
+            card_id = generate_uuid()
+            new_rows['flashcards'].append({
+                'id': card_id,
+                'question': data['question'],
+                'answer': data['answer'],
+                'deck_id': data['deck_id'],
+                'created_at': datetime.utcnow()
+            })
+            results[index] = {"index": index, "success": True, "card_id": card_id}
+        
+        # Parents first, then every card, all in one transaction
+        for model in (Category, Chapter, Deck, Flashcard):
+            rows = new_rows[model.__tablename__]
+            if rows:
+                db.session.execute(model.__table__.insert(), rows)
+        db.session.commit()
+    except Exception as db_error:
+        db.session.rollback()
+        logger.error(f"Database error in add_flashcards: {str(db_error)}")
+        return {"success": False, "error": f"Database error: {str(db_error)}"}
+    
+    created = len(new_rows['flashcards'])
+    if created or new_rows['categories']:
+        bump_content_version()
     
-    db.session.commit()
-    return {"success": True, "message": f"Data migrated successfully. Total cards: {cards_migrated}"}
+    logger.info(f"Added {created} of {len(cards)} flashcards in one batch")
+    return {
+        "success": True,
+        "created": created,
+        "failed": len(cards) - created,
+        "results": results
+    }
+
+def migrate_json_to_db(batch_size=None):
+    """Migrate existing JSON flashcards to the database"""
+    return import_flashcards(batch_size=batch_size)
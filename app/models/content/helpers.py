@@ -1,25 +1,145 @@
-import json
 import os
-from datetime import datetime
+import threading
+from datetime import datetime, timezone
+
+from app import codec
 
 # Define data directory path
 DATA_DIR = os.path.join(os.path.dirname(os.path.dirname(os.path.dirname(__file__))), 'static', 'data')
 
+# Parsed documents shared by every request in the process, keyed by path.
+# Each entry remembers the file's stat signature and is re-read only when
+# the file changes on disk (or save_json writes it). Entries also carry any
+# indexes built from the document, so those are rebuilt with it.
+_json_cache = {}
+_json_cache_lock = threading.Lock()
+
+_READ_ONLY_MESSAGE = "cached JSON documents are read-only; use load_json(filename, mutable=True) to get a copy"
+
+class FrozenDict(dict):
+    """A dict that refuses in-place changes. copy() returns a plain dict."""
+
+    def _read_only(self, *args, **kwargs):
+        raise TypeError(_READ_ONLY_MESSAGE)
+
+    __setitem__ = __delitem__ = __ior__ = _read_only
+    clear = pop = popitem = setdefault = update = _read_only
+
+    def copy(self):
+        return dict(self)
+
+    def __deepcopy__(self, memo):
+        return thaw(self)
+
+    def __reduce__(self):
+        return (dict, (dict(self),))
+
+class FrozenList(list):
+    """A list that refuses in-place changes. copy() returns a plain list."""
+
+    def _read_only(self, *args, **kwargs):
+        raise TypeError(_READ_ONLY_MESSAGE)
+
+    __setitem__ = __delitem__ = __iadd__ = __imul__ = _read_only
+    append = extend = insert = pop = remove = clear = sort = reverse = _read_only
+
+    def copy(self):
+        return list(self)
+
+    def __deepcopy__(self, memo):
+        return thaw(self)
+
+    def __reduce__(self):
+        return (list, (list(self),))
+
+def freeze(obj):
+    """Recursively convert parsed JSON into FrozenDict / FrozenList"""
+    if isinstance(obj, dict):
+        return FrozenDict((key, freeze(value)) for key, value in obj.items())
+    if isinstance(obj, list):
+        return FrozenList(freeze(value) for value in obj)
+    return obj
+
+def thaw(obj):
+    """Recursively copy parsed JSON into plain, mutable dicts and lists"""
+    if isinstance(obj, dict):
+        return {key: thaw(value) for key, value in obj.items()}
+    if isinstance(obj, list):
+        return [thaw(value) for value in obj]
+    return obj
+
 def ensure_data_dir():
     """Ensure the data directory exists"""
     os.makedirs(DATA_DIR, exist_ok=True)
 
-def load_json(filename):
-    """Load JSON data from a file"""
-    filepath = os.path.join(DATA_DIR, filename)
-    if not os.path.exists(filepath):
+def _load_cached(filepath):
+    """Return (signature, frozen document, derived indexes) for a file, or None if it is missing"""
+    try:
+        st = os.stat(filepath)
+    except FileNotFoundError:
+        return None
+    signature = (st.st_mtime_ns, st.st_size, st.st_ino)
+
+    entry = _json_cache.get(filepath)
+    if entry is not None and entry[0] == signature:
+        return entry
+
+    with _json_cache_lock:
+        entry = _json_cache.get(filepath)
+        if entry is not None and entry[0] == signature:
+            return entry
+        with open(filepath, 'rb') as f:
+            entry = (signature, freeze(codec.load(f)), {})
+        _json_cache[filepath] = entry
+        return entry
+
+def load_json(filename, mutable=False):
+    """Load JSON data from a file.
+
+    Returns a shared, read-only view of the parsed document that is only
+    re-parsed when the file changes. Pass mutable=True to get a private copy
+    that can be modified (e.g. before handing it to save_json).
+    """
+    entry = _load_cached(os.path.join(DATA_DIR, filename))
+    if entry is None:
         return {}
-    with open(filepath, 'r') as f:
-        return json.load(f)
+    return thaw(entry[1]) if mutable else entry[1]
+
+def load_json_index(filename, name, builder):
+    """Return builder(document) for a JSON file, built once per version of the file.
+
+    The result is cached next to the parsed document under `name` and thrown
+    away together with it. A missing file is indexed as an empty document.
+    """
+    entry = _load_cached(os.path.join(DATA_DIR, filename))
+    if entry is None:
+        return builder({})
+    derived = entry[2]
+    try:
+        return derived[name]
+    except KeyError:
+        index = builder(entry[1])
+        derived[name] = index
+        return index
 
 def save_json(data, filename):
     """Save JSON data to a file"""
     ensure_data_dir()
     filepath = os.path.join(DATA_DIR, filename)
-    with open(filepath, 'w') as f:
-        json.dump(data, f, indent=2)
+    with open(filepath, 'wb') as f:
+        f.write(codec.dumps_bytes(data, indent=True))
+    with _json_cache_lock:
+        _json_cache.pop(filepath, None)
+
+def parse_client_timestamp(value):
+    """Naive UTC datetime from a client-supplied ISO 8601 string, never later
+    than now; None means now. Raises ValueError for anything else."""
+    now = datetime.utcnow()
+    if value is None:
+        return now
+    if not isinstance(value, str):
+        raise ValueError("timestamp must be an ISO 8601 string")
+    timestamp = datetime.fromisoformat(value)
+    if timestamp.tzinfo is not None:
+        timestamp = timestamp.astimezone(timezone.utc).replace(tzinfo=None)
+    return min(timestamp, now)
@@ -0,0 +1,388 @@
+"""Set-based import of the JSON content packs into the database.
+
+Packs are read as a stream of records (see stream.py), existing ids are
+preloaded with one query per table and new rows are buffered and written
+with executemany INSERTs, parents before children.
+By default everything lands in a single transaction; with
+IMPORT_COMMIT_EACH_BATCH set, every batch of IMPORT_BATCH_SIZE rows is
+committed on its own so a huge pack does not hold one long write lock.
+"""
+import logging
+import os
+from datetime import datetime
+
+from flask import current_app
+
+from app.models.database import db, Category, Chapter, Deck, Flashcard, Quiz, QuizQuestion, QuizAnswer
+from app.models.content.helpers import DATA_DIR
+from app.models.content.version import bump_content_version
+from app.models.content.stream import ContentFormatError, open_pack, iter_flashcard_records, iter_quizzes
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_BATCH_SIZE = 10000
+
+# Only the first few row errors are returned; the counts cover all of them
+MAX_REPORTED_ERRORS = 20
+
+def _parse_created_at(value):
+    if value:
+        try:
+            return datetime.fromisoformat(value)
+        except (TypeError, ValueError):
+            pass  # Use default if parsing fails
+    return datetime.utcnow()
+
+def _require_fields(fields, names):
+    """Raise ValueError unless each named field is a non-empty string (or an integer id)"""
+    for name in names:
+        value = fields.get(name)
+        if isinstance(value, bool) or not isinstance(value, (str, int)) or value == '':
+            raise ValueError(f"{name} must be a non-empty string")
+
+def _existing_ids(model):
+    return set(db.session.execute(db.select(model.id)).scalars())
+
+class ImportReport:
+    """Inserted / skipped / failed counts per kind of row"""
+
+    def __init__(self, *kinds):
+        self.counts = {kind: {'inserted': 0, 'skipped': 0, 'failed': 0} for kind in kinds}
+        self.errors = []
+
+    def skipped(self, kind):
+        self.counts[kind]['skipped'] += 1
+
+    def failed(self, kind, item_id, message):
+        self.counts[kind]['failed'] += 1
+        if len(self.errors) < MAX_REPORTED_ERRORS:
+            self.errors.append({'type': kind, 'id': item_id, 'error': message})
+
+    def inserted(self, kind, count):
+        self.counts[kind]['inserted'] += count
+
+    def to_dict(self, success, message):
+        return {
+            'success': success,
+            'message': message,
+            'counts': self.counts,
+            'errors': self.errors
+        }
+
+class BulkWriter:
+    """Buffer rows per table and write them with executemany, parents first.
+
+    Rows only count as inserted once the transaction holding them commits.
+    Quiz questions are written with RETURNING so their answers can be given
+    the generated question ids in the same batch.
+    """
+
+    # Write order; every table only references tables before it
+    TABLES = ('categories', 'chapters', 'decks', 'flashcards', 'quizzes', 'quiz_questions')
+    MODELS = {
+        'categories': Category,
+        'chapters': Chapter,
+        'decks': Deck,
+        'flashcards': Flashcard,
+        'quizzes': Quiz,
+    }
+
+    def __init__(self, report, batch_size=None, commit_each_batch=None):
+        config = current_app.config
+        if batch_size is None:
+            batch_size = config.get('IMPORT_BATCH_SIZE', DEFAULT_BATCH_SIZE)
+        if commit_each_batch is None:
+            commit_each_batch = config.get('IMPORT_COMMIT_EACH_BATCH', False)
+        self.report = report
+        self.batch_size = max(int(batch_size or DEFAULT_BATCH_SIZE), 1)
+        self.commit_each_batch = commit_each_batch
+        self.pending = {table: [] for table in self.TABLES}
+        self.pending_rows = 0
+        # Rows written in the open transaction, moved to the report on commit
+        self.uncommitted = {}
+
+    def add(self, table, row, kind=None):
+        self.pending[table].append(row)
+        self.pending_rows += 1
+        if table == 'quiz_questions':
+            self.pending_rows += len(row['answers'])
+        if kind:
+            self.uncommitted[kind] = self.uncommitted.get(kind, 0) + 1
+
+    def checkpoint(self):
+        """Write the buffer once it holds a full batch; call between complete items"""
+        if self.pending_rows >= self.batch_size:
+            self.flush()
+            if self.commit_each_batch:
+                self.commit()
+
+    def flush(self):
+        """Write all buffered rows in the open transaction"""
+        for table in self.TABLES:
+            rows = self.pending[table]
+            if not rows:
+                continue
+            if table == 'quiz_questions':
+                self._write_questions(rows)
+            else:
+                db.session.execute(self.MODELS[table].__table__.insert(), rows)
+            self.pending[table] = []
+        self.pending_rows = 0
+
+    def _write_questions(self, rows):
+        answers_per_question = [row.pop('answers') for row in rows]
+        stmt = QuizQuestion.__table__.insert().returning(QuizQuestion.id, sort_by_parameter_order=True)
+        question_ids = db.session.execute(stmt, rows).scalars().all()
+
+        answer_rows = []
+        for question_id, answers in zip(question_ids, answers_per_question):
+            for answer in answers:
+                answer['question_id'] = question_id
+                answer_rows.append(answer)
+        if answer_rows:
+            db.session.execute(QuizAnswer.__table__.insert(), answer_rows)
+
+    def commit(self):
+        db.session.commit()
+        for kind, count in self.uncommitted.items():
+            self.report.inserted(kind, count)
+        self.uncommitted = {}
+
+    def finish(self):
+        """Flush and commit whatever is left"""
+        self.flush()
+        self.commit()
+
+    def abort(self):
+        db.session.rollback()
+        self.pending = {table: [] for table in self.TABLES}
+        self.pending_rows = 0
+        self.uncommitted = {}
+
+# Report kind and parent record kind for each flashcard record kind
+_FLASHCARD_KINDS = {
+    'category': ('categories', None),
+    'chapter': ('chapters', 'category'),
+    'deck': ('decks', 'chapter'),
+    'card': ('cards', 'deck'),
+}
+
+# Fields every flashcard record must carry; a card's own id is optional
+_REQUIRED_FIELDS = {
+    'category': ('id', 'name'),
+    'chapter': ('id', 'name'),
+    'deck': ('id', 'name', 'difficulty'),
+    'card': ('question', 'answer'),
+}
+
+def _flashcard_row(kind, fields, parent_id, position):
+    """Table name and row for one flashcard record; raises on missing or invalid fields"""
+    _require_fields(fields, _REQUIRED_FIELDS[kind])
+    if kind == 'card' and 'id' in fields:
+        _require_fields(fields, ('id',))
+    if kind != 'category' and parent_id is None:
+        raise ValueError(f"{kind} has no parent id")
+    if kind == 'category':
+        return 'categories', {
+            'id': fields['id'],
+            'name': fields['name'],
+            'description': fields.get('description', '')
+        }
+    if kind == 'chapter':
+        return 'chapters', {
+            'id': fields['id'],
+            'name': fields['name'],
+            'category_id': parent_id
+        }
+    if kind == 'deck':
+        return 'decks', {
+            'id': fields['id'],
+            'name': fields['name'],
+            'difficulty': fields['difficulty'],
+            'chapter_id': parent_id
+        }
+    return 'flashcards', {
+        # Create a unique card ID using the deck ID
+        'id': f"{parent_id}_{fields.get('id', f'card{position+1}')}",
+        'question': fields['question'],
+        'answer': fields['answer'],
+        'deck_id': parent_id,
+        'created_at': _parse_created_at(fields.get('created_at'))
+    }
+
+def _record_id(kind, fields, parent_id, position):
+    if not isinstance(fields, dict):
+        return None
+    if kind == 'card':
+        return f"{parent_id}_{fields.get('id', f'card{position+1}')}"
+    return fields.get('id')
+
+def _run_import(run, source, path, default_filename, file_format, not_found):
+    """Call run(source, file_format) with a decoded pack or a streamed pack file"""
+    if source is not None:
+        return run(source, 'json')
+    filepath = path or os.path.join(DATA_DIR, default_filename)
+    if not os.path.exists(filepath):
+        return {"success": False, "message": not_found}
+    with open_pack(filepath, file_format) as (fp, detected_format):
+        return run(fp, detected_format)
+
+def import_flashcards(data=None, path=None, batch_size=None, commit_each_batch=None, file_format=None):
+    """Import a categories → chapters → decks → cards pack, skipping rows that exist.
+
+    Reads static/data/flashcards.json unless `data` (a decoded pack) or `path`
+    is given. Files are streamed, and .ndjson / .jsonl files (or
+    file_format='ndjson') are read as one flat card per line. Card ids are
+    prefixed with their deck id, as the original migration did.
+    """
+    def run(source, source_format):
+        return _import_flashcard_records(iter_flashcard_records(source, source_format),
+                                         batch_size, commit_each_batch)
+    return _run_import(run, data, path, 'flashcards.json', file_format, "JSON file not found")
+
+def _import_flashcard_records(records, batch_size, commit_each_batch):
+    report = ImportReport('categories', 'chapters', 'decks', 'cards')
+    writer = BulkWriter(report, batch_size, commit_each_batch)
+    existing = {
+        'category': _existing_ids(Category),
+        'chapter': _existing_ids(Chapter),
+        'deck': _existing_ids(Deck),
+        'card': _existing_ids(Flashcard),
+    }
+    # Ids of records that could not be imported, so their children are not either
+    failed = {kind: set() for kind in _FLASHCARD_KINDS}
+
+    try:
+        for kind, fields, parent_id, position in records:
+            report_kind, parent_kind = _FLASHCARD_KINDS[kind]
+            record_id = _record_id(kind, fields, parent_id, position)
+            if parent_kind and parent_id in failed[parent_kind]:
+                failed[kind].add(record_id)
+                report.failed(report_kind, record_id, f"Parent {parent_kind} {parent_id} was not imported")
+                continue
+            if record_id is not None and record_id in existing[kind]:
+                report.skipped(report_kind)
+                continue
+            try:
+                table, row = _flashcard_row(kind, fields, parent_id, position)
+            except (KeyError, TypeError, AttributeError, ValueError) as e:
+                failed[kind].add(record_id)
+                report.failed(report_kind, record_id, f"Invalid {kind}: {e!r}")
+                continue
+            writer.add(table, row, report_kind)
+            existing[kind].add(record_id)
+            writer.checkpoint()
+
+        writer.finish()
+    except ContentFormatError as e:
+        writer.abort()
+        logger.error(f"Flashcard import failed: {str(e)}")
+        return report.to_dict(False, f"Invalid content file: {str(e)}")
+    except Exception as e:
+        writer.abort()
+        logger.error(f"Flashcard import failed: {str(e)}")
+        return report.to_dict(False, f"Database error: {str(e)}")
+    finally:
+        if any(counts['inserted'] for counts in report.counts.values()):
+            bump_content_version()
+
+    cards = report.counts['cards']
+    logger.info(f"Flashcard import complete: {report.counts}")
+    return report.to_dict(True, f"Data migrated successfully. Total cards: {cards['inserted']} "
+                                f"(skipped {cards['skipped']}, failed {cards['failed']})")
+
+def _question_row(quiz_id, position, question):
+    answers = question.get('answers') or []
+    return {
+        'quiz_id': quiz_id,
+        'position': position,
+        'question_key': question.get('id'),
+        'text': question.get('text') or '',
+        'type': question.get('type'),
+        'explanation': question.get('explanation'),
+        'answers': [{
+            'position': i,
+            'answer_key': answer.get('id'),
+            'text': answer.get('text') or '',
+            'correct': bool(answer.get('correct'))
+        } for i, answer in enumerate(answers)]
+    }
+
+def import_quizzes(data=None, path=None, batch_size=None, commit_each_batch=None, file_format=None):
+    """Import a quiz pack, skipping quizzes that exist and creating missing categories.
+
+    Reads static/data/quizzes.json unless `data` (a decoded pack) or `path` is
+    given. Files are streamed one quiz at a time; .ndjson / .jsonl files (or
+    file_format='ndjson') hold one quiz per line.
+    """
+    def run(source, source_format):
+        return _import_quiz_records(iter_quizzes(source, source_format), batch_size, commit_each_batch)
+    return _run_import(run, data, path, 'quizzes.json', file_format, "Quizzes JSON file not found")
+
+def _import_quiz_records(quizzes, batch_size, commit_each_batch):
+    report = ImportReport('categories', 'quizzes')
+    writer = BulkWriter(report, batch_size, commit_each_batch)
+    existing_categories = _existing_ids(Category)
+    existing_quizzes = _existing_ids(Quiz)
+
+    try:
+        for quiz_data in quizzes:
+            quiz_id = None
+            try:
+                quiz_id = quiz_data.get('id')
+                _require_fields(quiz_data, ('id', 'title', 'category_id', 'difficulty'))
+                if quiz_id in existing_quizzes:
+                    report.skipped('quizzes')
+                    continue
+
+                questions = quiz_data['questions']
+                if not isinstance(questions, list):
+                    raise TypeError("questions must be a list")
+                question_rows = [_question_row(quiz_id, position, question)
+                                 for position, question in enumerate(questions)]
+                quiz_row = {
+                    'id': quiz_id,
+                    'title': quiz_data['title'],
+                    'description': quiz_data.get('description', ''),
+                    'category_id': quiz_data['category_id'],
+                    'difficulty': quiz_data['difficulty'],
+                    'time_limit_minutes': quiz_data.get('time_limit_minutes', 0),
+                    'question_count': len(question_rows),
+                    'created_at': _parse_created_at(quiz_data.get('created_at'))
+                }
+            except (KeyError, TypeError, AttributeError, ValueError) as e:
+                report.failed('quizzes', quiz_id, f"Invalid quiz: {e!r}")
+                continue
+
+            if quiz_row['category_id'] not in existing_categories:
+                # This is a simplified version - in reality, you would need more category info
+                writer.add('categories', {
+                    'id': quiz_row['category_id'],
+                    'name': f"Category for {quiz_row['title']}",
+                    'description': "Auto-created during quiz migration"
+                }, 'categories')
+                existing_categories.add(quiz_row['category_id'])
+
+            writer.add('quizzes', quiz_row, 'quizzes')
+            for question_row in question_rows:
+                writer.add('quiz_questions', question_row)
+            existing_quizzes.add(quiz_id)
+            writer.checkpoint()
+
+        writer.finish()
+    except ContentFormatError as e:
+        writer.abort()
+        logger.error(f"Quiz import failed: {str(e)}")
+        return report.to_dict(False, str(e))
+    except Exception as e:
+        writer.abort()
+        logger.error(f"Quiz import failed: {str(e)}")
+        return report.to_dict(False, f"Database error: {str(e)}")
+    finally:
+        if any(counts['inserted'] for counts in report.counts.values()):
+            bump_content_version()
+
+    quizzes = report.counts['quizzes']
+    logger.info(f"Quiz import complete: {report.counts}")
+    return report.to_dict(True, f"Data migrated successfully. Total quizzes: {quizzes['inserted']} "
+                                f"(skipped {quizzes['skipped']}, failed {quizzes['failed']})")
@@ -1,14 +1,57 @@
 import logging
-from datetime import datetime
-import json
 
 from app.models.database import db, Category, Quiz
-from app.models.content.helpers import load_json, save_json, DATA_DIR
-import os
+from app.models.content.helpers import load_json_index, FrozenList
+from app.models.content.version import bump_content_version
+from app.models.content.importer import import_quizzes
 
-def get_quizzes(category=None, difficulty=None):
-    """Get quizzes, optionally filtered by category and difficulty"""
-    logging.info(f"Fetching quizzes. Filters: category={category}, difficulty={difficulty}")
+logger = logging.getLogger(__name__)
+
+SUMMARY_FIELDS = ('id', 'title', 'description', 'category_id', 'difficulty', 'time_limit_minutes', 'created_at')
+
+def _summarize_json_quiz(quiz):
+    """Project a quiz from the JSON fallback onto the summary fields"""
+    summary = {field: quiz.get(field) for field in SUMMARY_FIELDS}
+    summary['description'] = summary['description'] or ''
+    summary['time_limit_minutes'] = summary['time_limit_minutes'] or 0
+    summary['question_count'] = len(quiz.get('questions') or [])
+    return summary
+
+def _build_json_quiz_index(data):
+    """Index the quizzes.json fallback by id and by (category, difficulty) filter"""
+    quizzes = data.get('quizzes') if data else None
+    if not isinstance(quizzes, list):
+        return None
+    
+    by_id = {}
+    by_filter = {}
+    for quiz in quizzes:
+        # The first quiz with a given id wins, as with the old linear scan
+        by_id.setdefault(quiz.get('id'), quiz)
+        category, difficulty = quiz.get('category_id'), quiz.get('difficulty')
+        for key in ((None, None), (category, None), (None, difficulty), (category, difficulty)):
+            by_filter.setdefault(key, []).append(quiz)
+    # The lists are shared between requests, so hand them out read-only
+    by_filter = {key: FrozenList(matches) for key, matches in by_filter.items()}
+    return {'by_id': by_id, 'by_filter': by_filter}
+
+def _json_quiz_index():
+    return load_json_index('quizzes.json', 'quiz_index', _build_json_quiz_index)
+
+def _json_fallback_quizzes(category=None, difficulty=None):
+    """Quizzes from quizzes.json matching the filters, or None if the file has none"""
+    index = _json_quiz_index()
+    if index is None:
+        return None
+    return index['by_filter'].get((category or None, difficulty or None), [])
+
+def get_quizzes(category=None, difficulty=None, summary=False):
+    """Get quizzes, optionally filtered by category and difficulty.
+    
+    With summary=True the questions are left out and replaced by question_count,
+    and the question tables are not queried at all.
+    """
+    logger.debug("Fetching quizzes: category=%s, difficulty=%s, summary=%s", category, difficulty, summary)
     
     try:
         try:
@@ -21,18 +64,22 @@ def get_quizzes(category=None, difficulty=None):
             if difficulty:
                 query = query.filter_by(difficulty=difficulty)
             
+            if not summary:
+                # Load all questions (and, through them, all answers) in two batched queries
+                query = query.options(db.selectinload(Quiz.question_rows))
+            
             # Execute the query
             quizzes = query.all()
-            logging.info(f"Found {len(quizzes)} quizzes in database")
+            logger.debug("Found %d quizzes in database", len(quizzes))
             
             # Format the response safely
             result = {"quizzes": []}
             for quiz in quizzes:
                 try:
-                    quiz_dict = quiz.to_dict()
+                    quiz_dict = quiz.to_summary_dict() if summary else quiz.to_dict()
                     result["quizzes"].append(quiz_dict)
                 except Exception as quiz_err:
-                    logging.error(f"Error serializing quiz {quiz.id}: {str(quiz_err)}")
+                    logger.error(f"Error serializing quiz {quiz.id}: {str(quiz_err)}")
                     # Add minimal info for the quiz
                     result["quizzes"].append({
                         "id": quiz.id,
@@ -43,58 +90,50 @@ def get_quizzes(category=None, difficulty=None):
             
             # Fallback to JSON if no quizzes found in database
             if not quizzes:
-                logging.info("No quizzes found in database, checking JSON fallback")
+                logger.debug("No quizzes found in database, checking JSON fallback")
                 try:
-                    data = load_json('quizzes.json')
-                    if data and 'quizzes' in data and isinstance(data['quizzes'], list):
-                        logging.info(f"Found {len(data['quizzes'])} quizzes in JSON file")
-                        
-                        # Apply filters to JSON data
-                        json_quizzes = data['quizzes']
-                        if category:
-                            json_quizzes = [q for q in json_quizzes if q.get('category_id') == category]
-                        if difficulty:
-                            json_quizzes = [q for q in json_quizzes if q.get('difficulty') == difficulty]
+                    # Filtered lists come straight from the cached index
+                    json_quizzes = _json_fallback_quizzes(category, difficulty)
+                    if json_quizzes is not None:
+                        if summary:
+                            json_quizzes = [_summarize_json_quiz(q) for q in json_quizzes]
                         
                         result = {"quizzes": json_quizzes}
-                        logging.info(f"Returning {len(json_quizzes)} quizzes from JSON file")
+                        logger.debug("Returning %d quizzes from JSON file", len(json_quizzes))
                     else:
-                        logging.info("No quizzes found in JSON file either")
+                        logger.debug("No quizzes found in JSON file either")
                 except Exception as json_err:
-                    logging.error(f"Error reading JSON file: {str(json_err)}")
+                    logger.error(f"Error reading JSON file: {str(json_err)}")
             
             return result
         except Exception as db_err:
-            logging.error(f"Database error in get_quizzes: {str(db_err)}")
+            logger.error(f"Database error in get_quizzes: {str(db_err)}")
             
             # Try JSON fallback in case of database error
             try:
-                data = load_json('quizzes.json')
-                if data and 'quizzes' in data and isinstance(data['quizzes'], list):
-                    json_quizzes = data['quizzes']
-                    if category:
-                        json_quizzes = [q for q in json_quizzes if q.get('category_id') == category]
-                    if difficulty:
-                        json_quizzes = [q for q in json_quizzes if q.get('difficulty') == difficulty]
+                json_quizzes = _json_fallback_quizzes(category, difficulty)
+                if json_quizzes is not None:
+                    if summary:
+                        json_quizzes = [_summarize_json_quiz(q) for q in json_quizzes]
                     
                     return {"quizzes": json_quizzes}
                 else:
                     return {"quizzes": [], "error": "No quizzes found"}
             except Exception as json_err:
-                logging.error(f"JSON fallback error: {str(json_err)}")
+                logger.error(f"JSON fallback error: {str(json_err)}")
                 return {"quizzes": [], "error": f"Server error: {str(db_err)}"}
     except Exception as e:
-        logging.error(f"Unexpected error in get_quizzes: {str(e)}")
+        logger.error(f"Unexpected error in get_quizzes: {str(e)}")
         return {"quizzes": [], "error": f"Server error: {str(e)}"}
 
 def add_quiz(data):
     """Add a new quiz to the database"""
-    print(f"[SERVER] Adding new quiz to database: {data.get('title')}")
+    logger.debug("Adding new quiz to database: %s", data.get('title'))
     
     # Make sure the category exists
     category = Category.query.filter_by(id=data['category_id']).first()
     if not category:
-        print(f"[SERVER] Category {data['category_id']} not found, creating category")
+        logger.debug("Category %s not found, creating category", data['category_id'])
         # Create the category if it doesn't exist
         category = Category(
             id=data['category_id'],
@@ -103,6 +142,7 @@ def add_quiz(data):
         )
         db.session.add(category)
         db.session.commit()
+        bump_content_version()
     
     # Create the quiz
     try:
@@ -130,14 +170,32 @@ def add_quiz(data):
         
         db.session.add(quiz)
         db.session.commit()
+        bump_content_version()
         
-        print(f"[SERVER] Quiz added successfully with ID: {quiz.id}")
+        logger.debug("Quiz added successfully with ID: %s", quiz.id)
         return {"success": True, "quiz_id": quiz.id}
     except Exception as e:
         db.session.rollback()
-        print(f"[SERVER] Error adding quiz: {str(e)}")
+        logger.error(f"Error adding quiz: {str(e)}")
         return {"success": False, "error": str(e)}
 
+def public_quiz(quiz):
+    """A quiz as learners see it: the answers without their correct flags.
+
+    Submissions are graded by POST /api/quizzes/<id>/attempts, so the answer
+    key never has to leave the server.
+    """
+    public = dict(quiz)
+    if 'questions' in quiz:
+        public['questions'] = [
+            dict(question, answers=[
+                {key: value for key, value in answer.items() if key != 'correct'}
+                for answer in question.get('answers') or [] if isinstance(answer, dict)
+            ]) if isinstance(question, dict) else question
+            for question in quiz['questions'] or []
+        ]
+    return public
+
 def get_quiz(quiz_id):
     """Get a specific quiz by ID"""
     quiz = Quiz.query.get(quiz_id)
@@ -145,11 +203,9 @@ def get_quiz(quiz_id):
         return quiz.to_dict()
     
     # Fallback to JSON if not found in database
-    data = load_json('quizzes.json')
-    if data and 'quizzes' in data:
-        for quiz in data['quizzes']:
-            if quiz['id'] == quiz_id:
-                return quiz
+    index = _json_quiz_index()
+    if index is not None:
+        return index['by_id'].get(quiz_id)
     
     return None
 
@@ -170,6 +226,7 @@ def update_quiz(quiz_id, data):
             quiz.questions = data['questions']
         
         db.session.commit()
+        bump_content_version()
         return {"success": True, "quiz_id": quiz.id}
     except Exception as e:
         db.session.rollback()
@@ -184,82 +241,12 @@ def delete_quiz(quiz_id):
     try:
         db.session.delete(quiz)
         db.session.commit()
+        bump_content_version()
         return {"success": True}
     except Exception as e:
         db.session.rollback()
         return {"success": False, "error": str(e)}
 
-def migrate_quizzes_to_db():
+def migrate_quizzes_to_db(batch_size=None):
     """Migrate existing JSON quizzes to the database"""
-    print("[SERVER] Starting migration of quizzes from JSON to database")
-    
-    filepath = os.path.join(DATA_DIR, 'quizzes.json')
-    if not os.path.exists(filepath):
-        print("[SERVER] Quizzes JSON file not found")
-        return {"success": False, "message": "Quizzes JSON file not found"}
-    
-    with open(filepath, 'r') as f:
-        data = json.load(f)
-    
-    if not data or 'quizzes' not in data:
-        print("[SERVER] No quizzes found in JSON file")
-        return {"success": False, "message": "No quizzes found in JSON file"}
-    
-    quizzes_migrated = 0
-    
-    for quiz_data in data.get('quizzes', []):
-        # Skip if quiz already exists
-        existing_quiz = Quiz.query.filter_by(id=quiz_data['id']).first()
-        if existing_quiz:
-            print(f"[SERVER] Quiz {quiz_data['id']} already exists, skipping")
-            continue
-        
-        # Check if category exists
-        category = Category.query.filter_by(id=quiz_data['category_id']).first()
-        if not category:
-            print(f"[SERVER] Category {quiz_data['category_id']} not found, creating it")
-            # This is a simplified version - in reality, you would need more category info
-            category = Category(
-                id=quiz_data['category_id'],
-                name=f"Category for {quiz_data['title']}",
-                description="Auto-created during quiz migration"
-            )
-            db.session.add(category)
-            db.session.commit()
-        
-        # Create the quiz
-        try:
-            created_at = datetime.utcnow()
-            if 'created_at' in quiz_data:
-                try:
-                    created_at = datetime.fromisoformat(quiz_data['created_at'])
-                except:
-                    pass  # Use default if parsing fails
-            
-            quiz = Quiz(
-                id=quiz_data['id'],
-                title=quiz_data['title'],
-                description=quiz_data.get('description', ''),
-                category_id=quiz_data['category_id'],
-                difficulty=quiz_data['difficulty'],
-                time_limit_minutes=quiz_data.get('time_limit_minutes', 0),
-                questions=quiz_data['questions'],
-                created_at=created_at
-            )
-            
-            db.session.add(quiz)
-            quizzes_migrated += 1
-            
-            # Commit every few quizzes
-            if quizzes_migrated % 5 == 0:
-                db.session.commit()
-                print(f"[SERVER] Migrated {quizzes_migrated} quizzes so far")
-                
-        except Exception as e:
-            print(f"[SERVER] Error migrating quiz {quiz_data.get('id')}: {str(e)}")
-    
-    # Final commit
-    db.session.commit()
-    
-    print(f"[SERVER] Quizzes migration complete. Migrated {quizzes_migrated} quizzes")
-    return {"success": True, "message": f"Data migrated successfully. Total quizzes: {quizzes_migrated}"}
+    return import_quizzes(batch_size=batch_size)
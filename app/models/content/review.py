@@ -0,0 +1,165 @@
+"""Spaced-repetition scheduling (SM-2) for flashcard reviews.
+
+Each learner has one ReviewState row per card they have graded, indexed on
+(learner_id, due_at). Fetching the due queue is a range read on that index
+and grading a card touches its row by primary key, so both stay O(log n)
+however much review history builds up.
+"""
+import logging
+from datetime import datetime, timedelta
+
+from app.models.database import db, Flashcard, ReviewState
+from app.models.content.helpers import parse_client_timestamp
+
+logger = logging.getLogger(__name__)
+
+# SM-2 grades: 0-2 are lapses (forgotten), 3-5 are successful recalls
+MIN_GRADE, MAX_GRADE, PASSING_GRADE = 0, 5, 3
+INITIAL_EASE = 2.5
+MIN_EASE = 1.3
+
+def schedule(state, grade, reviewed_at):
+    """Apply one SM-2 grade to a ReviewState in place"""
+    if grade < PASSING_GRADE:
+        state.repetitions = 0
+        state.interval_days = 1
+        state.lapses = (state.lapses or 0) + 1
+    else:
+        state.repetitions = (state.repetitions or 0) + 1
+        if state.repetitions == 1:
+            state.interval_days = 1
+        elif state.repetitions == 2:
+            state.interval_days = 6
+        else:
+            state.interval_days = max(1, round(state.interval_days * state.ease))
+    miss = MAX_GRADE - grade
+    state.ease = max(MIN_EASE, state.ease + 0.1 - miss * (0.08 + miss * 0.02))
+    state.last_reviewed_at = reviewed_at
+    state.due_at = reviewed_at + timedelta(days=state.interval_days)
+
+def _card_dict(card_id, question, answer, deck_id, state=None):
+    data = {
+        'id': card_id,
+        'question': question,
+        'answer': answer,
+        'deck_id': deck_id,
+        'new': state is None
+    }
+    if state is not None:
+        data['review'] = state.to_dict()
+    return data
+
+def get_due_cards(learner_id, limit=20, deck=None, now=None):
+    """The learner's next due cards, oldest due first.
+
+    With a deck, the due cards are limited to that deck and any room left
+    under `limit` is filled with cards from the deck the learner has not
+    reviewed yet. When nothing is due, next_due_at says when something will be.
+    """
+    now = now or datetime.utcnow()
+    due = (
+        db.select(ReviewState, Flashcard.question, Flashcard.answer, Flashcard.deck_id)
+        .join(Flashcard, ReviewState.card_id == Flashcard.id)
+        .where(ReviewState.learner_id == learner_id, ReviewState.due_at <= now)
+        .order_by(ReviewState.due_at)
+        .limit(limit)
+    )
+    if deck:
+        due = due.where(Flashcard.deck_id == deck)
+    cards = [_card_dict(state.card_id, question, answer, deck_id, state)
+             for state, question, answer, deck_id in db.session.execute(due)]
+
+    if deck and len(cards) < limit:
+        reviewed = db.select(ReviewState.card_id).where(
+            ReviewState.learner_id == learner_id, ReviewState.card_id == Flashcard.id)
+        new = (
+            db.select(Flashcard.id, Flashcard.question, Flashcard.answer, Flashcard.deck_id)
+            .where(Flashcard.deck_id == deck, ~reviewed.exists())
+            .order_by(Flashcard.id)
+            .limit(limit - len(cards))
+        )
+        cards.extend(_card_dict(*row) for row in db.session.execute(new))
+
+    next_due_at = None
+    if not cards:
+        next_due_at = db.session.execute(
+            db.select(db.func.min(ReviewState.due_at)).where(ReviewState.learner_id == learner_id)
+        ).scalar()
+
+    return {
+        'cards': cards,
+        'next_due_at': next_due_at.isoformat() if next_due_at else None
+    }
+
+def _validate_grade(item):
+    """Return (card_id, grade, reviewed_at) or raise ValueError"""
+    if not isinstance(item, dict):
+        raise ValueError("Grade must be a JSON object")
+    card_id = item.get('card_id')
+    if not card_id or not isinstance(card_id, str):
+        raise ValueError("Missing required field: card_id")
+    grade = item.get('grade')
+    if isinstance(grade, bool) or not isinstance(grade, int) or not MIN_GRADE <= grade <= MAX_GRADE:
+        raise ValueError(f"grade must be an integer from {MIN_GRADE} to {MAX_GRADE}")
+    try:
+        # Clients syncing offline reviews may send when each one happened
+        reviewed_at = parse_client_timestamp(item.get('reviewed_at'))
+    except (TypeError, ValueError):
+        raise ValueError("reviewed_at must be an ISO 8601 timestamp")
+    return card_id, grade, reviewed_at
+
+def grade_cards(learner_id, grades):
+    """Apply a batch of grades for one learner in a single transaction.
+
+    Existing states and the graded cards are each loaded with one IN query.
+    Grades for the same card are applied in the order given. Returns one
+    result per item, in input order, with the card's new schedule.
+    """
+    results = [None] * len(grades)
+    valid = []
+    for index, item in enumerate(grades):
+        try:
+            valid.append((index, *_validate_grade(item)))
+        except ValueError as e:
+            results[index] = {"index": index, "success": False, "error": str(e)}
+
+    card_ids = {card_id for _, card_id, _, _ in valid}
+    graded = 0
+    try:
+        states = {}
+        known_cards = set()
+        if card_ids:
+            states = {state.card_id: state for state in db.session.execute(
+                db.select(ReviewState).where(ReviewState.learner_id == learner_id,
+                                             ReviewState.card_id.in_(card_ids))
+            ).scalars()}
+            known_cards = set(db.session.execute(
+                db.select(Flashcard.id).where(Flashcard.id.in_(card_ids))
+            ).scalars())
+
+        for index, card_id, grade, reviewed_at in valid:
+            if card_id not in known_cards:
+                results[index] = {"index": index, "success": False, "error": f"Card {card_id} not found"}
+                continue
+            state = states.get(card_id)
+            if state is None:
+                state = ReviewState(learner_id=learner_id, card_id=card_id, repetitions=0,
+                                    interval_days=0, ease=INITIAL_EASE, lapses=0)
+                db.session.add(state)
+                states[card_id] = state
+            schedule(state, grade, reviewed_at)
+            results[index] = {"index": index, "success": True, "review": state.to_dict()}
+            graded += 1
+
+        db.session.commit()
+    except Exception as db_error:
+        db.session.rollback()
+        logger.error(f"Database error in grade_cards: {str(db_error)}")
+        return {"success": False, "error": f"Database error: {str(db_error)}"}
+
+    return {
+        "success": True,
+        "graded": graded,
+        "failed": len(grades) - graded,
+        "results": results
+    }
@@ -0,0 +1,270 @@
+"""Full-text search over flashcards and quiz questions.
+
+On SQLite the text lives in two FTS5 tables, flashcards_fts and
+quiz_questions_fts. Quiz questions have integer ids, which serve as the FTS
+rowids directly. Flashcard ids are strings and the implicit rowid of the
+flashcards table may be renumbered by VACUUM, so each card gets a stable
+integer key in flashcards_fts_keys, and searches join back on the card id
+stored in the index. Triggers on flashcards and quiz_questions keep the
+index current on every insert, update and delete, whichever code path does
+the write, so nothing in the app has to remember to reindex.
+rebuild_search_index() repopulates everything from scratch.
+
+Other databases fall back to LIKE matching without ranking.
+"""
+import html
+import re
+
+from app.models.database import db, Flashcard, Deck, Chapter, Quiz, QuizQuestion
+
+SEARCH_TYPES = ('flashcard', 'quiz')
+
+# Private-use characters mark snippet highlights so the text around them can
+# be HTML-escaped before they are turned into <mark> tags
+_MARK_START, _MARK_END = '\ue000', '\ue001'
+SNIPPET_TOKENS = 12
+
+SEARCH_DDL = (
+    "CREATE TABLE IF NOT EXISTS flashcards_fts_keys (fts_rowid INTEGER PRIMARY KEY, card_id VARCHAR(50) NOT NULL UNIQUE)",
+    "CREATE VIRTUAL TABLE IF NOT EXISTS flashcards_fts USING fts5(card_id UNINDEXED, question, answer)",
+    "CREATE VIRTUAL TABLE IF NOT EXISTS quiz_questions_fts USING fts5(text, explanation)",
+    """CREATE TRIGGER IF NOT EXISTS flashcards_fts_ai AFTER INSERT ON flashcards BEGIN
+        INSERT INTO flashcards_fts_keys(card_id) VALUES (new.id);
+        INSERT INTO flashcards_fts(rowid, card_id, question, answer)
+        SELECT fts_rowid, new.id, new.question, new.answer FROM flashcards_fts_keys WHERE card_id = new.id;
+    END""",
+    """CREATE TRIGGER IF NOT EXISTS flashcards_fts_ad AFTER DELETE ON flashcards BEGIN
+        DELETE FROM flashcards_fts WHERE rowid = (SELECT fts_rowid FROM flashcards_fts_keys WHERE card_id = old.id);
+        DELETE FROM flashcards_fts_keys WHERE card_id = old.id;
+    END""",
+    """CREATE TRIGGER IF NOT EXISTS flashcards_fts_au AFTER UPDATE ON flashcards BEGIN
+        DELETE FROM flashcards_fts WHERE rowid = (SELECT fts_rowid FROM flashcards_fts_keys WHERE card_id = old.id);
+        UPDATE flashcards_fts_keys SET card_id = new.id WHERE card_id = old.id;
+        INSERT INTO flashcards_fts(rowid, card_id, question, answer)
+        SELECT fts_rowid, new.id, new.question, new.answer FROM flashcards_fts_keys WHERE card_id = new.id;
+    END""",
+    """CREATE TRIGGER IF NOT EXISTS quiz_questions_fts_ai AFTER INSERT ON quiz_questions BEGIN
+        INSERT INTO quiz_questions_fts(rowid, text, explanation)
+        VALUES (new.id, new.text, coalesce(new.explanation, ''));
+    END""",
+    """CREATE TRIGGER IF NOT EXISTS quiz_questions_fts_ad AFTER DELETE ON quiz_questions BEGIN
+        DELETE FROM quiz_questions_fts WHERE rowid = old.id;
+    END""",
+    """CREATE TRIGGER IF NOT EXISTS quiz_questions_fts_au AFTER UPDATE ON quiz_questions BEGIN
+        DELETE FROM quiz_questions_fts WHERE rowid = old.id;
+        INSERT INTO quiz_questions_fts(rowid, text, explanation)
+        VALUES (new.id, new.text, coalesce(new.explanation, ''));
+    END""",
+)
+
+# The first version keyed flashcards_fts on flashcards.rowid; its triggers
+# and index are replaced when found
+LEGACY_FLASHCARD_DDL = (
+    "DROP TRIGGER IF EXISTS flashcards_fts_ai",
+    "DROP TRIGGER IF EXISTS flashcards_fts_ad",
+    "DROP TRIGGER IF EXISTS flashcards_fts_au",
+    "DROP TABLE IF EXISTS flashcards_fts",
+)
+
+REBUILD_SQL = (
+    "DELETE FROM flashcards_fts",
+    "DELETE FROM flashcards_fts_keys",
+    "INSERT INTO flashcards_fts_keys(card_id) SELECT id FROM flashcards",
+    """INSERT INTO flashcards_fts(rowid, card_id, question, answer)
+       SELECT k.fts_rowid, f.id, f.question, f.answer FROM flashcards f JOIN flashcards_fts_keys k ON k.card_id = f.id""",
+    "INSERT INTO flashcards_fts(flashcards_fts) VALUES ('optimize')",
+    "DELETE FROM quiz_questions_fts",
+    "INSERT INTO quiz_questions_fts(rowid, text, explanation) SELECT id, text, coalesce(explanation, '') FROM quiz_questions",
+    "INSERT INTO quiz_questions_fts(quiz_questions_fts) VALUES ('optimize')",
+)
+
+def _uses_fts():
+    return db.engine.dialect.name == 'sqlite'
+
+def ensure_search_index():
+    """Create the FTS tables and triggers if missing; fills the tables when new"""
+    if not _uses_fts():
+        return False
+    with db.engine.begin() as conn:
+        existing = {row[0] for row in conn.exec_driver_sql(
+            "SELECT name FROM sqlite_master "
+            "WHERE name IN ('flashcards_fts', 'flashcards_fts_keys', 'quiz_questions_fts')")}
+        if 'flashcards_fts' in existing and 'flashcards_fts_keys' not in existing:
+            for statement in LEGACY_FLASHCARD_DDL:
+                conn.exec_driver_sql(statement)
+            existing.discard('flashcards_fts')
+        for statement in SEARCH_DDL:
+            conn.exec_driver_sql(statement)
+        rebuilt = len(existing) < 3
+        if rebuilt:
+            for statement in REBUILD_SQL:
+                conn.exec_driver_sql(statement)
+    return rebuilt
+
+def rebuild_search_index():
+    """Repopulate the search index from the content tables; returns indexed row counts"""
+    if not _uses_fts():
+        return {}
+    with db.engine.begin() as conn:
+        keyed = conn.exec_driver_sql(
+            "SELECT 1 FROM sqlite_master WHERE name = 'flashcards_fts_keys'").scalar()
+        if not keyed:
+            for statement in LEGACY_FLASHCARD_DDL:
+                conn.exec_driver_sql(statement)
+        for statement in SEARCH_DDL:
+            conn.exec_driver_sql(statement)
+        for statement in REBUILD_SQL:
+            conn.exec_driver_sql(statement)
+        return {
+            'flashcards': conn.exec_driver_sql("SELECT count(*) FROM flashcards_fts").scalar(),
+            'quiz_questions': conn.exec_driver_sql("SELECT count(*) FROM quiz_questions_fts").scalar(),
+        }
+
+def _search_terms(query):
+    return re.findall(r'\w+', query.lower())
+
+def _match_expression(terms):
+    """Every term must appear; the last one may be a prefix (search as you type)"""
+    quoted = [f'"{term}"' for term in terms]
+    quoted[-1] += '*'
+    return ' '.join(quoted)
+
+def _highlight(snippet):
+    if snippet is None:
+        return None
+    return html.escape(snippet).replace(_MARK_START, '<mark>').replace(_MARK_END, '</mark>')
+
+_FLASHCARD_SEARCH_SQL = """
+    SELECT f.id, f.deck_id, ch.category_id,
+           snippet(flashcards_fts, 1, :mark_start, :mark_end, '…', :tokens) AS question,
+           snippet(flashcards_fts, 2, :mark_start, :mark_end, '…', :tokens) AS answer,
+           flashcards_fts.rank AS score
+    FROM flashcards_fts
+    JOIN flashcards f ON f.id = flashcards_fts.card_id
+    JOIN decks d ON d.id = f.deck_id
+    JOIN chapters ch ON ch.id = d.chapter_id
+    WHERE flashcards_fts MATCH :match {category_filter}
+    ORDER BY flashcards_fts.rank
+    LIMIT :limit
+"""
+
+_QUIZ_SEARCH_SQL = """
+    SELECT q.id, q.quiz_id, z.title, z.category_id,
+           snippet(quiz_questions_fts, 0, :mark_start, :mark_end, '…', :tokens) AS text,
+           snippet(quiz_questions_fts, 1, :mark_start, :mark_end, '…', :tokens) AS explanation,
+           quiz_questions_fts.rank AS score
+    FROM quiz_questions_fts
+    JOIN quiz_questions q ON q.id = quiz_questions_fts.rowid
+    JOIN quizzes z ON z.id = q.quiz_id
+    WHERE quiz_questions_fts MATCH :match {category_filter}
+    ORDER BY quiz_questions_fts.rank
+    LIMIT :limit
+"""
+
+def _run_search(sql, category_column, match, category, limit):
+    category_filter = f"AND {category_column} = :category" if category else ""
+    params = {
+        'match': match, 'category': category, 'limit': limit,
+        'mark_start': _MARK_START, 'mark_end': _MARK_END, 'tokens': SNIPPET_TOKENS,
+    }
+    # columns() makes it a SELECT, so GET requests can route it to the replica
+    stmt = db.text(sql.format(category_filter=category_filter)).columns()
+    return db.session.execute(stmt, params)
+
+def _search_flashcards_fts(match, category, limit):
+    rows = _run_search(_FLASHCARD_SEARCH_SQL, 'ch.category_id', match, category, limit)
+    return [{
+        'type': 'flashcard',
+        'id': row.id,
+        'deck_id': row.deck_id,
+        'category_id': row.category_id,
+        'question': _highlight(row.question),
+        'answer': _highlight(row.answer),
+        'score': row.score,
+    } for row in rows]
+
+def _search_quizzes_fts(match, category, limit):
+    rows = _run_search(_QUIZ_SEARCH_SQL, 'z.category_id', match, category, limit)
+    return [{
+        'type': 'quiz',
+        'id': row.id,
+        'quiz_id': row.quiz_id,
+        'quiz_title': row.title,
+        'category_id': row.category_id,
+        'question': _highlight(row.text),
+        'explanation': _highlight(row.explanation) or None,
+        'score': row.score,
+    } for row in rows]
+
+def _interleave(*result_lists):
+    """Alternate between per-type result lists, each already in its own best-first order.
+
+    bm25 ranks from different FTS tables come from different corpora and
+    cannot be compared, so no list's scores are used to order another's.
+    """
+    merged = []
+    for position in range(max((len(results) for results in result_lists), default=0)):
+        merged.extend(results[position] for results in result_lists if position < len(results))
+    return merged
+
+def _search_like(terms, search_type, category, limit):
+    """Unranked fallback for databases without FTS5"""
+    flashcards, quizzes = [], []
+    if search_type in (None, 'flashcard'):
+        stmt = (
+            db.select(Flashcard.id, Flashcard.deck_id, Chapter.category_id, Flashcard.question, Flashcard.answer)
+            .join(Deck, Flashcard.deck_id == Deck.id)
+            .join(Chapter, Deck.chapter_id == Chapter.id)
+            .limit(limit)
+        )
+        for term in terms:
+            stmt = stmt.where(db.or_(Flashcard.question.ilike(f"%{term}%"), Flashcard.answer.ilike(f"%{term}%")))
+        if category:
+            stmt = stmt.where(Chapter.category_id == category)
+        flashcards = [{
+            'type': 'flashcard', 'id': row.id, 'deck_id': row.deck_id, 'category_id': row.category_id,
+            'question': html.escape(row.question), 'answer': html.escape(row.answer), 'score': 0,
+        } for row in db.session.execute(stmt)]
+    if search_type in (None, 'quiz'):
+        stmt = (
+            db.select(QuizQuestion.id, QuizQuestion.quiz_id, Quiz.title, Quiz.category_id,
+                      QuizQuestion.text, QuizQuestion.explanation)
+            .join(Quiz, QuizQuestion.quiz_id == Quiz.id)
+            .limit(limit)
+        )
+        for term in terms:
+            stmt = stmt.where(db.or_(QuizQuestion.text.ilike(f"%{term}%"), QuizQuestion.explanation.ilike(f"%{term}%")))
+        if category:
+            stmt = stmt.where(Quiz.category_id == category)
+        quizzes = [{
+            'type': 'quiz', 'id': row.id, 'quiz_id': row.quiz_id, 'quiz_title': row.title,
+            'category_id': row.category_id, 'question': html.escape(row.text),
+            'explanation': html.escape(row.explanation) if row.explanation else None, 'score': 0,
+        } for row in db.session.execute(stmt)]
+    return _interleave(flashcards, quizzes)[:limit]
+
+def search_content(query, search_type=None, category=None, limit=20):
+    """Search flashcards and/or quiz questions, best matches first.
+
+    Snippets are HTML-escaped with the matched terms wrapped in <mark>. Each
+    type is ranked on its own (a lower score is a better match, FTS5 bm25
+    rank), so scores only compare between results of the same type; when
+    both types are searched their results are interleaved.
+    """
+    terms = _search_terms(query or '')
+    result = {'query': query, 'results': []}
+    if not terms:
+        return result
+
+    if not _uses_fts():
+        result['results'] = _search_like(terms, search_type, category, limit)
+        return result
+
+    match = _match_expression(terms)
+    flashcards, quizzes = [], []
+    if search_type in (None, 'flashcard'):
+        flashcards = _search_flashcards_fts(match, category, limit)
+    if search_type in (None, 'quiz'):
+        quizzes = _search_quizzes_fts(match, category, limit)
+    result['results'] = _interleave(flashcards, quizzes)[:limit]
+    return result
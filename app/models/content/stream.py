@@ -0,0 +1,293 @@
+"""Incremental readers for flashcard and quiz packs.
+
+A pack is either one JSON document (the static/data layout) or NDJSON with
+one record per line. Both are read as a stream of small records, so memory
+stays flat however large the file gets:
+
+* flashcards: ('category' | 'chapter' | 'deck' | 'card', fields, parent_id, position)
+  tuples in document order, parents always before their children
+* quizzes: one quiz dict at a time
+
+NDJSON flashcard lines are flat cards carrying their hierarchy, in the same
+shape POST /api/flashcards takes:
+
+    {"category_id": "...", "category_name": "...", "chapter_id": "...",
+     "chapter_name": "...", "deck_id": "...", "deck_name": "...",
+     "difficulty": "...", "question": "...", "answer": "..."}
+
+NDJSON quiz lines are quiz objects, exactly as they appear in quizzes.json.
+"""
+import contextlib
+import json
+import os
+import re
+
+CHUNK_SIZE = 1 << 16
+
+NDJSON_EXTENSIONS = ('.ndjson', '.jsonl')
+
+_WHITESPACE = re.compile(r'[ \t\n\r]*')
+# A decode error this close to the end of the buffer may just be a token cut
+# off by it (e.g. "-Infin", "\u12"); further back, the input is malformed
+_TOKEN_TAIL = 16
+
+# (record kind, key holding the children, fields required before the children
+# can be streamed) for each level of a flashcard pack
+_LEVELS = (
+    ('category', 'chapters', ('id', 'name')),
+    ('chapter', 'decks', ('id', 'name')),
+    ('deck', 'cards', ('id', 'name', 'difficulty')),
+    ('card', None, ()),
+)
+
+class ContentFormatError(ValueError):
+    """A pack file that is not valid JSON / NDJSON or has the wrong layout"""
+
+class JSONStream:
+    """Pull parser that decodes a text file one JSON value at a time.
+
+    Containers are walked with iter_object() / iter_array(), which yield once
+    per member and expect the caller to consume it (read_value() or a nested
+    iter_*). Only values passed to read_value() are ever held in memory.
+    """
+
+    def __init__(self, fp, chunk_size=CHUNK_SIZE):
+        self.fp = fp
+        self.chunk_size = chunk_size
+        self.decoder = json.JSONDecoder()
+        self.buf = ''
+        self.pos = 0
+        # Characters dropped from the front of buf, for error positions
+        self.offset = 0
+        self.eof = False
+
+    def _fill(self, size=None):
+        """Append the next chunk to the buffer, dropping what was consumed"""
+        if self.eof:
+            return False
+        chunk = self.fp.read(size or self.chunk_size)
+        if not chunk:
+            self.eof = True
+            return False
+        self.offset += self.pos
+        self.buf = self.buf[self.pos:] + chunk
+        self.pos = 0
+        return True
+
+    def error(self, message):
+        return ContentFormatError(f"{message} at character {self.offset + self.pos}")
+
+    def peek(self):
+        """Next non-whitespace character without consuming it, or None at the end"""
+        while True:
+            self.pos = _WHITESPACE.match(self.buf, self.pos).end()
+            if self.pos < len(self.buf):
+                return self.buf[self.pos]
+            if not self._fill():
+                return None
+
+    def expect(self, char):
+        if self.peek() != char:
+            raise self.error(f"Expecting '{char}'")
+        self.pos += 1
+
+    def read_value(self):
+        """Decode the next complete value"""
+        if self.peek() is None:
+            raise self.error("Expecting value")
+        size = self.chunk_size
+        while True:
+            try:
+                value, end = self.decoder.raw_decode(self.buf, self.pos)
+            except json.JSONDecodeError as e:
+                # Read on and retry only if the value may run past the buffer:
+                # the decoder stopped inside a string or near the buffer's end
+                truncated = e.msg.startswith('Unterminated string') or len(self.buf) - e.pos < _TOKEN_TAIL
+                if not truncated or not self._fill(size):
+                    self.pos = e.pos
+                    raise self.error(e.msg) from None
+                size *= 2
+                continue
+            # A number at the very end of the buffer may continue in the next chunk
+            if end == len(self.buf) and self._fill(size):
+                continue
+            self.pos = end
+            return value
+
+    def iter_object(self):
+        """Yield each key of the next object; the caller consumes its value"""
+        self.expect('{')
+        if self.peek() == '}':
+            self.pos += 1
+            return
+        while True:
+            if self.peek() != '"':
+                raise self.error("Expecting property name enclosed in double quotes")
+            key = self.read_value()
+            self.expect(':')
+            yield key
+            char = self.peek()
+            self.pos += 1
+            if char == '}':
+                return
+            if char != ',':
+                self.pos -= 1
+                raise self.error("Expecting ',' delimiter")
+
+    def iter_array(self):
+        """Yield once per element of the next array; the caller consumes it"""
+        self.expect('[')
+        if self.peek() == ']':
+            self.pos += 1
+            return
+        while True:
+            yield
+            char = self.peek()
+            self.pos += 1
+            if char == ']':
+                return
+            if char != ',':
+                self.pos -= 1
+                raise self.error("Expecting ',' delimiter")
+
+    def expect_end(self):
+        if self.peek() is not None:
+            raise self.error("Extra data")
+
+def detect_format(path):
+    """'ndjson' for .ndjson / .jsonl files, otherwise 'json'"""
+    return 'ndjson' if os.path.splitext(path)[1].lower() in NDJSON_EXTENSIONS else 'json'
+
+@contextlib.contextmanager
+def open_pack(path, file_format=None):
+    """Open a pack file for reading; yields (file, format)"""
+    with open(path, encoding='utf-8') as fp:
+        yield fp, file_format or detect_format(path)
+
+def _iter_ndjson(fp):
+    for line_number, line in enumerate(fp, 1):
+        if not line.strip():
+            continue
+        try:
+            yield json.loads(line)
+        except json.JSONDecodeError as e:
+            raise ContentFormatError(f"Line {line_number}: {e.msg}") from None
+
+# Flashcards
+
+def _walk_loaded(value, level, parent_id, position):
+    """Records for an already-decoded item and everything below it"""
+    kind, child_key, _ = _LEVELS[level]
+    if child_key is None or not isinstance(value, dict):
+        yield kind, value, parent_id, position
+        return
+    fields = {key: item for key, item in value.items() if key != child_key}
+    yield kind, fields, parent_id, position
+    children = value.get(child_key) or []
+    if isinstance(children, list):
+        for i, child in enumerate(children):
+            yield from _walk_loaded(child, level + 1, fields.get('id'), i)
+
+def _walk_stream(stream, level, parent_id, position):
+    """Records for the next item in the stream and everything below it.
+
+    The item's own fields are emitted as soon as its children start, provided
+    the required ones have been seen. If the children come first they are
+    decoded whole and replayed once the item is complete, so key order only
+    affects memory, never the result.
+    """
+    kind, child_key, required = _LEVELS[level]
+    if child_key is None or stream.peek() != '{':
+        yield from _walk_loaded(stream.read_value(), level, parent_id, position)
+        return
+
+    fields = {}
+    emitted = False
+    deferred = None
+    for key in stream.iter_object():
+        if key != child_key:
+            fields[key] = stream.read_value()
+        elif not emitted and all(name in fields for name in required) and stream.peek() == '[':
+            yield kind, fields, parent_id, position
+            emitted = True
+            for i, _ in enumerate(stream.iter_array()):
+                yield from _walk_stream(stream, level + 1, fields['id'], i)
+        else:
+            deferred = stream.read_value()
+
+    if not emitted:
+        yield kind, fields, parent_id, position
+    if isinstance(deferred, list):
+        for i, child in enumerate(deferred):
+            yield from _walk_loaded(child, level + 1, fields.get('id'), i)
+
+def _flashcard_records_from_stream(fp):
+    stream = JSONStream(fp)
+    for key in stream.iter_object():
+        if key == 'categories' and stream.peek() == '[':
+            for i, _ in enumerate(stream.iter_array()):
+                yield from _walk_stream(stream, 0, None, i)
+        else:
+            stream.read_value()
+    stream.expect_end()
+
+def _flashcard_records_from_ndjson(fp):
+    seen = {'category': set(), 'chapter': set(), 'deck': set()}
+    cards_per_deck = {}
+    for line in _iter_ndjson(fp):
+        if not isinstance(line, dict):
+            yield 'card', line, None, 0
+            continue
+        category_id, chapter_id, deck_id = line.get('category_id'), line.get('chapter_id'), line.get('deck_id')
+        if category_id not in seen['category']:
+            seen['category'].add(category_id)
+            yield 'category', {'id': category_id, 'name': line.get('category_name'),
+                               'description': line.get('category_description', '')}, None, 0
+        if chapter_id not in seen['chapter']:
+            seen['chapter'].add(chapter_id)
+            yield 'chapter', {'id': chapter_id, 'name': line.get('chapter_name')}, category_id, 0
+        if deck_id not in seen['deck']:
+            seen['deck'].add(deck_id)
+            yield 'deck', {'id': deck_id, 'name': line.get('deck_name'),
+                           'difficulty': line.get('difficulty')}, chapter_id, 0
+        position = cards_per_deck.get(deck_id, 0)
+        cards_per_deck[deck_id] = position + 1
+        card = {key: line[key] for key in ('id', 'question', 'answer', 'created_at') if key in line}
+        yield 'card', card, deck_id, position
+
+def iter_flashcard_records(source, file_format='json'):
+    """Flashcard records from a decoded pack (dict) or an open pack file"""
+    if isinstance(source, dict):
+        for i, category in enumerate(source.get('categories') or []):
+            yield from _walk_loaded(category, 0, None, i)
+    elif file_format == 'ndjson':
+        yield from _flashcard_records_from_ndjson(source)
+    else:
+        yield from _flashcard_records_from_stream(source)
+
+# Quizzes
+
+def _quizzes_from_stream(fp):
+    stream = JSONStream(fp)
+    found = False
+    for key in stream.iter_object():
+        if key == 'quizzes' and stream.peek() == '[':
+            found = True
+            for _ in stream.iter_array():
+                yield stream.read_value()
+        else:
+            stream.read_value()
+    stream.expect_end()
+    if not found:
+        raise ContentFormatError("No quizzes found in JSON file")
+
+def iter_quizzes(source, file_format='json'):
+    """Quiz dicts from a decoded pack (dict) or an open pack file"""
+    if isinstance(source, dict):
+        if 'quizzes' not in source:
+            raise ContentFormatError("No quizzes found in JSON file")
+        yield from source['quizzes'] or []
+    elif file_format == 'ndjson':
+        yield from _iter_ndjson(source)
+    else:
+        yield from _quizzes_from_stream(source)
@@ -0,0 +1,82 @@
+import os
+import threading
+import uuid
+
+from flask import current_app, has_app_context
+
+# Every content write path calls bump_content_version() after it commits.
+# Readers (response caches, ETags) compare against get_content_version().
+#
+# The version lives in a small stamp file so that every gunicorn worker sees
+# a bump made by any other worker. Each bump writes a fresh random token and
+# os.replace()s it into place, so checking for a change costs one os.stat()
+# and the file is only re-read when the stat signature moves.
+
+_lock = threading.Lock()
+_state = {'path': None, 'signature': None, 'token': None}
+_local_counter = 0
+
+def _version_file():
+    path = current_app.config.get('CONTENT_VERSION_FILE')
+    if not path:
+        path = os.path.join(current_app.instance_path, 'content.version')
+    return path
+
+def _signature(st):
+    return (st.st_ino, st.st_mtime_ns, st.st_size)
+
+def _write_token(path):
+    token = uuid.uuid4().hex
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    tmp_path = f"{path}.{os.getpid()}.tmp"
+    with open(tmp_path, 'w') as f:
+        f.write(token)
+    os.replace(tmp_path, path)
+    return token
+
+def get_content_version():
+    """Return an opaque string that changes whenever content is written"""
+    global _local_counter
+    if not has_app_context():
+        return f"local-{_local_counter}"
+
+    path = _version_file()
+    try:
+        st = os.stat(path)
+    except FileNotFoundError:
+        with _lock:
+            try:
+                _write_token(path)
+                st = os.stat(path)
+            except OSError:
+                return f"local-{_local_counter}"
+    except OSError:
+        return f"local-{_local_counter}"
+
+    signature = _signature(st)
+    if _state['path'] == path and _state['signature'] == signature:
+        return _state['token']
+
+    with _lock:
+        try:
+            with open(path, 'r') as f:
+                token = f.read().strip()
+        except OSError:
+            return f"local-{_local_counter}"
+        _state.update(path=path, signature=signature, token=token)
+        return token
+
+def bump_content_version():
+    """Mark all cached content as stale, in this process and in every other worker"""
+    global _local_counter
+    with _lock:
+        _local_counter += 1
+        if not has_app_context():
+            return
+        path = _version_file()
+        try:
+            token = _write_token(path)
+            _state.update(path=path, signature=_signature(os.stat(path)), token=token)
+        except OSError as e:
+            current_app.logger.error(f"Could not write content version file {path}: {str(e)}")
+            _state.update(path=None, signature=None, token=None)
@@ -1,9 +1,15 @@
 from flask_sqlalchemy import SQLAlchemy
 from datetime import datetime
+import logging
 import uuid
 import json
 
-db = SQLAlchemy()
+from app import codec
+from app.models.routing import RoutingSession
+
+logger = logging.getLogger(__name__)
+
+db = SQLAlchemy(session_options={'class_': RoutingSession})
 
 def generate_uuid():
     return str(uuid.uuid4())
@@ -33,6 +39,10 @@ class Chapter(db.Model):
     category_id = db.Column(db.String(50), db.ForeignKey('categories.id'), nullable=False)
     decks = db.relationship('Deck', backref='chapter', lazy='dynamic', cascade='all, delete-orphan')
     
+    __table_args__ = (
+        db.Index('ix_chapters_category_id', 'category_id'),
+    )
+    
     def to_dict(self):
         return {
             'id': self.id,
@@ -49,6 +59,11 @@ class Deck(db.Model):
     chapter_id = db.Column(db.String(50), db.ForeignKey('chapters.id'), nullable=False)
     cards = db.relationship('Flashcard', backref='deck', lazy='dynamic', cascade='all, delete-orphan')
     
+    __table_args__ = (
+        db.Index('ix_decks_chapter_id', 'chapter_id'),
+        db.Index('ix_decks_difficulty', 'difficulty'),
+    )
+    
     def to_dict(self):
         return {
             'id': self.id,
@@ -65,6 +80,12 @@ class Flashcard(db.Model):
     answer = db.Column(db.Text, nullable=False)
     deck_id = db.Column(db.String(50), db.ForeignKey('decks.id'), nullable=False)
     created_at = db.Column(db.DateTime, default=datetime.utcnow)
+    review_states = db.relationship('ReviewState', backref='card', lazy='dynamic', cascade='all, delete-orphan')
+    
+    __table_args__ = (
+        # Serves deck filters and keyset pagination by id within a deck
+        db.Index('ix_flashcards_deck_id_id', 'deck_id', 'id'),
+    )
     
     def to_dict(self):
         return {
@@ -84,39 +105,49 @@ class Quiz(db.Model):
     difficulty = db.Column(db.String(20), nullable=False)
     time_limit_minutes = db.Column(db.Integer, default=0)
     created_at = db.Column(db.DateTime, default=datetime.utcnow)
-    # Store the questions as a JSON string to maintain flexibility
-    _questions_json = db.Column('questions_json', db.Text, nullable=False)
+    # Stored question count so listings never have to load the questions
+    question_count = db.Column(db.Integer, nullable=False, default=0, server_default='0')
+    question_rows = db.relationship('QuizQuestion', backref='quiz', order_by='QuizQuestion.position',
+                                    cascade='all, delete-orphan')
+    
+    __table_args__ = (
+        db.Index('ix_quizzes_category_id_difficulty', 'category_id', 'difficulty'),
+        db.Index('ix_quizzes_difficulty', 'difficulty'),
+    )
     
     @property
     def questions(self):
-        """Deserialize questions from JSON"""
-        if not self._questions_json:
-            return []
-            
-        try:
-            return json.loads(self._questions_json)
-        except json.JSONDecodeError as e:
-            import logging
-            logging.error(f"Error deserializing questions JSON for quiz {self.id}: {str(e)}")
-            return []
+        """Assemble questions in the API shape from the normalized rows"""
+        return [question.to_dict() for question in self.question_rows]
     
     @questions.setter
     def questions(self, value):
-        """Serialize questions to JSON"""
+        """Replace all questions from a list of question dicts or a JSON string"""
         try:
-            if isinstance(value, list):
-                self._questions_json = json.dumps(value)
-            elif isinstance(value, str):
-                # Make sure the string is valid JSON before setting
-                json.loads(value)  # This will raise JSONDecodeError if invalid
-                self._questions_json = value
-            else:
+            if isinstance(value, str):
+                value = codec.loads(value)  # This will raise JSONDecodeError if invalid
+            if not isinstance(value, list):
                 raise ValueError("Questions must be a list or JSON string")
-        except (json.JSONDecodeError, ValueError) as e:
-            import logging
-            logging.error(f"Error serializing questions: {str(e)}")
-            # Set to empty array as fallback
-            self._questions_json = "[]"
+            rows = [QuizQuestion.from_dict(question, position) for position, question in enumerate(value)]
+        except (json.JSONDecodeError, ValueError, TypeError, AttributeError) as e:
+            logger.error(f"Error setting questions: {str(e)}")
+            # Set to empty list as fallback
+            rows = []
+        self.question_rows = rows
+        self.question_count = len(rows)
+    
+    def to_summary_dict(self):
+        """Listing fields only; never loads the questions"""
+        return {
+            'id': self.id,
+            'title': self.title,
+            'description': self.description or '',
+            'category_id': self.category_id,
+            'difficulty': self.difficulty,
+            'time_limit_minutes': self.time_limit_minutes or 0,
+            'question_count': self.question_count or 0,
+            'created_at': self.created_at.isoformat() if self.created_at else None
+        }
     
     def to_dict(self):
         try:
@@ -133,8 +164,7 @@ class Quiz(db.Model):
                 'created_at': created_at_str
             }
         except Exception as e:
-            import logging
-            logging.error(f"Error converting quiz {self.id} to dict: {str(e)}")
+            logger.error(f"Error converting quiz {self.id} to dict: {str(e)}")
             # Return minimal valid data
             return {
                 'id': self.id,
@@ -145,4 +175,146 @@ class Quiz(db.Model):
                 'time_limit_minutes': 0,
                 'questions': [],
                 'created_at': None
-            }
\ No newline at end of file
+            }
+
+class QuizQuestion(db.Model):
+    __tablename__ = 'quiz_questions'
+    
+    id = db.Column(db.Integer, primary_key=True)
+    quiz_id = db.Column(db.String(50), db.ForeignKey('quizzes.id'), nullable=False)
+    position = db.Column(db.Integer, nullable=False)
+    # The question's own "id" from the quiz data (e.g. "q1"), if it had one
+    question_key = db.Column(db.String(50))
+    text = db.Column(db.Text, nullable=False)
+    type = db.Column(db.String(30))
+    explanation = db.Column(db.Text)
+    answers = db.relationship('QuizAnswer', backref='question', order_by='QuizAnswer.position',
+                              lazy='selectin', cascade='all, delete-orphan')
+    
+    __table_args__ = (
+        db.Index('ix_quiz_questions_quiz_id_position', 'quiz_id', 'position'),
+    )
+    
+    @classmethod
+    def from_dict(cls, data, position):
+        return cls(
+            position=position,
+            question_key=data.get('id'),
+            text=data.get('text') or '',
+            type=data.get('type'),
+            explanation=data.get('explanation'),
+            answers=[QuizAnswer.from_dict(answer, i) for i, answer in enumerate(data.get('answers') or [])]
+        )
+    
+    def to_dict(self):
+        data = {
+            'text': self.text,
+            'answers': [answer.to_dict() for answer in self.answers]
+        }
+        if self.question_key is not None:
+            data['id'] = self.question_key
+        if self.type is not None:
+            data['type'] = self.type
+        if self.explanation is not None:
+            data['explanation'] = self.explanation
+        return data
+
+class QuizAnswer(db.Model):
+    __tablename__ = 'quiz_answers'
+    
+    id = db.Column(db.Integer, primary_key=True)
+    question_id = db.Column(db.Integer, db.ForeignKey('quiz_questions.id'), nullable=False)
+    position = db.Column(db.Integer, nullable=False)
+    # The answer's own "id" from the quiz data (e.g. "a"), if it had one
+    answer_key = db.Column(db.String(50))
+    text = db.Column(db.Text, nullable=False)
+    correct = db.Column(db.Boolean, nullable=False, default=False)
+    
+    __table_args__ = (
+        db.Index('ix_quiz_answers_question_id_position', 'question_id', 'position'),
+    )
+    
+    @classmethod
+    def from_dict(cls, data, position):
+        return cls(
+            position=position,
+            answer_key=data.get('id'),
+            text=data.get('text') or '',
+            correct=bool(data.get('correct'))
+        )
+    
+    def to_dict(self):
+        data = {
+            'text': self.text,
+            'correct': self.correct
+        }
+        if self.answer_key is not None:
+            data['id'] = self.answer_key
+        return data
+
+class ReviewState(db.Model):
+    """A learner's spaced-repetition schedule for one card (SM-2)"""
+    __tablename__ = 'review_states'
+    
+    learner_id = db.Column(db.String(50), primary_key=True)
+    card_id = db.Column(db.String(50), db.ForeignKey('flashcards.id'), primary_key=True)
+    # Consecutive successful reviews; reset to 0 by a lapse
+    repetitions = db.Column(db.Integer, nullable=False, default=0)
+    interval_days = db.Column(db.Integer, nullable=False, default=0)
+    ease = db.Column(db.Float, nullable=False, default=2.5)
+    lapses = db.Column(db.Integer, nullable=False, default=0)
+    due_at = db.Column(db.DateTime, nullable=False)
+    last_reviewed_at = db.Column(db.DateTime)
+    
+    __table_args__ = (
+        # The due queue: one learner's cards in due order
+        db.Index('ix_review_states_learner_id_due_at', 'learner_id', 'due_at'),
+    )
+    
+    def to_dict(self):
+        return {
+            'card_id': self.card_id,
+            'repetitions': self.repetitions,
+            'interval_days': self.interval_days,
+            'ease': round(self.ease, 2),
+            'lapses': self.lapses,
+            'due_at': self.due_at.isoformat(),
+            'last_reviewed_at': self.last_reviewed_at.isoformat() if self.last_reviewed_at else None
+        }
+
+class QuizAttempt(db.Model):
+    """One graded quiz submission"""
+    __tablename__ = 'quiz_attempts'
+    
+    id = db.Column(db.String(50), primary_key=True, default=generate_uuid)
+    # No foreign key: quizzes served from the JSON fallback can be attempted too
+    quiz_id = db.Column(db.String(50), nullable=False)
+    learner_id = db.Column(db.String(50), nullable=False)
+    score = db.Column(db.Integer, nullable=False)
+    total = db.Column(db.Integer, nullable=False)
+    # The submitted answers, as {question id: [answer ids]} JSON
+    answers = db.Column(db.Text, nullable=False)
+    submitted_at = db.Column(db.DateTime, nullable=False, default=datetime.utcnow)
+    
+    __table_args__ = (
+        db.Index('ix_quiz_attempts_quiz_id_submitted_at', 'quiz_id', 'submitted_at'),
+        db.Index('ix_quiz_attempts_learner_id_submitted_at', 'learner_id', 'submitted_at'),
+    )
+
+class StudyEvent(db.Model):
+    """Append-only log of client study events"""
+    __tablename__ = 'study_events'
+    
+    id = db.Column(db.Integer, primary_key=True)
+    type = db.Column(db.String(30), nullable=False)
+    learner_id = db.Column(db.String(50), nullable=False)
+    # The card, quiz or demo the event is about
+    subject_id = db.Column(db.String(50))
+    # Free-form JSON sent by the client
+    data = db.Column(db.Text)
+    occurred_at = db.Column(db.DateTime, nullable=False)
+    received_at = db.Column(db.DateTime, nullable=False)
+    
+    __table_args__ = (
+        db.Index('ix_study_events_occurred_at', 'occurred_at'),
+    )
@@ -0,0 +1,68 @@
+"""Per-request routing of reads to a read-only replica bind.
+
+When SQLALCHEMY_REPLICA_URI is configured it is registered as the 'replica'
+bind. Code running inside use_replica() (or a view decorated with
+@replica_reads, or a GET on a blueprint that installed
+route_reads_to_replica) sends its SELECTs to that bind. Everything else —
+flushes, INSERT/UPDATE/DELETE, and all work inside use_primary() — goes to
+the primary. Without a replica configured, everything uses the primary.
+
+The replica can be another database or the primary SQLite file opened
+read-only, e.g. sqlite:///file:/srv/app/data.sqlite?mode=ro&uri=true
+"""
+import contextlib
+from functools import wraps
+
+from flask import g, request
+from flask_sqlalchemy.session import Session
+
+REPLICA_BIND = 'replica'
+
+class RoutingSession(Session):
+    """Session that sends plain SELECTs to the replica when reads are routed there"""
+
+    def get_bind(self, mapper=None, clause=None, bind=None, **kwargs):
+        if (bind is None and not self._flushing and g.get('db_target') == REPLICA_BIND
+                and getattr(clause, 'is_select', False)):
+            engine = self._db.engines.get(REPLICA_BIND)
+            if engine is not None:
+                return engine
+        return super().get_bind(mapper=mapper, clause=clause, bind=bind, **kwargs)
+
+@contextlib.contextmanager
+def _route(target):
+    previous = g.get('db_target')
+    g.db_target = target
+    try:
+        yield
+    finally:
+        g.db_target = previous
+
+def use_replica():
+    """Context manager: send reads to the replica (writes still go to the primary)"""
+    return _route(REPLICA_BIND)
+
+def use_primary():
+    """Context manager: send everything to the primary, e.g. to read your own writes"""
+    return _route(None)
+
+def replica_reads(f):
+    """Decorator version of use_replica()"""
+    @wraps(f)
+    def decorated_function(*args, **kwargs):
+        with use_replica():
+            return f(*args, **kwargs)
+    return decorated_function
+
+def primary_only(f):
+    """Decorator version of use_primary(); overrides a blueprint's replica routing"""
+    @wraps(f)
+    def decorated_function(*args, **kwargs):
+        with use_primary():
+            return f(*args, **kwargs)
+    return decorated_function
+
+def route_reads_to_replica():
+    """before_request hook: route the reads of GET/HEAD requests to the replica"""
+    if request.method in ('GET', 'HEAD'):
+        g.db_target = REPLICA_BIND
@@ -0,0 +1,41 @@
+"""Per-connection PRAGMAs for SQLite engines.
+
+SQLite keeps most settings per connection, so they have to be applied each
+time the pool opens one. The values come from the SQLITE_PRAGMAS config
+dict; see SQLITE_PROFILES in config.py.
+"""
+import logging
+import sqlite3
+
+from sqlalchemy import event
+
+logger = logging.getLogger(__name__)
+
+def pragma_statements(pragmas):
+    return [f"PRAGMA {name}={value}" for name, value in pragmas.items()]
+
+def _make_connect_hook(statements):
+    def set_pragmas(dbapi_connection, connection_record):
+        cursor = dbapi_connection.cursor()
+        try:
+            for statement in statements:
+                try:
+                    cursor.execute(statement)
+                except sqlite3.OperationalError as e:
+                    # e.g. journal_mode on a read-only connection
+                    logger.warning(f"Could not apply '{statement}': {str(e)}")
+        finally:
+            cursor.close()
+    return set_pragmas
+
+def init_app(app, db):
+    """Install the connect hook on every SQLite engine; call after db.init_app(app)"""
+    pragmas = app.config.get('SQLITE_PRAGMAS') or {}
+    if not pragmas:
+        return
+    hook = _make_connect_hook(pragma_statements(pragmas))
+    with app.app_context():
+        engines = list(db.engines.values())
+    for engine in engines:
+        if engine.dialect.name == 'sqlite':
+            event.listen(engine, 'connect', hook)
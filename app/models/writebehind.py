@@ -0,0 +1,203 @@
+"""In-process write-behind queue for append-only rows.
+
+Request handlers put() rows and return immediately; a background thread
+hands them to write() in batches (typically one executemany INSERT),
+whenever batch_size rows are waiting or every `interval` seconds, and once
+more at interpreter exit. Only that thread (and the exit hook) writes.
+
+max_pending bounds the backlog, counting the batch being written. When it
+is full, put() either waits up to put_timeout seconds for the writer to make
+room (overflow='flush': nothing is lost, the caller absorbs the
+backpressure) or drops the oldest row (overflow='drop': a ring buffer, for
+data that is fine to sample under load). Either way the 'backpressure'
+counter goes up, and 'dropped' counts the rows discarded. A 'flush' caller
+still waiting at the deadline queues its rows past max_pending, counted as
+'over_limit', rather than lose them.
+
+A batch that fails to write goes back to the front of the queue and the
+writer backs off, interval seconds after the first failure and twice as long
+after each further one (up to max_backoff), before retrying it in order.
+Only after max_retries failed attempts, or at once for rows the database
+rejects as invalid, is the batch dropped and counted as 'failed'.
+
+Each worker process has its own queue; rows still pending when a process is
+killed without a clean exit are lost.
+"""
+import atexit
+import collections
+import logging
+import os
+import threading
+import time
+
+from sqlalchemy.exc import DataError, IntegrityError
+
+logger = logging.getLogger(__name__)
+
+OVERFLOW_MODES = ('flush', 'drop')
+# Retrying these cannot succeed: the rows themselves are bad
+PERMANENT_ERRORS = (IntegrityError, DataError)
+
+class WriteBehindQueue:
+    def __init__(self, name, write, batch_size=500, interval=2.0, max_pending=10000, overflow='flush',
+                 max_retries=5, put_timeout=None, max_backoff=60.0):
+        if overflow not in OVERFLOW_MODES:
+            raise ValueError(f"overflow must be one of: {', '.join(OVERFLOW_MODES)}")
+        self.name = name
+        self.batch_size = max(1, batch_size)
+        self.interval = interval
+        self.max_pending = max(self.batch_size, max_pending)
+        self.overflow = overflow
+        self.max_retries = max(1, max_retries)
+        self.put_timeout = interval if put_timeout is None else put_timeout
+        self.max_backoff = max(interval, max_backoff)
+        # Failed attempts at the batch at the head of the queue, and when the
+        # writer may try it again
+        self._retries = 0
+        self._retry_at = 0.0
+        # write(rows) runs inside an app context and must commit
+        self._write = write
+        self._app = None
+        self._pending = collections.deque()
+        # Rows taken off the queue by the batch being written
+        self._in_flight = 0
+        self._lock = threading.Lock()
+        # Notified whenever a written or dropped batch frees room
+        self._room = threading.Condition(self._lock)
+        # Only one flush writes at a time, so batches land in order
+        self._flush_lock = threading.Lock()
+        self._wakeup = threading.Event()
+        self._thread = None
+        self._pid = None
+        self.stats = {'enqueued': 0, 'written': 0, 'failed': 0, 'dropped': 0, 'backpressure': 0,
+                      'over_limit': 0, 'batches': 0}
+
+    def init_app(self, app):
+        self._app = app
+        app.extensions.setdefault('write_behind', {})[self.name] = self
+        atexit.register(self._flush_at_exit)
+
+    def pending(self):
+        return len(self._pending)
+
+    def snapshot(self):
+        """Counters plus the current backlog, for monitoring"""
+        return dict(self.stats, pending=len(self._pending), in_flight=self._in_flight,
+                    max_pending=self.max_pending)
+
+    def put(self, row):
+        """Queue one row for writing"""
+        self.put_many((row,))
+
+    def put_many(self, rows):
+        """Queue several rows under one lock acquisition"""
+        self._ensure_thread()
+        deadline = None
+        with self._lock:
+            for row in rows:
+                if len(self._pending) + self._in_flight >= self.max_pending:
+                    self.stats['backpressure'] += 1
+                    if self.overflow == 'drop':
+                        if self._pending:
+                            self._pending.popleft()
+                            self.stats['dropped'] += 1
+                    else:
+                        if deadline is None:
+                            deadline = time.monotonic() + self.put_timeout
+                        self._wait_for_room(deadline)
+                self._pending.append(row)
+                self.stats['enqueued'] += 1
+            ready = len(self._pending) >= self.batch_size
+        if ready:
+            self._wakeup.set()
+
+    def _wait_for_room(self, deadline):
+        # Called with self._lock held; the condition releases it while waiting
+        self._wakeup.set()
+        while len(self._pending) + self._in_flight >= self.max_pending:
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                self.stats['over_limit'] += 1
+                return
+            self._room.wait(remaining)
+
+    def _take(self):
+        with self._lock:
+            count = min(self.batch_size, len(self._pending))
+            rows = [self._pending.popleft() for _ in range(count)]
+            self._in_flight = len(rows)
+            return rows
+
+    def _done(self, rows, requeue=False):
+        """Settle the batch being written: put it back in order, or free its room"""
+        with self._lock:
+            self._in_flight = 0
+            if requeue:
+                self._pending.extendleft(reversed(rows))
+            else:
+                self._room.notify_all()
+
+    def flush(self):
+        """Write every pending row now; returns the number written.
+
+        Stops at the first batch that fails, leaving it queued and scheduling
+        the retry. Called by the background thread and at exit.
+        """
+        written = 0
+        with self._flush_lock:
+            while True:
+                rows = self._take()
+                if not rows:
+                    return written
+                try:
+                    # A fresh app context gets its own session, separate from
+                    # any request that happens to be running on this thread
+                    with self._app.app_context():
+                        self._write(rows)
+                except Exception as e:
+                    self._retries += 1
+                    if isinstance(e, PERMANENT_ERRORS) or self._retries >= self.max_retries:
+                        self._retries = 0
+                        self._done(rows)
+                        self.stats['failed'] += len(rows)
+                        logger.error(f"Write-behind queue {self.name} dropped {len(rows)} rows: {str(e)}")
+                        continue
+                    self._done(rows, requeue=True)
+                    backoff = min(self.interval * 2 ** (self._retries - 1), self.max_backoff)
+                    self._retry_at = time.monotonic() + backoff
+                    logger.warning(f"Write-behind queue {self.name} could not write {len(rows)} rows "
+                                   f"(attempt {self._retries} of {self.max_retries}), "
+                                   f"retrying in {backoff:.1f}s: {str(e)}")
+                    return written
+                self._retries = 0
+                self._done(rows)
+                self.stats['written'] += len(rows)
+                self.stats['batches'] += 1
+                written += len(rows)
+
+    def _flush_at_exit(self):
+        self.flush()
+        if self._pending:
+            logger.error(f"Write-behind queue {self.name} lost {len(self._pending)} rows at exit")
+
+    def _ensure_thread(self):
+        # A forked worker does not inherit the parent's thread
+        if self._thread is not None and self._pid == os.getpid():
+            return
+        with self._lock:
+            if self._thread is not None and self._pid == os.getpid():
+                return
+            self._pid = os.getpid()
+            self._thread = threading.Thread(target=self._run, name=f"write-behind-{self.name}", daemon=True)
+            self._thread.start()
+
+    def _run(self):
+        while True:
+            delay = self._retry_at - time.monotonic()
+            if delay > 0:
+                # Backing off after a failed write; wakeups from put() cannot cut it short
+                time.sleep(delay)
+            else:
+                self._wakeup.wait(self.interval)
+            self._wakeup.clear()
+            self.flush()
@@ -0,0 +1,138 @@
+"""EXPLAIN QUERY PLAN check for the hot read paths (SQLite only).
+
+Each scenario calls the real content function or admin view, records every
+SELECT it sends to the database and asks SQLite how it would run them. A
+plan step that scans a whole table fails the check, unless the scenario is
+a listing that is expected to read that table in full.
+
+The check seeds one row per table inside a transaction that is rolled back
+afterwards, so it can run against any database, including production.
+"""
+from datetime import datetime
+
+from flask import current_app, session
+from sqlalchemy import event
+
+from app.models.database import db, Category, Chapter, Deck, Flashcard, Quiz
+
+SEED_PREFIX = '__plan_check_'
+
+def _seed():
+    """Add one row per content table and return their ids"""
+    ids = {name: f"{SEED_PREFIX}{name}" for name in ('category', 'chapter', 'deck', 'card', 'quiz')}
+    db.session.add(Category(id=ids['category'], name='Plan check', description=''))
+    db.session.add(Chapter(id=ids['chapter'], name='Plan check', category_id=ids['category']))
+    db.session.add(Deck(id=ids['deck'], name='Plan check', difficulty='beginner', chapter_id=ids['chapter']))
+    db.session.add(Flashcard(id=ids['card'], question='Q', answer='A', deck_id=ids['deck'],
+                             created_at=datetime.utcnow()))
+    db.session.add(Quiz(id=ids['quiz'], title='Plan check', description='', category_id=ids['category'],
+                        difficulty='beginner', time_limit_minutes=0,
+                        questions=[{'id': 'q1', 'text': 'Q', 'answers': [{'id': 'a', 'text': 'A', 'correct': True}]}]))
+    db.session.flush()
+    return ids
+
+def _admin_view(endpoint, **values):
+    """Call an admin view as a logged-in admin, within the current session"""
+    def call():
+        with current_app.test_request_context():
+            session['admin_logged_in'] = True
+            current_app.view_functions[endpoint](**values)
+    return call
+
+def _scenarios(ids):
+    """(label, callable, tables it may scan in full)"""
+    from app.models.content import get_flashcards, get_quizzes, get_quiz
+    from app.models.content.catalog import build_catalog_outline, get_deck_cards, list_cards
+    from app.models.content.review import get_due_cards
+
+    category, chapter, deck, card, quiz = (ids[name] for name in ('category', 'chapter', 'deck', 'card', 'quiz'))
+    return [
+        ('get_flashcards(category)', lambda: get_flashcards(category=category), ()),
+        ('get_flashcards(category, chapter)', lambda: get_flashcards(category=category, chapter=chapter), ()),
+        ('get_flashcards(category, difficulty)', lambda: get_flashcards(category=category, difficulty='beginner'), ()),
+        # Categories and chapters are not filtered by difficulty, so they are listed whole
+        ('get_flashcards(difficulty)', lambda: get_flashcards(difficulty='beginner'), ('categories', 'chapters')),
+        ('build_catalog_outline(category)', lambda: build_catalog_outline(category=category), ()),
+        ('get_deck_cards(deck)', lambda: get_deck_cards(deck), ()),
+        ('list_cards(deck)', lambda: list_cards(deck=deck), ()),
+        ('list_cards(chapter)', lambda: list_cards(chapter=chapter), ()),
+        ('list_cards(category)', lambda: list_cards(category=category), ()),
+        ('list_cards(difficulty)', lambda: list_cards(difficulty='beginner'), ()),
+        ('list_cards(after)', lambda: list_cards(after=card), ()),
+        ('get_quizzes(category)', lambda: get_quizzes(category=category), ()),
+        ('get_quizzes(difficulty)', lambda: get_quizzes(difficulty='beginner'), ()),
+        ('get_quizzes(category, difficulty)', lambda: get_quizzes(category=category, difficulty='beginner'), ()),
+        ('get_quizzes(category, summary)', lambda: get_quizzes(category=category, summary=True), ()),
+        ('get_quiz(id)', lambda: get_quiz(quiz), ()),
+        ('get_due_cards(learner)', lambda: get_due_cards(SEED_PREFIX), ()),
+        ('get_due_cards(learner, deck)', lambda: get_due_cards(SEED_PREFIX, deck=deck), ()),
+        ('admin flashcards page', _admin_view('admin.flashcards'), ('categories',)),
+        ('admin edit flashcard page', _admin_view('admin.edit_flashcard', card_id=card), ()),
+        ('admin categories page', _admin_view('admin.categories'), ('categories',)),
+        ('admin chapters page', _admin_view('admin.chapters'), ('categories', 'chapters')),
+        ('admin decks page', _admin_view('admin.decks'), ('chapters', 'decks')),
+        ('admin quizzes page', _admin_view('admin.quizzes'), ('quizzes',)),
+        ('admin edit quiz page', _admin_view('admin.edit_quiz', quiz_id=quiz), ()),
+    ]
+
+def _capture_selects(run):
+    """Run a callable and return the (sql, parameters) of every SELECT it issued"""
+    statements = []
+
+    def record(conn, cursor, statement, parameters, context, executemany):
+        if statement.lstrip().upper().startswith('SELECT'):
+            statements.append((statement, parameters))
+
+    engine = db.engine
+    event.listen(engine, 'before_cursor_execute', record)
+    try:
+        run()
+    finally:
+        event.remove(engine, 'before_cursor_execute', record)
+    return statements
+
+def _full_scans(plan, allowed):
+    """Tables the plan reads in full that are not in `allowed`"""
+    scans = []
+    for row in plan:
+        detail = row[-1]
+        if not detail.startswith('SCAN ') or detail.startswith('SCAN CONSTANT ROW'):
+            continue
+        table = detail.split()[1]
+        if table not in allowed:
+            scans.append(detail)
+    return scans
+
+def check_query_plans(verbose=False):
+    """Explain every scenario's queries; returns (report lines, number of failures)"""
+    if db.engine.dialect.name != 'sqlite':
+        raise RuntimeError("The query plan check only supports SQLite")
+
+    lines = []
+    failures = 0
+    try:
+        ids = _seed()
+        for label, run, allowed in _scenarios(ids):
+            # Start from an empty identity map so primary key lookups hit the database
+            db.session.expire_all()
+            statements = _capture_selects(run)
+            scans = []
+            plans = []
+            # Identical statements only need explaining once
+            for statement, parameters in dict.fromkeys((s, tuple(p)) for s, p in statements):
+                plan = db.session.connection().exec_driver_sql(f"EXPLAIN QUERY PLAN {statement}", parameters).all()
+                plans.append((statement, plan))
+                scans.extend(_full_scans(plan, allowed))
+
+            status = 'FULL SCAN' if scans else 'ok'
+            lines.append(f"{status:<9} {label} ({len(statements)} queries)")
+            for detail in dict.fromkeys(scans):
+                lines.append(f"          ! {detail}")
+            if verbose:
+                for statement, plan in plans:
+                    lines.append(f"          {' '.join(statement.split())}")
+                    lines.extend(f"            {row[-1]}" for row in plan)
+            failures += bool(scans)
+    finally:
+        db.session.rollback()
+    return lines, failures
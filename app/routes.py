@@ -2,7 +2,10 @@ from flask import render_template, Blueprint, send_from_directory
 from flask import current_app, request
 import datetime
 
+from app.models.routing import route_reads_to_replica
+
 main = Blueprint('main', __name__)
+main.before_request(route_reads_to_replica)
 
 @main.route('/')
 def index():
@@ -0,0 +1,85 @@
+"""Worker boot timing, reported by `flask startup-profile`.
+
+create_app() marks the end of each initialization step on a StartupTimer
+kept in app.extensions['startup']. profile_startup() boots the app in a
+fresh interpreter under `python -X importtime`, so every module is really
+imported (and timed) rather than found in sys.modules, and combines the
+import times with those steps.
+"""
+import json
+import os
+import sys
+import time
+
+# Run in the child interpreter; argv is the config name and database URI
+_PROFILE_SCRIPT = """
+import json, sys, time
+sys.stderr.write('-- startup-profile --\\n')
+sys.stderr.flush()
+started = time.perf_counter()
+from app import create_app
+imported = time.perf_counter()
+app = create_app(sys.argv[1], overrides={'SQLALCHEMY_DATABASE_URI': sys.argv[2]})
+created = time.perf_counter()
+print(json.dumps({'import_s': imported - started, 'create_app_s': created - imported,
+                  'steps': app.extensions['startup'].steps}))
+"""
+_MARKER = '-- startup-profile --'
+_IMPORT_TIME_PREFIX = 'import time:'
+
+class StartupTimer:
+    """Seconds spent in each named step, measured between consecutive marks"""
+
+    def __init__(self):
+        self.started = self._last = time.perf_counter()
+        self.steps = []
+
+    def mark(self, step):
+        now = time.perf_counter()
+        self.steps.append((step, now - self._last))
+        self._last = now
+
+    @property
+    def total(self):
+        return self._last - self.started
+
+def _group(module):
+    # Our own modules are reported one by one, third-party ones by package
+    if module == 'app' or module.startswith('app.') or module in ('config', 'wsgi'):
+        return module
+    return module.split('.')[0]
+
+def parse_import_times(stderr):
+    """{group: [self seconds, module count]} from `-X importtime` output"""
+    groups = {}
+    lines = stderr.splitlines()
+    if _MARKER in lines:
+        # Skip what the interpreter imported before the script started
+        lines = lines[lines.index(_MARKER) + 1:]
+    for line in lines:
+        if not line.startswith(_IMPORT_TIME_PREFIX):
+            continue
+        self_us, _, module = line[len(_IMPORT_TIME_PREFIX):].split('|')
+        if not self_us.strip().isdigit():
+            # The header line
+            continue
+        entry = groups.setdefault(_group(module.strip()), [0.0, 0])
+        entry[0] += int(self_us) / 1e6
+        entry[1] += 1
+    return groups
+
+def profile_startup(config_name, database_uri):
+    """Boot the app in a child interpreter and return its import and init timings"""
+    import subprocess
+
+    root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+    env = dict(os.environ, PYTHONPATH=os.pathsep.join(filter(None, (root, os.environ.get('PYTHONPATH')))))
+    completed = subprocess.run(
+        [sys.executable, '-X', 'importtime', '-c', _PROFILE_SCRIPT, config_name, database_uri],
+        cwd=root, env=env, capture_output=True, text=True
+    )
+    if completed.returncode != 0:
+        raise RuntimeError(f"App failed to start:\n{completed.stderr[-4000:]}")
+    result = json.loads(completed.stdout.strip().splitlines()[-1])
+    result['imports'] = parse_import_times(completed.stderr)
+    return result
@@ -0,0 +1,2 @@
+# Benchmarks for the content layer. Run them from the repository root, e.g.
+#   python -m benchmarks.json_codec
@@ -0,0 +1,257 @@
+"""Time the content layer against synthetic catalogs of growing size.
+
+Usage:
+    python -m benchmarks.content_layer [--scale NAME ...] [--repeat N]
+                                       [--budget S] [--admin-page-max-cards N]
+                                       [--output results.json]
+
+Scales (cards / quizzes): 1k / 10, 10k / 100, 100k / 1000, 1m / 10000.
+Each scale gets a fresh temporary SQLite database. The synthetic packs are
+written to disk and loaded through the same importer the migrations use,
+then every case is timed:
+
+    migrate_json_to_db, migrate_quizzes_to_db   first import into the empty
+                                                database, then a re-run that
+                                                skips every row
+    get_flashcards                              every filter combination
+    get_quizzes                                 every filter combination,
+                                                full and summary
+    get_quiz                                    cycling through quiz ids
+    add_flashcard                               into an existing deck
+    admin flashcards page                       GET /admin/flashcards
+
+A case runs up to --repeat times, fewer if its runs exceed --budget seconds
+in total, and always at least once. The admin page lists every card, so it
+is skipped above --admin-page-max-cards. Results go to the JSON file given
+by --output so runs can be compared.
+"""
+import argparse
+import json
+import os
+import platform
+import shutil
+import sqlite3
+import statistics
+import sys
+import tempfile
+import time
+from datetime import datetime
+
+SCALES = {
+    '1k': (1000, 10),
+    '10k': (10000, 100),
+    '100k': (100000, 1000),
+    '1m': (1000000, 10000),
+}
+CATEGORIES = 10
+CHAPTERS_PER_CATEGORY = 5
+CARDS_PER_DECK = 50
+QUESTIONS_PER_QUIZ = 10
+DIFFICULTIES = ('beginner', 'intermediate', 'advanced')
+
+def write_flashcard_pack(path, cards):
+    """Write a categories -> chapters -> decks -> cards pack, one deck at a time"""
+    decks = max(cards // CARDS_PER_DECK, 1)
+    chapters = CATEGORIES * CHAPTERS_PER_CATEGORY
+    with open(path, 'w') as f:
+        f.write('{"categories": [')
+        for c in range(CATEGORIES):
+            f.write(',' if c else '')
+            f.write(f'{{"id": "cat{c}", "name": "Category {c}", "description": "Synthetic", "chapters": [')
+            for h in range(CHAPTERS_PER_CATEGORY):
+                chapter = c * CHAPTERS_PER_CATEGORY + h
+                f.write(',' if h else '')
+                f.write(f'{{"id": "cat{c}_ch{h}", "name": "Chapter {h}", "decks": [')
+                for i, d in enumerate(range(chapter, decks, chapters)):
+                    deck_cards = [{'id': f"card{n}", 'question': f"Synthetic question {d}-{n} about refrigerant pressure",
+                                   'answer': f"Synthetic answer {d}-{n} " + 'x' * 120}
+                                  for n in range(CARDS_PER_DECK if cards >= CARDS_PER_DECK else cards)]
+                    f.write(',' if i else '')
+                    f.write(json.dumps({'id': f"deck{d}", 'name': f"Deck {d}",
+                                        'difficulty': DIFFICULTIES[d % len(DIFFICULTIES)], 'cards': deck_cards}))
+                f.write(']}')
+            f.write(']}')
+        f.write(']}')
+    return decks
+
+def write_quiz_pack(path, quizzes):
+    with open(path, 'w') as f:
+        f.write('{"quizzes": [')
+        for q in range(quizzes):
+            f.write(',' if q else '')
+            f.write(json.dumps({
+                'id': f"quiz{q}",
+                'title': f"Synthetic quiz {q}",
+                'description': 'Synthetic',
+                'category_id': f"cat{q % CATEGORIES}",
+                'difficulty': DIFFICULTIES[q % len(DIFFICULTIES)],
+                'time_limit_minutes': 10,
+                'questions': [{
+                    'id': f"q{n}", 'text': f"Question {n} of quiz {q}?", 'type': 'multiple_choice',
+                    'explanation': 'Because.',
+                    'answers': [{'id': a, 'text': f"Answer {a}", 'correct': a == 'a'} for a in 'abcd']
+                } for n in range(QUESTIONS_PER_QUIZ)]
+            }))
+        f.write(']}')
+
+def _summarize(scale, cards, quizzes, case, params, durations):
+    durations = sorted(durations)
+    return {
+        'scale': scale,
+        'cards': cards,
+        'quizzes': quizzes,
+        'case': case,
+        'params': params,
+        'runs': len(durations),
+        'min_ms': round(durations[0] * 1000, 3),
+        'median_ms': round(statistics.median(durations) * 1000, 3),
+        'mean_ms': round(statistics.fmean(durations) * 1000, 3),
+        'max_ms': round(durations[-1] * 1000, 3),
+    }
+
+def _time(fn, repeat, budget, cleanup):
+    durations = []
+    spent = 0.0
+    while len(durations) < repeat and (not durations or spent < budget):
+        started = time.perf_counter()
+        fn(len(durations))
+        elapsed = time.perf_counter() - started
+        cleanup()
+        durations.append(elapsed)
+        spent += elapsed
+    return durations
+
+def run_scale(scale, repeat, budget, admin_page_max_cards, log=print):
+    from app import create_app
+    from app.models.database import db
+    from app.models.content import (
+        get_flashcards, get_quizzes, get_quiz, add_flashcard, import_flashcards, import_quizzes
+    )
+
+    cards, quizzes = SCALES[scale]
+    workdir = tempfile.mkdtemp(prefix='content-bench-')
+    results = []
+
+    def record(case, params, durations):
+        result = _summarize(scale, cards, quizzes, case, params, durations)
+        results.append(result)
+        log(f"{scale:<5} {case:<24} {json.dumps(params):<72} runs {result['runs']:<3} "
+            f"median {result['median_ms']:>10.2f} ms  min {result['min_ms']:>10.2f} ms")
+
+    try:
+        flashcard_pack = os.path.join(workdir, 'flashcards.json')
+        quiz_pack = os.path.join(workdir, 'quizzes.json')
+        write_flashcard_pack(flashcard_pack, cards)
+        write_quiz_pack(quiz_pack, quizzes)
+
+        app = create_app('development', overrides={
+            'SQLALCHEMY_DATABASE_URI': f"sqlite:///{os.path.join(workdir, 'bench.sqlite')}",
+            'CONTENT_VERSION_FILE': os.path.join(workdir, 'content.version'),
+            'EVENTS_DIR': os.path.join(workdir, 'events'),
+            'LOG_LEVEL': 'WARNING',
+        })
+        # Flask lowers the app's own loggers to DEBUG in debug mode
+        app.logger.setLevel('WARNING')
+
+        with app.app_context():
+            cleanup = db.session.remove
+            # migrate_json_to_db() and migrate_quizzes_to_db() are these
+            # importers pointed at the bundled files
+            for case, importer, pack in (('migrate_json_to_db', import_flashcards, flashcard_pack),
+                                         ('migrate_quizzes_to_db', import_quizzes, quiz_pack)):
+                started = time.perf_counter()
+                outcome = importer(path=pack)
+                record(case, {'run': 'initial'}, [time.perf_counter() - started])
+                if not outcome.get('success'):
+                    raise RuntimeError(f"{case} failed: {outcome.get('message')}")
+                cleanup()
+                record(case, {'run': 'all rows exist'},
+                       _time(lambda i: importer(path=pack), repeat, budget, cleanup))
+
+            flashcard_filters = (
+                {},
+                {'category': 'cat0'},
+                {'category': 'cat0', 'chapter': 'cat0_ch0'},
+                {'difficulty': 'beginner'},
+                {'category': 'cat0', 'difficulty': 'beginner'},
+                {'category': 'cat0', 'chapter': 'cat0_ch0', 'difficulty': 'beginner'},
+            )
+            for params in flashcard_filters:
+                record('get_flashcards', params,
+                       _time(lambda i: get_flashcards(**params), repeat, budget, cleanup))
+
+            for summary in (False, True):
+                for params in ({}, {'category': 'cat0'}, {'difficulty': 'beginner'},
+                               {'category': 'cat0', 'difficulty': 'beginner'}):
+                    params = dict(params, summary=summary)
+                    record('get_quizzes', params,
+                           _time(lambda i: get_quizzes(**params), repeat, budget, cleanup))
+
+            record('get_quiz', {}, _time(lambda i: get_quiz(f"quiz{(i * 7919) % quizzes}"),
+                                         max(repeat, 20), budget, cleanup))
+
+            def add(i):
+                result = add_flashcard({
+                    'category_id': 'cat0', 'category_name': 'Category 0',
+                    'chapter_id': 'cat0_ch0', 'chapter_name': 'Chapter 0',
+                    'deck_id': 'deck0', 'deck_name': 'Deck 0', 'difficulty': 'beginner',
+                    'question': f"Benchmark question {i}", 'answer': 'Benchmark answer'
+                })
+                if not result.get('success'):
+                    raise RuntimeError(f"add_flashcard failed: {result.get('error')}")
+            record('add_flashcard', {}, _time(add, max(repeat, 20), budget, cleanup))
+
+        if cards <= admin_page_max_cards:
+            client = app.test_client()
+            with client.session_transaction() as session:
+                session['admin_logged_in'] = True
+
+            def render(i):
+                response = client.get('/admin/flashcards')
+                if response.status_code != 200:
+                    raise RuntimeError(f"admin flashcards page returned {response.status_code}")
+            record('admin_flashcards_page', {}, _time(render, repeat, budget, lambda: None))
+        else:
+            log(f"{scale:<5} {'admin_flashcards_page':<24} skipped (more than {admin_page_max_cards} cards)")
+    finally:
+        shutil.rmtree(workdir, ignore_errors=True)
+    return results
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--scale', action='append', choices=list(SCALES),
+                        help='catalog size to run (repeatable; default: all)')
+    parser.add_argument('--repeat', type=int, default=5, help='runs per case (default 5)')
+    parser.add_argument('--budget', type=float, default=10.0,
+                        help='stop repeating a case after this many seconds (default 10)')
+    parser.add_argument('--admin-page-max-cards', type=int, default=100000,
+                        help='skip the admin page render above this many cards (default 100000)')
+    parser.add_argument('--output', default='content_layer_results.json',
+                        help='where to write the results (default content_layer_results.json)')
+    args = parser.parse_args(argv)
+
+    from app import codec
+
+    started_at = datetime.utcnow().isoformat()
+    results = []
+    for scale in args.scale or list(SCALES):
+        results.extend(run_scale(scale, args.repeat, args.budget, args.admin_page_max_cards))
+
+    with open(args.output, 'w') as f:
+        json.dump({
+            'meta': {
+                'started_at': started_at,
+                'python': platform.python_version(),
+                'sqlite': sqlite3.sqlite_version,
+                'platform': platform.platform(),
+                'json_backend': codec.get_backend(),
+                'repeat': args.repeat,
+                'budget_s': args.budget,
+            },
+            'results': results
+        }, f, indent=2)
+    print(f"Wrote {len(results)} results to {args.output}")
+    return 0
+
+if __name__ == '__main__':
+    sys.exit(main())
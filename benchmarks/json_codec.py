@@ -0,0 +1,69 @@
+"""Compare the JSON backends in app.codec on the real static data files.
+
+Usage:
+    python -m benchmarks.json_codec [--repeat N] [--output results.json]
+
+For each installed backend and each data file this times loads(), compact
+dumps() (what jsonify() does with sort_keys) and indented dumps() (what
+save_json() writes), and reports the best per-call time over N rounds.
+"""
+import argparse
+import json
+import os
+import sys
+import timeit
+
+from app import codec
+from app.models.content.helpers import DATA_DIR
+
+DATA_FILES = ('quizzes.json', 'flashcards.json')
+
+def bench_file(path, repeat):
+    with open(path, 'rb') as f:
+        raw = f.read()
+    doc = json.loads(raw)
+
+    cases = {
+        'loads': lambda: codec.loads(raw),
+        'dumps': lambda: codec.dumps(doc, sort_keys=True),
+        'dumps_indent': lambda: codec.dumps_bytes(doc, indent=True),
+    }
+
+    results = {}
+    for name, fn in cases.items():
+        timer = timeit.Timer(fn)
+        number, _ = timer.autorange()
+        best = min(timer.repeat(repeat=repeat, number=number)) / number
+        results[name] = best * 1e6
+    return len(raw), results
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--repeat', type=int, default=5, help='timing rounds per case (best is kept)')
+    parser.add_argument('--output', help='also write the results as JSON to this path')
+    args = parser.parse_args(argv)
+
+    results = []
+    for backend in codec.AVAILABLE_BACKENDS:
+        codec.set_backend(backend)
+        for filename in DATA_FILES:
+            path = os.path.join(DATA_DIR, filename)
+            size, timings = bench_file(path, args.repeat)
+            for case, usec in timings.items():
+                results.append({'backend': backend, 'file': filename, 'bytes': size, 'case': case, 'usec': round(usec, 2)})
+    codec.set_backend('auto')
+
+    print(f"{'file':<18}{'case':<14}" + ''.join(f"{b:>12}" for b in codec.AVAILABLE_BACKENDS))
+    for filename in DATA_FILES:
+        for case in ('loads', 'dumps', 'dumps_indent'):
+            row = {r['backend']: r['usec'] for r in results if r['file'] == filename and r['case'] == case}
+            print(f"{filename:<18}{case:<14}" + ''.join(f"{row[b]:>10.1f}us" for b in codec.AVAILABLE_BACKENDS))
+
+    if args.output:
+        with open(args.output, 'w') as f:
+            json.dump({'backends': list(codec.AVAILABLE_BACKENDS), 'results': results}, f, indent=2)
+
+    return 0
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,366 @@
+"""Drive a running copy of the site with a mixed traffic load over HTTP.
+
+Usage:
+    python -m benchmarks.load_test [--server gunicorn|threaded] [--workers N]
+                                   [--threads N] [--concurrency N]
+                                   [--duration S] [--warmup S]
+                                   [--cards N] [--quizzes N]
+                                   [--mix SCENARIO=WEIGHT ...] [--seed N]
+                                   [--output results.json]
+
+The app is started from wsgi.py (the production config) on a random local
+port, either under gunicorn with --workers and --threads, or under
+Werkzeug's threaded WSGI server in a child process, against a fresh
+temporary SQLite database seeded with a synthetic catalog (see
+benchmarks/content_layer.py). --concurrency client threads then send
+requests back to back, each picking a scenario by weight:
+
+    page_index, page_flashcards, page_quizzes   the HTML pages
+    api_flashcards, api_quizzes                 random filter permutations
+    api_catalog_outline, api_cards, api_quiz,   other API reads
+    api_search
+    admin_add_flashcard                         a trickle of admin writes
+
+--mix changes a weight (0 disables a scenario). Requests made during the
+first --warmup seconds are not counted. Reported per scenario: throughput,
+p50/p95/p99/max latency and errors by kind (sqlite_locked, http_5xx,
+http_4xx, rejected, connection); "database is locked" lines in the server
+log are counted too.
+"""
+import argparse
+import http.client
+import http.cookies
+import json
+import os
+import random
+import shutil
+import socket
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+import urllib.parse
+
+from benchmarks.content_layer import CATEGORIES, CHAPTERS_PER_CATEGORY, DIFFICULTIES, \
+    write_flashcard_pack, write_quiz_pack
+from benchmarks.sqlite_concurrency import _percentile
+
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+HOST = '127.0.0.1'
+LOCKED_MARKER = b'database is locked'
+ERROR_KINDS = ('sqlite_locked', 'http_5xx', 'http_4xx', 'rejected', 'connection')
+
+DEFAULT_MIX = {
+    'page_index': 10,
+    'page_flashcards': 8,
+    'page_quizzes': 8,
+    'api_flashcards': 20,
+    'api_catalog_outline': 10,
+    'api_cards': 12,
+    'api_quizzes': 15,
+    'api_quiz': 10,
+    'api_search': 5,
+    'admin_add_flashcard': 2,
+}
+
+def _maybe(rng, params):
+    """A random subset of params, so every filter permutation gets exercised"""
+    return {name: value for name, value in params.items() if rng.random() < 0.5}
+
+def _query(path, params):
+    return f"{path}?{urllib.parse.urlencode(params)}" if params else path
+
+def build_request(scenario, rng, catalog):
+    """(method, path, json body) for one request of a scenario"""
+    category = rng.randrange(CATEGORIES)
+    if scenario == 'page_index':
+        return 'GET', '/', None
+    if scenario == 'page_flashcards':
+        return 'GET', '/flashcards', None
+    if scenario == 'page_quizzes':
+        return 'GET', '/quizzes', None
+    if scenario in ('api_flashcards', 'api_catalog_outline'):
+        params = _maybe(rng, {'category': f"cat{category}", 'difficulty': rng.choice(DIFFICULTIES)})
+        if 'category' in params and rng.random() < 0.5:
+            params['chapter'] = f"cat{category}_ch{rng.randrange(CHAPTERS_PER_CATEGORY)}"
+        path = '/api/flashcards' if scenario == 'api_flashcards' else '/api/catalog/outline'
+        return 'GET', _query(path, params), None
+    if scenario == 'api_cards':
+        return 'GET', _query('/api/cards', {'deck': f"deck{rng.randrange(catalog['decks'])}", 'limit': 50}), None
+    if scenario == 'api_quizzes':
+        params = _maybe(rng, {'category': f"cat{category}", 'difficulty': rng.choice(DIFFICULTIES),
+                              'summary': 'true'})
+        return 'GET', _query('/api/quizzes', params), None
+    if scenario == 'api_quiz':
+        return 'GET', f"/api/quizzes/quiz{rng.randrange(catalog['quizzes'])}", None
+    if scenario == 'api_search':
+        return 'GET', _query('/api/search', {'q': rng.choice(('refrigerant', 'pressure', 'synthetic answer'))}), None
+    if scenario == 'admin_add_flashcard':
+        deck = rng.randrange(catalog['decks'])
+        chapter = deck % (CATEGORIES * CHAPTERS_PER_CATEGORY)
+        return 'POST', '/admin/flashcards', {
+            'category_id': f"cat{chapter // CHAPTERS_PER_CATEGORY}",
+            'category_name': f"Category {chapter // CHAPTERS_PER_CATEGORY}",
+            'chapter_id': f"cat{chapter // CHAPTERS_PER_CATEGORY}_ch{chapter % CHAPTERS_PER_CATEGORY}",
+            'chapter_name': f"Chapter {chapter % CHAPTERS_PER_CATEGORY}",
+            'deck_id': f"deck{deck}", 'deck_name': f"Deck {deck}",
+            'difficulty': DIFFICULTIES[deck % len(DIFFICULTIES)],
+            'question': f"Load test question {rng.random()}", 'answer': 'Load test answer'
+        }
+    raise ValueError(f"Unknown scenario: {scenario}")
+
+def classify(scenario, status, body):
+    """The error kind of a response, or None if it succeeded"""
+    if status >= 500:
+        return 'sqlite_locked' if LOCKED_MARKER in body else 'http_5xx'
+    if status >= 300:
+        # A 302 on an admin write is the login redirect
+        return 'http_4xx' if status >= 400 or scenario.startswith('admin_') else None
+    if scenario.startswith('admin_'):
+        # Admin writes report failures in a 200 response
+        try:
+            if not json.loads(body).get('success'):
+                return 'sqlite_locked' if LOCKED_MARKER in body else 'rejected'
+        except ValueError:
+            return 'rejected'
+    return None
+
+class Client:
+    """One keep-alive connection, re-opened whenever the server closes it"""
+
+    def __init__(self, port, admin_password):
+        self.port = port
+        self.admin_password = admin_password
+        self.cookie = None
+        self.conn = http.client.HTTPConnection(HOST, port, timeout=60)
+
+    def request(self, method, path, body=None, headers=None):
+        headers = dict(headers or {})
+        if self.cookie:
+            headers['Cookie'] = self.cookie
+        try:
+            self.conn.request(method, path, body=body, headers=headers)
+            response = self.conn.getresponse()
+            data = response.read()
+        except (OSError, http.client.HTTPException):
+            self.conn.close()
+            raise
+        for header in response.headers.get_all('Set-Cookie') or ():
+            cookie = http.cookies.SimpleCookie(header)
+            self.cookie = '; '.join(f"{name}={morsel.value}" for name, morsel in cookie.items())
+        return response.status, data
+
+    def login(self):
+        self.request('POST', '/admin/login', urllib.parse.urlencode({'password': self.admin_password}),
+                     {'Content-Type': 'application/x-www-form-urlencoded'})
+
+def _free_port():
+    with socket.socket() as s:
+        s.bind((HOST, 0))
+        return s.getsockname()[1]
+
+def _serve_threaded(port):
+    """Child process for --server threaded"""
+    from werkzeug.serving import make_server
+    from wsgi import application
+    make_server(HOST, port, application, threaded=True).serve_forever()
+
+def start_server(args, workdir, db_path, admin_password):
+    port = _free_port()
+    env = dict(
+        os.environ,
+        PYTHONPATH=REPO_ROOT,
+        DATABASE_URL=f"sqlite:///{db_path}",
+        SQLITE_PROFILE=args.sqlite_profile,
+        ADMIN_PASSWORD=admin_password,
+        SECRET_KEY=os.urandom(16).hex(),
+        CONTENT_VERSION_FILE=os.path.join(workdir, 'content.version'),
+        EVENTS_DIR=os.path.join(workdir, 'events'),
+        LOG_LEVEL='WARNING',
+    )
+    if args.server == 'gunicorn':
+        command = [sys.executable, '-m', 'gunicorn', '--bind', f"{HOST}:{port}",
+                   '--workers', str(args.workers), '--threads', str(args.threads),
+                   '--chdir', workdir, 'wsgi:application']
+    else:
+        command = [sys.executable, '-c', f"from benchmarks.load_test import _serve_threaded; _serve_threaded({port})"]
+    log_path = os.path.join(workdir, 'server.log')
+    with open(log_path, 'wb') as log:
+        # cwd is the scratch directory so Flask-Session's files land there
+        process = subprocess.Popen(command, cwd=workdir, env=env, stdout=log, stderr=subprocess.STDOUT)
+
+    deadline = time.time() + 60
+    while time.time() < deadline:
+        if process.poll() is not None:
+            break
+        try:
+            status, _ = Client(port, admin_password).request('GET', '/robots.txt')
+            if status == 200:
+                return process, port, log_path
+        except OSError:
+            pass
+        time.sleep(0.2)
+    process.kill()
+    with open(log_path, 'rb') as log:
+        tail = log.read()[-4000:].decode(errors='replace')
+    raise RuntimeError(f"Server did not come up on port {port}:\n{tail}")
+
+def stop_server(process):
+    process.terminate()
+    try:
+        process.wait(timeout=15)
+    except subprocess.TimeoutExpired:
+        process.kill()
+        process.wait()
+
+def _client_thread(port, admin_password, scenarios, weights, catalog, seed, measure_from, stop_at, samples):
+    rng = random.Random(seed)
+    client = Client(port, admin_password)
+    logged_in = False
+    while True:
+        scenario = rng.choices(scenarios, weights)[0]
+        if scenario.startswith('admin_') and not logged_in:
+            client.login()
+            logged_in = True
+        method, path, payload = build_request(scenario, rng, catalog)
+        body = json.dumps(payload) if payload is not None else None
+        headers = {'Content-Type': 'application/json'} if payload is not None else None
+        started = time.perf_counter()
+        if started >= stop_at:
+            break
+        try:
+            status, data = client.request(method, path, body, headers)
+            error = classify(scenario, status, data)
+        except (OSError, http.client.HTTPException):
+            error = 'connection'
+        if started >= measure_from:
+            samples.append((scenario, time.perf_counter() - started, error))
+
+def run(args):
+    from app import create_app
+    from app.models.content import import_flashcards, import_quizzes
+
+    mix = dict(DEFAULT_MIX)
+    for item in args.mix or ():
+        name, _, weight = item.partition('=')
+        if name not in mix:
+            raise SystemExit(f"Unknown scenario {name!r}; choose from: {', '.join(mix)}")
+        mix[name] = float(weight)
+    scenarios = [name for name, weight in mix.items() if weight > 0]
+    weights = [mix[name] for name in scenarios]
+
+    workdir = tempfile.mkdtemp(prefix='load-test-')
+    db_path = os.path.join(workdir, 'load.sqlite')
+    admin_password = os.urandom(12).hex()
+    try:
+        flashcard_pack = os.path.join(workdir, 'flashcards.json')
+        quiz_pack = os.path.join(workdir, 'quizzes.json')
+        decks = write_flashcard_pack(flashcard_pack, args.cards)
+        write_quiz_pack(quiz_pack, args.quizzes)
+        seed_app = create_app('development', overrides={
+            'SQLALCHEMY_DATABASE_URI': f"sqlite:///{db_path}",
+            'CONTENT_VERSION_FILE': os.path.join(workdir, 'content.version'),
+            'SESSION_FILE_DIR': os.path.join(workdir, 'flask_session'),
+            'LOG_LEVEL': 'WARNING',
+        })
+        seed_app.logger.setLevel('WARNING')
+        with seed_app.app_context():
+            import_flashcards(path=flashcard_pack)
+            import_quizzes(path=quiz_pack)
+        catalog = {'decks': decks, 'quizzes': max(args.quizzes, 1)}
+
+        process, port, log_path = start_server(args, workdir, db_path, admin_password)
+        try:
+            samples = []
+            measure_from = time.perf_counter() + args.warmup
+            stop_at = measure_from + args.duration
+            threads = [threading.Thread(target=_client_thread,
+                                        args=(port, admin_password, scenarios, weights, catalog,
+                                              args.seed + i, measure_from, stop_at, samples))
+                       for i in range(args.concurrency)]
+            for thread in threads:
+                thread.start()
+            for thread in threads:
+                thread.join()
+        finally:
+            stop_server(process)
+        with open(log_path, 'rb') as log:
+            server_lock_errors = log.read().count(LOCKED_MARKER)
+    finally:
+        shutil.rmtree(workdir, ignore_errors=True)
+
+    def summarize(entries):
+        latencies = sorted(latency for _, latency, _ in entries)
+        errors = {kind: 0 for kind in ERROR_KINDS}
+        for _, _, error in entries:
+            if error:
+                errors[error] += 1
+        failed = sum(errors.values())
+        return {
+            'requests': len(entries),
+            'requests_per_s': round(len(entries) / args.duration, 1),
+            'error_rate': round(failed / len(entries), 4) if entries else None,
+            'errors': errors,
+            'p50_ms': round(_percentile(latencies, 0.50) * 1000, 2) if latencies else None,
+            'p95_ms': round(_percentile(latencies, 0.95) * 1000, 2) if latencies else None,
+            'p99_ms': round(_percentile(latencies, 0.99) * 1000, 2) if latencies else None,
+            'max_ms': round(latencies[-1] * 1000, 2) if latencies else None,
+        }
+
+    return {
+        'server': args.server,
+        'workers': args.workers if args.server == 'gunicorn' else 1,
+        'threads': args.threads if args.server == 'gunicorn' else None,
+        'sqlite_profile': args.sqlite_profile,
+        'concurrency': args.concurrency,
+        'duration_s': args.duration,
+        'cards': args.cards,
+        'quizzes': args.quizzes,
+        'mix': {name: mix[name] for name in scenarios},
+        'total': summarize(samples),
+        'scenarios': {name: summarize([s for s in samples if s[0] == name]) for name in scenarios},
+        'server_log_lock_errors': server_lock_errors,
+    }
+
+def main(argv=None):
+    from config import SQLITE_PROFILES
+
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--server', choices=('gunicorn', 'threaded'), default='gunicorn',
+                        help='how to serve wsgi.py (default gunicorn)')
+    parser.add_argument('--workers', type=int, default=2, help='gunicorn worker processes (default 2)')
+    parser.add_argument('--threads', type=int, default=4, help='gunicorn threads per worker (default 4)')
+    parser.add_argument('--sqlite-profile', choices=sorted(SQLITE_PROFILES), default='production',
+                        help='SQLITE_PROFILE for the server (default production)')
+    parser.add_argument('--concurrency', type=int, default=8, help='client threads (default 8)')
+    parser.add_argument('--duration', type=float, default=30, help='measured seconds (default 30)')
+    parser.add_argument('--warmup', type=float, default=3, help='unmeasured seconds first (default 3)')
+    parser.add_argument('--cards', type=int, default=10000, help='cards in the seeded catalog (default 10000)')
+    parser.add_argument('--quizzes', type=int, default=100, help='quizzes in the seeded catalog (default 100)')
+    parser.add_argument('--mix', action='append', metavar='SCENARIO=WEIGHT',
+                        help=f"override a scenario weight (repeatable); defaults: "
+                             f"{', '.join(f'{k}={v}' for k, v in DEFAULT_MIX.items())}")
+    parser.add_argument('--seed', type=int, default=0, help='random seed for the traffic (default 0)')
+    parser.add_argument('--output', help='also write the results as JSON to this path')
+    args = parser.parse_args(argv)
+
+    result = run(args)
+
+    print(f"{'scenario':<22}{'req/s':>9}{'p50 ms':>9}{'p95 ms':>9}{'p99 ms':>9}{'max ms':>9}{'err %':>8}  errors")
+    for name, stats in list(result['scenarios'].items()) + [('TOTAL', result['total'])]:
+        if not stats['requests']:
+            print(f"{name:<22}{'no requests':>9}")
+            continue
+        errors = ', '.join(f"{kind} {count}" for kind, count in stats['errors'].items() if count)
+        print(f"{name:<22}{stats['requests_per_s']:>9}{stats['p50_ms']:>9}{stats['p95_ms']:>9}"
+              f"{stats['p99_ms']:>9}{stats['max_ms']:>9}{stats['error_rate'] * 100:>7.2f}%  {errors}")
+    print(f"'database is locked' in server log: {result['server_log_lock_errors']}")
+
+    if args.output:
+        with open(args.output, 'w') as f:
+            json.dump(result, f, indent=2)
+    return 0
+
+if __name__ == '__main__':
+    sys.exit(main())
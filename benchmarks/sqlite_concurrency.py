@@ -0,0 +1,179 @@
+"""N readers plus one writer against SQLite, per SQLITE_PROFILES entry.
+
+Usage:
+    python -m benchmarks.sqlite_concurrency [--readers N] [--duration S]
+                                            [--cards N] [--profile NAME ...]
+                                            [--output results.json]
+
+Every profile gets a fresh temporary database seeded with --cards cards.
+Readers are separate processes (like gunicorn workers) looping over the
+catalog outline, a deck's cards and a page of /api/cards; the writer adds
+cards with add_flashcard(), which commits twice per card. Reported per
+profile: reader and writer throughput, reader latency percentiles and how
+many operations failed (e.g. "database is locked").
+"""
+import argparse
+import contextlib
+import io
+import json
+import multiprocessing
+import os
+import shutil
+import sys
+import tempfile
+import time
+
+SEED_DECKS = 20
+
+def _make_app(db_path, profile):
+    from app import create_app
+    from config import SQLITE_PROFILES
+    return create_app('development', overrides={
+        'SQLALCHEMY_DATABASE_URI': f"sqlite:///{db_path}",
+        'SQLITE_PRAGMAS': SQLITE_PROFILES[profile],
+        'CONTENT_VERSION_FILE': os.path.join(os.path.dirname(db_path), 'content.version'),
+    })
+
+def _seed(db_path, profile, cards):
+    from app.models.content import import_flashcards
+    app = _make_app(db_path, profile)
+    per_deck = max(cards // SEED_DECKS, 1)
+    pack = {'categories': [{
+        'id': 'bench', 'name': 'Benchmark', 'chapters': [{
+            'id': 'bench_ch', 'name': 'Benchmark', 'decks': [{
+                'id': f"bench_d{d}", 'name': f"Deck {d}", 'difficulty': 'beginner',
+                'cards': [{'id': f"c{c}", 'question': 'Q' * 80, 'answer': 'A' * 200} for c in range(per_deck)]
+            } for d in range(SEED_DECKS)]
+        }]
+    }]}
+    with app.app_context():
+        import_flashcards(data=pack)
+
+def _percentile(sorted_values, fraction):
+    if not sorted_values:
+        return None
+    index = min(int(len(sorted_values) * fraction), len(sorted_values) - 1)
+    return sorted_values[index]
+
+def _reader(db_path, profile, start_at, stop_at, queue):
+    from app.models.database import db
+    from app.models.content import build_catalog_outline, get_deck_cards, list_cards
+    app = _make_app(db_path, profile)
+    operations = (
+        lambda i: build_catalog_outline(),
+        lambda i: get_deck_cards(f"bench_d{i % SEED_DECKS}"),
+        lambda i: list_cards(deck=f"bench_d{i % SEED_DECKS}", limit=50),
+    )
+    latencies = []
+    errors = 0
+    i = 0
+    with app.app_context():
+        while time.time() < start_at:
+            time.sleep(0.001)
+        while time.time() < stop_at:
+            started = time.perf_counter()
+            try:
+                operations[i % len(operations)](i)
+                latencies.append(time.perf_counter() - started)
+            except Exception:
+                errors += 1
+            finally:
+                # What request teardown does
+                db.session.remove()
+            i += 1
+    queue.put(('reader', latencies, errors))
+
+def _writer(db_path, profile, start_at, stop_at, queue):
+    from app.models.database import db
+    from app.models.content import add_flashcard
+    app = _make_app(db_path, profile)
+    latencies = []
+    errors = 0
+    i = 0
+    with app.app_context():
+        while time.time() < start_at:
+            time.sleep(0.001)
+        while time.time() < stop_at:
+            started = time.perf_counter()
+            # add_flashcard reports database errors in its result
+            with contextlib.redirect_stdout(io.StringIO()):
+                result = add_flashcard({
+                    'category_id': 'bench', 'category_name': 'Benchmark',
+                    'chapter_id': 'bench_ch', 'chapter_name': 'Benchmark',
+                    'deck_id': f"bench_d{i % SEED_DECKS}", 'deck_name': f"Deck {i % SEED_DECKS}",
+                    'difficulty': 'beginner', 'question': f"Written {i}", 'answer': 'A' * 200
+                })
+            if result.get('success'):
+                latencies.append(time.perf_counter() - started)
+            else:
+                errors += 1
+            db.session.remove()
+            i += 1
+    queue.put(('writer', latencies, errors))
+
+def run_profile(profile, readers, duration, cards):
+    workdir = tempfile.mkdtemp(prefix='sqlite-bench-')
+    db_path = os.path.join(workdir, 'bench.sqlite')
+    try:
+        _seed(db_path, profile, cards)
+
+        ctx = multiprocessing.get_context('spawn')
+        queue = ctx.Queue()
+        # Give every process time to start before the clock runs
+        start_at = time.time() + 3 + 0.2 * readers
+        stop_at = start_at + duration
+        processes = [ctx.Process(target=_reader, args=(db_path, profile, start_at, stop_at, queue))
+                     for _ in range(readers)]
+        processes.append(ctx.Process(target=_writer, args=(db_path, profile, start_at, stop_at, queue)))
+        for process in processes:
+            process.start()
+        outcomes = [queue.get() for _ in processes]
+        for process in processes:
+            process.join()
+    finally:
+        shutil.rmtree(workdir, ignore_errors=True)
+
+    result = {'profile': profile, 'readers': readers, 'duration_s': duration, 'cards': cards}
+    for role in ('reader', 'writer'):
+        latencies = sorted(l for kind, values, _ in outcomes if kind == role for l in values)
+        errors = sum(e for kind, _, e in outcomes if kind == role)
+        result[role] = {
+            'ops': len(latencies),
+            'ops_per_s': round(len(latencies) / duration, 1),
+            'errors': errors,
+            'p50_ms': round(_percentile(latencies, 0.50) * 1000, 2) if latencies else None,
+            'p95_ms': round(_percentile(latencies, 0.95) * 1000, 2) if latencies else None,
+            'p99_ms': round(_percentile(latencies, 0.99) * 1000, 2) if latencies else None,
+            'max_ms': round(latencies[-1] * 1000, 2) if latencies else None,
+        }
+    return result
+
+def main(argv=None):
+    from config import SQLITE_PROFILES
+
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--readers', type=int, default=4, help='reader processes (default 4)')
+    parser.add_argument('--duration', type=float, default=10, help='seconds per profile (default 10)')
+    parser.add_argument('--cards', type=int, default=5000, help='cards in the seeded catalog (default 5000)')
+    parser.add_argument('--profile', action='append', choices=sorted(SQLITE_PROFILES),
+                        help='profile to run (repeatable; default: all)')
+    parser.add_argument('--output', help='also write the results as JSON to this path')
+    args = parser.parse_args(argv)
+
+    results = []
+    for profile in args.profile or list(SQLITE_PROFILES):
+        result = run_profile(profile, args.readers, args.duration, args.cards)
+        results.append(result)
+        for role in ('reader', 'writer'):
+            stats = result[role]
+            print(f"{profile:<11} {role:<7} {stats['ops_per_s']:>8} ops/s  errors {stats['errors']:<4} "
+                  f"p50 {stats['p50_ms']} ms  p95 {stats['p95_ms']} ms  p99 {stats['p99_ms']} ms  "
+                  f"max {stats['max_ms']} ms")
+
+    if args.output:
+        with open(args.output, 'w') as f:
+            json.dump(results, f, indent=2)
+    return 0
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -10,7 +10,7 @@ const Quizzes = () => {
   useEffect(() => {
     const fetchQuizzes = async () => {
       try {
-        const response = await axios.get('/api/quizzes');
+        const response = await axios.get('/api/quizzes', { params: { summary: 1 } });
         setQuizzes(response.data.quizzes);
         setLoading(false);
       } catch (err) {
@@ -39,7 +39,7 @@ const Quizzes = () => {
               <p>{quiz.description}</p>
               <div className="quiz-details">
                 <span>Difficulty: {quiz.difficulty}</span>
-                <span>{quiz.questions.length} questions</span>
+                <span>{quiz.question_count} questions</span>
                 <span>{quiz.time_limit_minutes > 0 ? `${quiz.time_limit_minutes} min time limit` : 'No time limit'}</span>
               </div>
               <button>Start Quiz</button>
@@ -1,27 +1,153 @@
 import os
-from dotenv import load_dotenv
 
-load_dotenv()
+# Settings from a .env file next to this one; real environment variables
+# take precedence. python-dotenv is only imported when there is a file to read.
+_dotenv_path = os.path.join(os.path.abspath(os.path.dirname(__file__)), '.env')
+if os.path.exists(_dotenv_path):
+    from dotenv import load_dotenv
+    load_dotenv(_dotenv_path)
+
+# PRAGMAs run on every new SQLite connection (see app/models/sqlite.py).
+# 'production' lets readers work alongside a writer instead of queueing
+# behind it: WAL journal, fsync only at checkpoints, wait up to 5s for a
+# lock, 64 MiB page cache, 256 MiB of the file memory-mapped, temp tables
+# in memory.
+SQLITE_PROFILES = {
+    'default': {},
+    'production': {
+        'journal_mode': 'WAL',
+        'synchronous': 'NORMAL',
+        'busy_timeout': 5000,
+        'cache_size': -65536,
+        'mmap_size': 268435456,
+        'temp_store': 'MEMORY',
+    },
+}
+
+def _log_levels(value):
+    """Per-logger levels from the environment: 'name=LEVEL,name=LEVEL'"""
+    levels = {}
+    for item in (value or '').split(','):
+        if '=' in item:
+            name, level = item.split('=', 1)
+            levels[name.strip()] = level.strip().upper()
+    return levels
 
 class Config:
     SECRET_KEY = os.environ.get('SECRET_KEY') or 'dev-key-for-development'
     ADMIN_PASSWORD = os.environ.get('ADMIN_PASSWORD') or 'hvac-admin-fart'
     SQLALCHEMY_TRACK_MODIFICATIONS = False
+    # db.create_all() and the search index on every startup outside the
+    # `flask` CLI; production leaves the schema to `flask db upgrade`
+    # (deploy.sh runs it)
+    CREATE_SCHEMA_ON_STARTUP = os.environ.get('CREATE_SCHEMA_ON_STARTUP', 'true').lower() in ('true', '1', 'yes')
+    SQLITE_PRAGMAS = SQLITE_PROFILES[os.environ.get('SQLITE_PROFILE', 'default')]
+    # Connection pool for file and server databases (ignored for in-memory SQLite)
+    DB_POOL_SIZE = int(os.environ.get('DB_POOL_SIZE', 5))
+    DB_MAX_OVERFLOW = int(os.environ.get('DB_MAX_OVERFLOW', 10))
+    DB_POOL_TIMEOUT = int(os.environ.get('DB_POOL_TIMEOUT', 30))
+    DB_POOL_RECYCLE = int(os.environ.get('DB_POOL_RECYCLE', 3600))
+    # Optional read-only bind for GET requests (see app/models/routing.py)
+    SQLALCHEMY_REPLICA_URI = os.environ.get('DATABASE_REPLICA_URL')
+    # How far the replica may lag the primary: cached API payloads are built
+    # on the primary for this long after each content-version bump
+    REPLICA_LAG_SECONDS = float(os.environ.get('REPLICA_LAG_SECONDS', 5))
+    # Request latency and SQL counters for /admin/metrics (see app/metrics.py);
+    # METRICS_TOKEN lets a Prometheus scraper in with a Bearer header instead
+    # of an admin session
+    METRICS_ENABLED = os.environ.get('METRICS_ENABLED', 'true').lower() in ('true', '1', 'yes')
+    METRICS_SERVER_TIMING = True
+    METRICS_TOKEN = os.environ.get('METRICS_TOKEN')
+    # Logging goes through a queue and a background writer (see app/logs.py).
+    # LOG_FORMAT is 'json' (one object per line) or 'text'; LOG_LEVELS sets
+    # levels per logger, e.g. LOG_LEVELS='app.api.routes=DEBUG,sqlalchemy.engine=INFO'
+    LOG_LEVEL = os.environ.get('LOG_LEVEL', 'INFO').upper()
+    LOG_LEVELS = _log_levels(os.environ.get('LOG_LEVELS'))
+    LOG_FORMAT = os.environ.get('LOG_FORMAT', 'json')
     SESSION_COOKIE_HTTPONLY = True
     SESSION_COOKIE_SECURE = False  # Set to True in production with HTTPS
     SESSION_TYPE = 'filesystem'
+    # 'auto' uses orjson when installed, otherwise the stdlib json module
+    JSON_BACKEND = os.environ.get('JSON_BACKEND', 'auto')
+    # Read-API response cache (entries are dropped whenever content is written)
+    RESPONSE_CACHE_SIZE = int(os.environ.get('RESPONSE_CACHE_SIZE', 256))
+    # Stamp file shared by all workers; defaults to <instance>/content.version
+    CONTENT_VERSION_FILE = os.environ.get('CONTENT_VERSION_FILE')
+    # Sent with ETagged API reads; browsers keep the body but revalidate each use
+    API_CACHE_CONTROL = 'no-cache'
+    # Cached API payloads are compressed once per content version, on the
+    # request that first asks for an encoding, so the default levels are cheap
+    API_COMPRESSION_MIN_SIZE = 1024
+    API_GZIP_LEVEL = 6
+    API_BROTLI_QUALITY = 5
+    # The few catalog-wide payloads (flashcards, catalog outline, quizzes,
+    # demos) are served many times per content version and get maximum effort
+    API_CATALOG_GZIP_LEVEL = 9
+    API_CATALOG_BROTLI_QUALITY = 11
+    # Page sizes for cursor-paginated endpoints such as /api/cards
+    API_DEFAULT_PAGE_SIZE = 50
+    API_MAX_PAGE_SIZE = 500
+    # Result counts for /api/search
+    API_SEARCH_DEFAULT_LIMIT = 20
+    API_SEARCH_MAX_LIMIT = 100
+    # Cards per /api/review/due response
+    API_REVIEW_DEFAULT_LIMIT = 20
+    API_REVIEW_MAX_LIMIT = 200
+    # Graded quiz attempts are written in batches by a background thread:
+    # when this many are waiting or every QUIZ_ATTEMPT_FLUSH_INTERVAL seconds.
+    # Past QUIZ_ATTEMPT_MAX_PENDING, submitters wait (up to one interval) for room.
+    QUIZ_ATTEMPT_BATCH_SIZE = int(os.environ.get('QUIZ_ATTEMPT_BATCH_SIZE', 500))
+    QUIZ_ATTEMPT_FLUSH_INTERVAL = float(os.environ.get('QUIZ_ATTEMPT_FLUSH_INTERVAL', 2.0))
+    QUIZ_ATTEMPT_MAX_PENDING = int(os.environ.get('QUIZ_ATTEMPT_MAX_PENDING', 20000))
+    # Study events from POST /api/events are buffered per worker and written
+    # to the study_events table ('database') or to NDJSON files in EVENTS_DIR
+    # ('ndjson', default <instance>/events), EVENTS_BATCH_SIZE at a time or
+    # every EVENTS_FLUSH_INTERVAL seconds. The oldest are dropped past
+    # EVENTS_BUFFER_SIZE.
+    EVENTS_SINK = os.environ.get('EVENTS_SINK', 'database')
+    EVENTS_DIR = os.environ.get('EVENTS_DIR')
+    EVENTS_FILE_MAX_BYTES = int(os.environ.get('EVENTS_FILE_MAX_BYTES', 64 * 1024 * 1024))
+    EVENTS_BATCH_SIZE = int(os.environ.get('EVENTS_BATCH_SIZE', 1000))
+    EVENTS_FLUSH_INTERVAL = float(os.environ.get('EVENTS_FLUSH_INTERVAL', 5.0))
+    EVENTS_BUFFER_SIZE = int(os.environ.get('EVENTS_BUFFER_SIZE', 50000))
+    API_MAX_EVENTS_PER_REQUEST = 500
+    # Most cards accepted by one POST /api/flashcards/batch request
+    # (and most grades by one POST /api/review/grade)
+    API_MAX_BATCH_SIZE = 1000
+    # Bulk content import: rows per executemany batch, and whether to commit
+    # each batch separately instead of importing in one transaction
+    IMPORT_BATCH_SIZE = int(os.environ.get('IMPORT_BATCH_SIZE', 10000))
+    IMPORT_COMMIT_EACH_BATCH = os.environ.get('IMPORT_COMMIT_EACH_BATCH', '').lower() in ('1', 'true', 'yes')
     
     @staticmethod
     def init_app(app):
-        pass
+        replica_uri = app.config.get('SQLALCHEMY_REPLICA_URI')
+        if replica_uri:
+            binds = dict(app.config.get('SQLALCHEMY_BINDS') or {})
+            binds.setdefault('replica', replica_uri)
+            app.config['SQLALCHEMY_BINDS'] = binds
+        
+        uri = app.config.get('SQLALCHEMY_DATABASE_URI') or ''
+        if uri in ('sqlite://', 'sqlite:///:memory:'):
+            # In-memory databases use a single static connection
+            return
+        options = dict(app.config.get('SQLALCHEMY_ENGINE_OPTIONS') or {})
+        options.setdefault('pool_size', app.config['DB_POOL_SIZE'])
+        options.setdefault('max_overflow', app.config['DB_MAX_OVERFLOW'])
+        options.setdefault('pool_timeout', app.config['DB_POOL_TIMEOUT'])
+        options.setdefault('pool_recycle', app.config['DB_POOL_RECYCLE'])
+        app.config['SQLALCHEMY_ENGINE_OPTIONS'] = options
 
 class DevelopmentConfig(Config):
     DEBUG = True
+    LOG_FORMAT = os.environ.get('LOG_FORMAT', 'text')
     SQLALCHEMY_DATABASE_URI = os.environ.get('DEV_DATABASE_URL') or \
         'sqlite:///' + os.path.join(os.path.abspath(os.path.dirname(__file__)), 'dev.sqlite')
 
 class ProductionConfig(Config):
     DEBUG = False
+    CREATE_SCHEMA_ON_STARTUP = os.environ.get('CREATE_SCHEMA_ON_STARTUP', 'false').lower() in ('true', '1', 'yes')
+    SQLITE_PRAGMAS = SQLITE_PROFILES[os.environ.get('SQLITE_PROFILE', 'production')]
     SQLALCHEMY_DATABASE_URI = os.environ.get('DATABASE_URL')
 
 config = {
@@ -1,26 +1,41 @@
-import json
-import os
+import sys
+from collections import defaultdict
 
-# Load the JSON file
-with open('app/static/data/flashcards.json') as f:
-    data = json.load(f)
+from app.models.content.stream import open_pack, iter_flashcard_records
 
-card_count = 0
-cards_per_deck = []
+def count_cards(path):
+    """Print the total number of cards in a flashcard pack and a per-deck breakdown"""
+    card_count = 0
+    names = {}
+    cards_per_deck = defaultdict(int)
 
-# Count cards in each deck
-for cat in data['categories']:
-    for ch in cat['chapters']:
-        for deck in ch['decks']:
-            deck_cards = len(deck['cards'])
-            card_count += deck_cards
-            cards_per_deck.append((cat['name'], ch['name'], deck['name'], deck_cards))
+    # Count cards in each deck, streaming the pack instead of loading it
+    with open_pack(path) as (f, file_format):
+        for kind, fields, parent_id, position in iter_flashcard_records(f, file_format):
+            if not isinstance(fields, dict):
+                print(f"Warning: skipping malformed {kind} record: {fields!r}", file=sys.stderr)
+                continue
+            if kind == 'card':
+                card_count += 1
+                if ('deck', parent_id) not in names:
+                    print(f"Warning: card {position + 1} belongs to unknown deck {parent_id!r}", file=sys.stderr)
+                cards_per_deck[parent_id] += 1
+                continue
+            names[kind, fields.get('id')] = (fields.get('name'), parent_id)
+            if kind == 'deck':
+                cards_per_deck[fields.get('id')] += 0
 
-# Print totals
-print(f'Total cards in JSON: {card_count}')
+    # Print totals
+    print(f'Total cards in JSON: {card_count}')
 
-# Print breakdown
-print("\nCards per deck:")
-for cat_name, ch_name, deck_name, count in cards_per_deck:
-    if count > 0:
-        print(f"{cat_name} > {ch_name} > {deck_name}: {count} cards")
\ No newline at end of file
+    # Print breakdown
+    print("\nCards per deck:")
+    for deck_id, count in cards_per_deck.items():
+        if count > 0:
+            deck_name, chapter_id = names.get(('deck', deck_id), (f"<unknown deck {deck_id}>", None))
+            ch_name, category_id = names.get(('chapter', chapter_id), ('?', None))
+            cat_name, _ = names.get(('category', category_id), ('?', None))
+            print(f"{cat_name} > {ch_name} > {deck_name}: {count} cards")
+
+if __name__ == '__main__':
+    count_cards(sys.argv[1] if len(sys.argv) > 1 else 'app/static/data/flashcards.json')
@@ -7,6 +7,9 @@ git pull
 # Install or update dependencies
 pip install -r requirements.txt
 
+# Apply database schema migrations
+flask --app wsgi db upgrade
+
 # Create a systemd service file if it doesn't exist
 if [ ! -f /etc/systemd/system/hvacprostudy.service ]; then
     echo "Creating systemd service file..."
@@ -0,0 +1,39 @@
+"""add review_states for spaced repetition
+
+Revision ID: 10f494391201
+Revises: 28c1e7f7ed77
+Create Date: 2026-10-18 17:20:08.634118
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '10f494391201'
+down_revision = '28c1e7f7ed77'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    if 'review_states' in set(sa.inspect(op.get_bind()).get_table_names()):
+        return
+    op.create_table('review_states',
+        sa.Column('learner_id', sa.String(length=50), nullable=False),
+        sa.Column('card_id', sa.String(length=50), nullable=False),
+        sa.Column('repetitions', sa.Integer(), nullable=False),
+        sa.Column('interval_days', sa.Integer(), nullable=False),
+        sa.Column('ease', sa.Float(), nullable=False),
+        sa.Column('lapses', sa.Integer(), nullable=False),
+        sa.Column('due_at', sa.DateTime(), nullable=False),
+        sa.Column('last_reviewed_at', sa.DateTime(), nullable=True),
+        sa.ForeignKeyConstraint(['card_id'], ['flashcards.id'], ),
+        sa.PrimaryKeyConstraint('learner_id', 'card_id')
+    )
+    op.create_index('ix_review_states_learner_id_due_at', 'review_states', ['learner_id', 'due_at'])
+
+
+def downgrade():
+    op.drop_index('ix_review_states_learner_id_due_at', table_name='review_states')
+    op.drop_table('review_states')
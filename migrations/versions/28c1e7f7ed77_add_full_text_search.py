@@ -0,0 +1,76 @@
+"""add full-text search tables and sync triggers
+
+Revision ID: 28c1e7f7ed77
+Revises: d073008d5494
+Create Date: 2026-10-18 16:03:21.542907
+
+SQLite only: FTS5 tables over the flashcard and quiz question text, filled
+from the existing rows, plus triggers that keep them in sync. Other
+databases skip this and search with LIKE.
+
+"""
+from alembic import op
+
+
+# revision identifiers, used by Alembic.
+revision = '28c1e7f7ed77'
+down_revision = 'd073008d5494'
+branch_labels = None
+depends_on = None
+
+# Kept inline rather than imported from the app so this revision does not
+# change when app/models/content/search.py does
+TABLES = ('flashcards_fts', 'quiz_questions_fts')
+TRIGGERS = (
+    'flashcards_fts_ai', 'flashcards_fts_ad', 'flashcards_fts_au',
+    'quiz_questions_fts_ai', 'quiz_questions_fts_ad', 'quiz_questions_fts_au',
+)
+
+UPGRADE = (
+    "CREATE VIRTUAL TABLE IF NOT EXISTS flashcards_fts USING fts5(card_id UNINDEXED, question, answer)",
+    "CREATE VIRTUAL TABLE IF NOT EXISTS quiz_questions_fts USING fts5(text, explanation)",
+    """CREATE TRIGGER IF NOT EXISTS flashcards_fts_ai AFTER INSERT ON flashcards BEGIN
+        INSERT INTO flashcards_fts(rowid, card_id, question, answer)
+        VALUES (new.rowid, new.id, new.question, new.answer);
+    END""",
+    """CREATE TRIGGER IF NOT EXISTS flashcards_fts_ad AFTER DELETE ON flashcards BEGIN
+        DELETE FROM flashcards_fts WHERE rowid = old.rowid;
+    END""",
+    """CREATE TRIGGER IF NOT EXISTS flashcards_fts_au AFTER UPDATE ON flashcards BEGIN
+        DELETE FROM flashcards_fts WHERE rowid = old.rowid;
+        INSERT INTO flashcards_fts(rowid, card_id, question, answer)
+        VALUES (new.rowid, new.id, new.question, new.answer);
+    END""",
+    """CREATE TRIGGER IF NOT EXISTS quiz_questions_fts_ai AFTER INSERT ON quiz_questions BEGIN
+        INSERT INTO quiz_questions_fts(rowid, text, explanation)
+        VALUES (new.id, new.text, coalesce(new.explanation, ''));
+    END""",
+    """CREATE TRIGGER IF NOT EXISTS quiz_questions_fts_ad AFTER DELETE ON quiz_questions BEGIN
+        DELETE FROM quiz_questions_fts WHERE rowid = old.id;
+    END""",
+    """CREATE TRIGGER IF NOT EXISTS quiz_questions_fts_au AFTER UPDATE ON quiz_questions BEGIN
+        DELETE FROM quiz_questions_fts WHERE rowid = old.id;
+        INSERT INTO quiz_questions_fts(rowid, text, explanation)
+        VALUES (new.id, new.text, coalesce(new.explanation, ''));
+    END""",
+    "DELETE FROM flashcards_fts",
+    "INSERT INTO flashcards_fts(rowid, card_id, question, answer) SELECT rowid, id, question, answer FROM flashcards",
+    "DELETE FROM quiz_questions_fts",
+    "INSERT INTO quiz_questions_fts(rowid, text, explanation) SELECT id, text, coalesce(explanation, '') FROM quiz_questions",
+)
+
+
+def upgrade():
+    if op.get_bind().dialect.name != 'sqlite':
+        return
+    for statement in UPGRADE:
+        op.execute(statement)
+
+
+def downgrade():
+    if op.get_bind().dialect.name != 'sqlite':
+        return
+    for name in TRIGGERS:
+        op.execute(f"DROP TRIGGER IF EXISTS {name}")
+    for name in TABLES:
+        op.execute(f"DROP TABLE IF EXISTS {name}")
@@ -0,0 +1,80 @@
+"""initial content schema
+
+Revision ID: 5c930d48d18c
+Revises: 
+Create Date: 2026-10-18 09:12:40.118203
+
+Databases created before migrations were introduced were bootstrapped with
+db.create_all(), so every table is only created when it is missing. Running
+`flask db upgrade` on such a database simply records this revision.
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '5c930d48d18c'
+down_revision = None
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    existing = set(sa.inspect(op.get_bind()).get_table_names())
+
+    if 'categories' not in existing:
+        op.create_table('categories',
+            sa.Column('id', sa.String(length=50), nullable=False),
+            sa.Column('name', sa.String(length=100), nullable=False),
+            sa.Column('description', sa.Text(), nullable=True),
+            sa.PrimaryKeyConstraint('id')
+        )
+    if 'chapters' not in existing:
+        op.create_table('chapters',
+            sa.Column('id', sa.String(length=50), nullable=False),
+            sa.Column('name', sa.String(length=100), nullable=False),
+            sa.Column('category_id', sa.String(length=50), nullable=False),
+            sa.ForeignKeyConstraint(['category_id'], ['categories.id'], ),
+            sa.PrimaryKeyConstraint('id')
+        )
+    if 'quizzes' not in existing:
+        op.create_table('quizzes',
+            sa.Column('id', sa.String(length=50), nullable=False),
+            sa.Column('title', sa.String(length=200), nullable=False),
+            sa.Column('description', sa.Text(), nullable=True),
+            sa.Column('category_id', sa.String(length=50), nullable=False),
+            sa.Column('difficulty', sa.String(length=20), nullable=False),
+            sa.Column('time_limit_minutes', sa.Integer(), nullable=True),
+            sa.Column('created_at', sa.DateTime(), nullable=True),
+            sa.Column('questions_json', sa.Text(), nullable=False),
+            sa.ForeignKeyConstraint(['category_id'], ['categories.id'], ),
+            sa.PrimaryKeyConstraint('id')
+        )
+    if 'decks' not in existing:
+        op.create_table('decks',
+            sa.Column('id', sa.String(length=50), nullable=False),
+            sa.Column('name', sa.String(length=100), nullable=False),
+            sa.Column('difficulty', sa.String(length=20), nullable=False),
+            sa.Column('chapter_id', sa.String(length=50), nullable=False),
+            sa.ForeignKeyConstraint(['chapter_id'], ['chapters.id'], ),
+            sa.PrimaryKeyConstraint('id')
+        )
+    if 'flashcards' not in existing:
+        op.create_table('flashcards',
+            sa.Column('id', sa.String(length=50), nullable=False),
+            sa.Column('question', sa.Text(), nullable=False),
+            sa.Column('answer', sa.Text(), nullable=False),
+            sa.Column('deck_id', sa.String(length=50), nullable=False),
+            sa.Column('created_at', sa.DateTime(), nullable=True),
+            sa.ForeignKeyConstraint(['deck_id'], ['decks.id'], ),
+            sa.PrimaryKeyConstraint('id')
+        )
+
+
+def downgrade():
+    op.drop_table('flashcards')
+    op.drop_table('decks')
+    op.drop_table('quizzes')
+    op.drop_table('chapters')
+    op.drop_table('categories')
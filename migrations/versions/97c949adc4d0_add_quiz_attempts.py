@@ -0,0 +1,39 @@
+"""add quiz_attempts
+
+Revision ID: 97c949adc4d0
+Revises: 10f494391201
+Create Date: 2026-10-18 18:02:45.271930
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '97c949adc4d0'
+down_revision = '10f494391201'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    if 'quiz_attempts' in set(sa.inspect(op.get_bind()).get_table_names()):
+        return
+    op.create_table('quiz_attempts',
+        sa.Column('id', sa.String(length=50), nullable=False),
+        sa.Column('quiz_id', sa.String(length=50), nullable=False),
+        sa.Column('learner_id', sa.String(length=50), nullable=False),
+        sa.Column('score', sa.Integer(), nullable=False),
+        sa.Column('total', sa.Integer(), nullable=False),
+        sa.Column('answers', sa.Text(), nullable=False),
+        sa.Column('submitted_at', sa.DateTime(), nullable=False),
+        sa.PrimaryKeyConstraint('id')
+    )
+    op.create_index('ix_quiz_attempts_quiz_id_submitted_at', 'quiz_attempts', ['quiz_id', 'submitted_at'])
+    op.create_index('ix_quiz_attempts_learner_id_submitted_at', 'quiz_attempts', ['learner_id', 'submitted_at'])
+
+
+def downgrade():
+    op.drop_index('ix_quiz_attempts_learner_id_submitted_at', table_name='quiz_attempts')
+    op.drop_index('ix_quiz_attempts_quiz_id_submitted_at', table_name='quiz_attempts')
+    op.drop_table('quiz_attempts')
@@ -0,0 +1,85 @@
+"""key the flashcard search index on card ids
+
+Revision ID: 9e2b288cee57
+Revises: def23708227e
+Create Date: 2026-10-18 19:20:44.118230
+
+SQLite only. flashcards_fts used the implicit rowid of flashcards, which
+VACUUM may renumber. Each card now gets a stable integer key in
+flashcards_fts_keys; the index and its triggers are rebuilt on it.
+
+"""
+from alembic import op
+
+
+# revision identifiers, used by Alembic.
+revision = '9e2b288cee57'
+down_revision = 'def23708227e'
+branch_labels = None
+depends_on = None
+
+# Kept inline rather than imported from the app so this revision does not
+# change when app/models/content/search.py does
+DROP_FLASHCARD_INDEX = (
+    "DROP TRIGGER IF EXISTS flashcards_fts_ai",
+    "DROP TRIGGER IF EXISTS flashcards_fts_ad",
+    "DROP TRIGGER IF EXISTS flashcards_fts_au",
+    "DROP TABLE IF EXISTS flashcards_fts",
+)
+
+UPGRADE = DROP_FLASHCARD_INDEX + (
+    "CREATE TABLE IF NOT EXISTS flashcards_fts_keys (fts_rowid INTEGER PRIMARY KEY, card_id VARCHAR(50) NOT NULL UNIQUE)",
+    "CREATE VIRTUAL TABLE flashcards_fts USING fts5(card_id UNINDEXED, question, answer)",
+    """CREATE TRIGGER flashcards_fts_ai AFTER INSERT ON flashcards BEGIN
+        INSERT INTO flashcards_fts_keys(card_id) VALUES (new.id);
+        INSERT INTO flashcards_fts(rowid, card_id, question, answer)
+        SELECT fts_rowid, new.id, new.question, new.answer FROM flashcards_fts_keys WHERE card_id = new.id;
+    END""",
+    """CREATE TRIGGER flashcards_fts_ad AFTER DELETE ON flashcards BEGIN
+        DELETE FROM flashcards_fts WHERE rowid = (SELECT fts_rowid FROM flashcards_fts_keys WHERE card_id = old.id);
+        DELETE FROM flashcards_fts_keys WHERE card_id = old.id;
+    END""",
+    """CREATE TRIGGER flashcards_fts_au AFTER UPDATE ON flashcards BEGIN
+        DELETE FROM flashcards_fts WHERE rowid = (SELECT fts_rowid FROM flashcards_fts_keys WHERE card_id = old.id);
+        UPDATE flashcards_fts_keys SET card_id = new.id WHERE card_id = old.id;
+        INSERT INTO flashcards_fts(rowid, card_id, question, answer)
+        SELECT fts_rowid, new.id, new.question, new.answer FROM flashcards_fts_keys WHERE card_id = new.id;
+    END""",
+    "DELETE FROM flashcards_fts_keys",
+    "INSERT INTO flashcards_fts_keys(card_id) SELECT id FROM flashcards",
+    """INSERT INTO flashcards_fts(rowid, card_id, question, answer)
+       SELECT k.fts_rowid, f.id, f.question, f.answer FROM flashcards f JOIN flashcards_fts_keys k ON k.card_id = f.id""",
+)
+
+# The rowid-keyed layout from 28c1e7f7ed77
+DOWNGRADE = DROP_FLASHCARD_INDEX + (
+    "DROP TABLE IF EXISTS flashcards_fts_keys",
+    "CREATE VIRTUAL TABLE flashcards_fts USING fts5(card_id UNINDEXED, question, answer)",
+    """CREATE TRIGGER flashcards_fts_ai AFTER INSERT ON flashcards BEGIN
+        INSERT INTO flashcards_fts(rowid, card_id, question, answer)
+        VALUES (new.rowid, new.id, new.question, new.answer);
+    END""",
+    """CREATE TRIGGER flashcards_fts_ad AFTER DELETE ON flashcards BEGIN
+        DELETE FROM flashcards_fts WHERE rowid = old.rowid;
+    END""",
+    """CREATE TRIGGER flashcards_fts_au AFTER UPDATE ON flashcards BEGIN
+        DELETE FROM flashcards_fts WHERE rowid = old.rowid;
+        INSERT INTO flashcards_fts(rowid, card_id, question, answer)
+        VALUES (new.rowid, new.id, new.question, new.answer);
+    END""",
+    "INSERT INTO flashcards_fts(rowid, card_id, question, answer) SELECT rowid, id, question, answer FROM flashcards",
+)
+
+
+def upgrade():
+    if op.get_bind().dialect.name != 'sqlite':
+        return
+    for statement in UPGRADE:
+        op.execute(statement)
+
+
+def downgrade():
+    if op.get_bind().dialect.name != 'sqlite':
+        return
+    for statement in DOWNGRADE:
+        op.execute(statement)
@@ -0,0 +1,49 @@
+"""add quizzes.question_count
+
+Revision ID: ae4661ba65cf
+Revises: 5c930d48d18c
+Create Date: 2026-10-18 10:03:17.542961
+
+"""
+import json
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'ae4661ba65cf'
+down_revision = '5c930d48d18c'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    bind = op.get_bind()
+    columns = {c['name'] for c in sa.inspect(bind).get_columns('quizzes')}
+    if 'question_count' not in columns:
+        op.add_column('quizzes', sa.Column('question_count', sa.Integer(), nullable=False, server_default='0'))
+
+    # Backfill from the existing blobs
+    quizzes = sa.table('quizzes',
+        sa.column('id', sa.String),
+        sa.column('questions_json', sa.Text),
+        sa.column('question_count', sa.Integer)
+    )
+    updates = []
+    for quiz_id, questions_json in bind.execute(sa.select(quizzes.c.id, quizzes.c.questions_json)):
+        try:
+            questions = json.loads(questions_json or '[]')
+        except ValueError:
+            questions = []
+        updates.append({'quiz_id': quiz_id, 'count': len(questions) if isinstance(questions, list) else 0})
+    if updates:
+        bind.execute(
+            quizzes.update().where(quizzes.c.id == sa.bindparam('quiz_id')).values(question_count=sa.bindparam('count')),
+            updates
+        )
+
+
+def downgrade():
+    with op.batch_alter_table('quizzes') as batch_op:
+        batch_op.drop_column('question_count')
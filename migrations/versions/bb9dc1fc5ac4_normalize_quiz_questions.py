@@ -0,0 +1,150 @@
+"""normalize quiz questions into quiz_questions / quiz_answers
+
+Revision ID: bb9dc1fc5ac4
+Revises: ae4661ba65cf
+Create Date: 2026-10-18 11:26:05.730412
+
+Converts every quizzes.questions_json blob into rows and then drops the
+column. Quizzes that already have question rows are left alone, so the
+revision can be re-run after a partial failure.
+
+"""
+import json
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'bb9dc1fc5ac4'
+down_revision = 'ae4661ba65cf'
+branch_labels = None
+depends_on = None
+
+quizzes = sa.table('quizzes',
+    sa.column('id', sa.String),
+    sa.column('questions_json', sa.Text),
+    sa.column('question_count', sa.Integer)
+)
+# A real Table so that inserted_primary_key is available
+quiz_questions = sa.Table('quiz_questions', sa.MetaData(),
+    sa.Column('id', sa.Integer, primary_key=True),
+    sa.Column('quiz_id', sa.String),
+    sa.Column('position', sa.Integer),
+    sa.Column('question_key', sa.String),
+    sa.Column('text', sa.Text),
+    sa.Column('type', sa.String),
+    sa.Column('explanation', sa.Text)
+)
+quiz_answers = sa.table('quiz_answers',
+    sa.column('id', sa.Integer),
+    sa.column('question_id', sa.Integer),
+    sa.column('position', sa.Integer),
+    sa.column('answer_key', sa.String),
+    sa.column('text', sa.Text),
+    sa.column('correct', sa.Boolean)
+)
+
+
+def upgrade():
+    bind = op.get_bind()
+    inspector = sa.inspect(bind)
+    existing = set(inspector.get_table_names())
+
+    if 'quiz_questions' not in existing:
+        op.create_table('quiz_questions',
+            sa.Column('id', sa.Integer(), nullable=False),
+            sa.Column('quiz_id', sa.String(length=50), nullable=False),
+            sa.Column('position', sa.Integer(), nullable=False),
+            sa.Column('question_key', sa.String(length=50), nullable=True),
+            sa.Column('text', sa.Text(), nullable=False),
+            sa.Column('type', sa.String(length=30), nullable=True),
+            sa.Column('explanation', sa.Text(), nullable=True),
+            sa.ForeignKeyConstraint(['quiz_id'], ['quizzes.id'], ),
+            sa.PrimaryKeyConstraint('id')
+        )
+        op.create_index('ix_quiz_questions_quiz_id_position', 'quiz_questions', ['quiz_id', 'position'])
+    if 'quiz_answers' not in existing:
+        op.create_table('quiz_answers',
+            sa.Column('id', sa.Integer(), nullable=False),
+            sa.Column('question_id', sa.Integer(), nullable=False),
+            sa.Column('position', sa.Integer(), nullable=False),
+            sa.Column('answer_key', sa.String(length=50), nullable=True),
+            sa.Column('text', sa.Text(), nullable=False),
+            sa.Column('correct', sa.Boolean(), nullable=False),
+            sa.ForeignKeyConstraint(['question_id'], ['quiz_questions.id'], ),
+            sa.PrimaryKeyConstraint('id')
+        )
+        op.create_index('ix_quiz_answers_question_id_position', 'quiz_answers', ['question_id', 'position'])
+
+    if 'questions_json' not in {c['name'] for c in inspector.get_columns('quizzes')}:
+        # Created by db.create_all() from the normalized schema; nothing to convert
+        return
+
+    converted = set(bind.execute(sa.select(quiz_questions.c.quiz_id).distinct()).scalars())
+    for quiz_id, questions_json in bind.execute(sa.select(quizzes.c.id, quizzes.c.questions_json)).all():
+        if quiz_id in converted:
+            continue
+        try:
+            questions = json.loads(questions_json or '[]')
+        except ValueError:
+            questions = []
+        if not isinstance(questions, list):
+            questions = []
+
+        for position, question in enumerate(questions):
+            question_id = bind.execute(quiz_questions.insert().values(
+                quiz_id=quiz_id,
+                position=position,
+                question_key=question.get('id'),
+                text=question.get('text') or '',
+                type=question.get('type'),
+                explanation=question.get('explanation')
+            )).inserted_primary_key[0]
+            answers = [
+                {
+                    'question_id': question_id,
+                    'position': i,
+                    'answer_key': answer.get('id'),
+                    'text': answer.get('text') or '',
+                    'correct': bool(answer.get('correct'))
+                }
+                for i, answer in enumerate(question.get('answers') or [])
+            ]
+            if answers:
+                bind.execute(quiz_answers.insert(), answers)
+
+        bind.execute(quizzes.update().where(quizzes.c.id == quiz_id).values(question_count=len(questions)))
+
+    with op.batch_alter_table('quizzes') as batch_op:
+        batch_op.drop_column('questions_json')
+
+
+def downgrade():
+    bind = op.get_bind()
+    with op.batch_alter_table('quizzes') as batch_op:
+        batch_op.add_column(sa.Column('questions_json', sa.Text(), nullable=False, server_default='[]'))
+
+    answers_by_question = {}
+    for row in bind.execute(sa.select(quiz_answers).order_by(quiz_answers.c.question_id, quiz_answers.c.position)):
+        answer = {'text': row.text, 'correct': bool(row.correct)}
+        if row.answer_key is not None:
+            answer['id'] = row.answer_key
+        answers_by_question.setdefault(row.question_id, []).append(answer)
+
+    questions_by_quiz = {}
+    for row in bind.execute(sa.select(quiz_questions).order_by(quiz_questions.c.quiz_id, quiz_questions.c.position)):
+        question = {'text': row.text, 'answers': answers_by_question.get(row.id, [])}
+        if row.question_key is not None:
+            question['id'] = row.question_key
+        if row.type is not None:
+            question['type'] = row.type
+        if row.explanation is not None:
+            question['explanation'] = row.explanation
+        questions_by_quiz.setdefault(row.quiz_id, []).append(question)
+
+    for quiz_id, questions in questions_by_quiz.items():
+        bind.execute(quizzes.update().where(quizzes.c.id == quiz_id).values(questions_json=json.dumps(questions)))
+
+    op.drop_table('quiz_answers')
+    op.drop_table('quiz_questions')
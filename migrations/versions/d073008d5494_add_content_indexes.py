@@ -0,0 +1,45 @@
+"""add secondary indexes for the content tables
+
+Revision ID: d073008d5494
+Revises: bb9dc1fc5ac4
+Create Date: 2026-10-18 14:12:40.118526
+
+Covers the foreign keys the catalog joins on and the columns the API
+filters by. Indexes that already exist (e.g. from db.create_all()) are
+left alone.
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'd073008d5494'
+down_revision = 'bb9dc1fc5ac4'
+branch_labels = None
+depends_on = None
+
+INDEXES = (
+    ('ix_chapters_category_id', 'chapters', ['category_id']),
+    ('ix_decks_chapter_id', 'decks', ['chapter_id']),
+    ('ix_decks_difficulty', 'decks', ['difficulty']),
+    ('ix_flashcards_deck_id_id', 'flashcards', ['deck_id', 'id']),
+    ('ix_quizzes_category_id_difficulty', 'quizzes', ['category_id', 'difficulty']),
+    ('ix_quizzes_difficulty', 'quizzes', ['difficulty']),
+)
+
+
+def _existing_indexes(table):
+    return {index['name'] for index in sa.inspect(op.get_bind()).get_indexes(table)}
+
+
+def upgrade():
+    for name, table, columns in INDEXES:
+        if name not in _existing_indexes(table):
+            op.create_index(name, table, columns)
+
+
+def downgrade():
+    for name, table, columns in reversed(INDEXES):
+        if name in _existing_indexes(table):
+            op.drop_index(name, table_name=table)
@@ -0,0 +1,37 @@
+"""add study_events
+
+Revision ID: def23708227e
+Revises: 97c949adc4d0
+Create Date: 2026-10-18 18:51:12.906337
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'def23708227e'
+down_revision = '97c949adc4d0'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    if 'study_events' in set(sa.inspect(op.get_bind()).get_table_names()):
+        return
+    op.create_table('study_events',
+        sa.Column('id', sa.Integer(), nullable=False),
+        sa.Column('type', sa.String(length=30), nullable=False),
+        sa.Column('learner_id', sa.String(length=50), nullable=False),
+        sa.Column('subject_id', sa.String(length=50), nullable=True),
+        sa.Column('data', sa.Text(), nullable=True),
+        sa.Column('occurred_at', sa.DateTime(), nullable=False),
+        sa.Column('received_at', sa.DateTime(), nullable=False),
+        sa.PrimaryKeyConstraint('id')
+    )
+    op.create_index('ix_study_events_occurred_at', 'study_events', ['occurred_at'])
+
+
+def downgrade():
+    op.drop_index('ix_study_events_occurred_at', table_name='study_events')
+    op.drop_table('study_events')
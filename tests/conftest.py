@@ -0,0 +1,37 @@
+import pytest
+
+from app import create_app
+from app.models.database import db, Category, Chapter, Deck, Flashcard
+
+@pytest.fixture
+def app(tmp_path):
+    """The development app on an in-memory database, with its files under tmp_path"""
+    app = create_app('development', overrides={
+        'SQLALCHEMY_DATABASE_URI': 'sqlite://',
+        'CONTENT_VERSION_FILE': str(tmp_path / 'content.version'),
+        'EVENTS_DIR': str(tmp_path / 'events'),
+        'SESSION_FILE_DIR': str(tmp_path / 'flask_session'),
+        'LOG_LEVEL': 'WARNING',
+    })
+    with app.app_context():
+        yield app
+        db.session.remove()
+
+@pytest.fixture
+def client(app):
+    return app.test_client()
+
+@pytest.fixture
+def deck(app):
+    """One category > chapter > deck holding cards card0-card4, returns the deck id"""
+    db.session.add_all([
+        Category(id='cat', name='Category'),
+        Chapter(id='ch', name='Chapter', category_id='cat'),
+        Deck(id='deck', name='Deck', difficulty='beginner', chapter_id='ch'),
+        Deck(id='other', name='Other deck', difficulty='beginner', chapter_id='ch'),
+    ])
+    db.session.add_all(Flashcard(id=f"card{i}", question=f"Question {i}", answer=f"Answer {i}", deck_id='deck')
+                       for i in range(5))
+    db.session.add(Flashcard(id='elsewhere', question='Question', answer='Answer', deck_id='other'))
+    db.session.commit()
+    return 'deck'
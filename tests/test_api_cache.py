@@ -0,0 +1,115 @@
+import gzip
+
+import pytest
+
+from app.api.cache import ResponseCache, response_cache, brotli
+from app.models.content import import_flashcards, add_flashcard, bump_content_version
+
+NEW_CARD = {
+    'category_id': 'cat', 'category_name': 'Category', 'chapter_id': 'ch', 'chapter_name': 'Chapter',
+    'deck_id': 'deck', 'deck_name': 'Deck', 'difficulty': 'beginner',
+    'question': 'What does a TXV meter?', 'answer': 'Refrigerant into the evaporator'
+}
+
+@pytest.fixture
+def catalog(app):
+    """The bundled flashcards, large enough for every response to be compressed"""
+    result = import_flashcards()
+    assert result['success']
+
+def get(client, etag=None, encoding=None, url='/api/flashcards'):
+    headers = {}
+    if etag:
+        headers['If-None-Match'] = f'"{etag}"'
+    if encoding:
+        headers['Accept-Encoding'] = encoding
+    return client.get(url, headers=headers)
+
+def test_etag_and_304(client, catalog):
+    response = get(client)
+    assert response.status_code == 200
+    etag = response.get_etag()[0]
+    assert etag
+    assert 'Accept-Encoding' in response.vary
+    assert response.headers['Cache-Control'] == 'no-cache'
+    assert 'Content-Encoding' not in response.headers
+
+    revalidated = get(client, etag)
+    assert revalidated.status_code == 304
+    assert revalidated.get_etag()[0] == etag
+    assert revalidated.data == b''
+    assert 'Accept-Encoding' in revalidated.vary
+
+    assert get(client, 'some-other-tag').status_code == 200
+
+@pytest.mark.parametrize('encoding', [
+    'gzip',
+    pytest.param('br', marks=pytest.mark.skipif(brotli is None, reason='brotli is not installed')),
+])
+def test_compressed_variants(client, catalog, encoding):
+    identity = get(client)
+    response = get(client, encoding=f"{encoding}, identity;q=0.5")
+    assert response.status_code == 200
+    assert response.headers['Content-Encoding'] == encoding
+    assert 'Accept-Encoding' in response.vary
+    decompress = gzip.decompress if encoding == 'gzip' else brotli.decompress
+    assert decompress(response.data) == identity.data
+
+    # Each coding has its own tag, and a tag for any coding revalidates
+    etag = response.get_etag()[0]
+    assert etag == f"{identity.get_etag()[0]}-{encoding}"
+    assert get(client, etag, encoding=encoding).status_code == 304
+    assert get(client, etag).status_code == 304
+    assert get(client, identity.get_etag()[0], encoding=encoding).status_code == 304
+
+def test_small_responses_are_not_compressed(app, client, catalog):
+    app.config['API_COMPRESSION_MIN_SIZE'] = 10 ** 9
+    response = get(client, encoding='gzip, br')
+    assert 'Content-Encoding' not in response.headers
+    assert 'Accept-Encoding' in response.vary
+
+@pytest.mark.parametrize('encoding', [None, 'gzip'])
+def test_content_write_invalidates_cached_entries(client, catalog, encoding):
+    before = get(client, encoding=encoding)
+    etag = before.get_etag()[0]
+    assert response_cache.stats()['size'] >= 1
+
+    assert add_flashcard(NEW_CARD)['success']
+    after = get(client, etag, encoding=encoding)
+    assert after.status_code == 200
+    assert after.get_etag()[0] != etag
+    assert after.headers.get('Content-Encoding') == encoding
+    body = gzip.decompress(after.data) if encoding else after.data
+    assert b'What does a TXV meter?' in body
+
+def test_version_bump_rebuilds_but_keeps_unchanged_tags(client, catalog):
+    etag = get(client).get_etag()[0]
+    misses = response_cache.stats()['misses']
+
+    bump_content_version()
+    # The payload is rebuilt under the new version; the body, and so the tag, are the same
+    assert get(client, etag).status_code == 304
+    assert response_cache.stats()['misses'] == misses + 1
+
+def test_errors_are_neither_cached_nor_tagged(client, catalog):
+    response = client.get('/api/decks/missing/cards')
+    assert response.status_code == 404
+    assert response.get_etag() == (None, None)
+    assert response.headers['Cache-Control'] == 'no-store'
+
+def test_response_cache_drops_entries_from_older_versions():
+    cache = ResponseCache(maxsize=2)
+    cache.set('a', 1, 'v1')
+    assert cache.get('a', 'v1') == 1
+    assert cache.get('a', 'v2') is None
+    assert cache.stats()['size'] == 0
+
+def test_response_cache_evicts_least_recently_used():
+    cache = ResponseCache(maxsize=2)
+    cache.set('a', 1, 'v1')
+    cache.set('b', 2, 'v1')
+    cache.get('a', 'v1')
+    cache.set('c', 3, 'v1')
+    assert cache.get('b', 'v1') is None
+    assert (cache.get('a', 'v1'), cache.get('c', 'v1')) == (1, 3)
+    assert cache.stats()['evictions'] == 1
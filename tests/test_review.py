@@ -0,0 +1,118 @@
+from datetime import datetime, timedelta
+
+import pytest
+
+from app.models.database import ReviewState
+from app.models.content.review import schedule, get_due_cards, grade_cards, INITIAL_EASE, MIN_EASE
+
+REVIEWED_AT = datetime(2024, 1, 1, 12, 0)
+
+def new_state():
+    return ReviewState(repetitions=0, interval_days=0, ease=INITIAL_EASE, lapses=0)
+
+def test_schedule_first_recalls_use_fixed_intervals():
+    state = new_state()
+    schedule(state, 4, REVIEWED_AT)
+    assert (state.repetitions, state.interval_days) == (1, 1)
+    schedule(state, 4, REVIEWED_AT)
+    assert (state.repetitions, state.interval_days) == (2, 6)
+
+def test_schedule_later_recalls_multiply_by_ease():
+    state = new_state()
+    for _ in range(3):
+        schedule(state, 5, REVIEWED_AT)
+    # Ease grows by 0.1 per perfect grade: 2.6, 2.7, 2.8. The third interval
+    # uses the ease as it stood before that review
+    assert state.ease == pytest.approx(2.8)
+    assert state.interval_days == round(6 * 2.7)
+    assert state.due_at == REVIEWED_AT + timedelta(days=state.interval_days)
+    assert state.last_reviewed_at == REVIEWED_AT
+
+@pytest.mark.parametrize('grade, ease', [(5, 2.6), (4, 2.5), (3, 2.36), (2, 2.18), (0, 1.7)])
+def test_schedule_adjusts_ease_by_grade(grade, ease):
+    state = new_state()
+    schedule(state, grade, REVIEWED_AT)
+    assert state.ease == pytest.approx(ease)
+
+def test_schedule_lapse_resets_repetitions():
+    state = new_state()
+    for _ in range(3):
+        schedule(state, 5, REVIEWED_AT)
+    schedule(state, 1, REVIEWED_AT)
+    assert (state.repetitions, state.interval_days, state.lapses) == (0, 1, 1)
+    assert state.due_at == REVIEWED_AT + timedelta(days=1)
+
+def test_schedule_ease_never_drops_below_minimum():
+    state = new_state()
+    for _ in range(10):
+        schedule(state, 0, REVIEWED_AT)
+    assert state.ease == MIN_EASE
+    assert state.lapses == 10
+
+def test_grade_cards_reports_invalid_items_in_input_order(deck):
+    result = grade_cards('learner', [
+        {'card_id': 'card0', 'grade': 4},
+        'not an object',
+        {'grade': 4},
+        {'card_id': 'card1', 'grade': True},
+        {'card_id': 'card1', 'grade': 6},
+        {'card_id': 'card1', 'grade': 3, 'reviewed_at': 'yesterday'},
+        {'card_id': 'missing', 'grade': 3},
+    ])
+    assert result['success']
+    assert (result['graded'], result['failed']) == (1, 6)
+    assert [item['index'] for item in result['results']] == list(range(7))
+    assert [item['success'] for item in result['results']] == [True] + [False] * 6
+    assert result['results'][6]['error'] == 'Card missing not found'
+
+def test_grade_cards_applies_repeated_grades_in_order(deck):
+    result = grade_cards('learner', [
+        {'card_id': 'card0', 'grade': 5},
+        {'card_id': 'card0', 'grade': 5},
+        {'card_id': 'card0', 'grade': 1},
+    ])
+    reviews = [item['review'] for item in result['results']]
+    assert [review['repetitions'] for review in reviews] == [1, 2, 0]
+    assert reviews[-1]['lapses'] == 1
+
+    # The schedule persists and carries on from the stored state
+    later = grade_cards('learner', [{'card_id': 'card0', 'grade': 5}])
+    assert later['results'][0]['review']['repetitions'] == 1
+    assert later['results'][0]['review']['lapses'] == 1
+
+def test_grade_cards_keeps_learners_apart(deck):
+    grade_cards('learner', [{'card_id': 'card0', 'grade': 5}])
+    result = grade_cards('someone else', [{'card_id': 'card0', 'grade': 5}])
+    assert result['results'][0]['review']['repetitions'] == 1
+
+def test_grade_cards_honours_client_timestamps(deck):
+    result = grade_cards('learner', [{'card_id': 'card0', 'grade': 4, 'reviewed_at': '2024-01-01T12:00:00+02:00'}])
+    review = result['results'][0]['review']
+    assert review['last_reviewed_at'] == '2024-01-01T10:00:00'
+    assert review['due_at'] == '2024-01-02T10:00:00'
+
+def test_due_cards_oldest_first_and_limited(deck):
+    grade_cards('learner', [
+        {'card_id': 'card2', 'grade': 4, 'reviewed_at': '2024-01-03T00:00:00'},
+        {'card_id': 'card0', 'grade': 4, 'reviewed_at': '2024-01-01T00:00:00'},
+        {'card_id': 'card1', 'grade': 4, 'reviewed_at': '2024-01-02T00:00:00'},
+    ])
+    now = datetime(2024, 2, 1)
+    assert [card['id'] for card in get_due_cards('learner', now=now)['cards']] == ['card0', 'card1', 'card2']
+    assert [card['id'] for card in get_due_cards('learner', limit=2, now=now)['cards']] == ['card0', 'card1']
+    assert get_due_cards('someone else', now=now) == {'cards': [], 'next_due_at': None}
+
+def test_due_cards_skip_cards_not_yet_due(deck):
+    grade_cards('learner', [{'card_id': 'card0', 'grade': 4, 'reviewed_at': '2024-01-01T00:00:00'}])
+    result = get_due_cards('learner', now=datetime(2024, 1, 1, 12, 0))
+    assert result == {'cards': [], 'next_due_at': '2024-01-02T00:00:00'}
+
+def test_due_cards_for_a_deck_fill_up_with_new_cards(deck):
+    grade_cards('learner', [
+        {'card_id': 'card3', 'grade': 4, 'reviewed_at': '2024-01-01T00:00:00'},
+        {'card_id': 'card4', 'grade': 5, 'reviewed_at': '2024-03-01T00:00:00'},
+        {'card_id': 'elsewhere', 'grade': 4, 'reviewed_at': '2024-01-01T00:00:00'},
+    ])
+    cards = get_due_cards('learner', limit=3, deck=deck, now=datetime(2024, 2, 1))['cards']
+    # card3 is due; card4 is reviewed but not due, so only unreviewed cards fill the rest
+    assert [(card['id'], card['new']) for card in cards] == [('card3', False), ('card0', True), ('card1', True)]
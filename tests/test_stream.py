@@ -0,0 +1,125 @@
+import io
+import json
+import os
+
+import pytest
+
+from app.models.content.helpers import DATA_DIR
+from app.models.content.stream import JSONStream, ContentFormatError, iter_flashcard_records, iter_quizzes
+
+CHUNK_SIZES = (1, 2, 3, 7, 64)
+# Whole bundled packs one character at a time would take seconds
+PACK_CHUNK_SIZES = (3, 7, 64)
+
+class TrickleIO(io.StringIO):
+    """A text file that hands out at most `limit` characters per read, counting reads"""
+
+    def __init__(self, text, limit):
+        super().__init__(text)
+        self.limit = limit
+        self.reads = 0
+
+    def read(self, size=-1):
+        self.reads += 1
+        if size is None or size < 0:
+            size = self.limit
+        return super().read(min(size, self.limit))
+
+def load(name):
+    with open(os.path.join(DATA_DIR, name), encoding='utf-8') as f:
+        return f.read()
+
+@pytest.mark.parametrize('chunk_size', CHUNK_SIZES)
+@pytest.mark.parametrize('text', [
+    '{"a": [1, 2.5, -3e-2, true, false, null], "b": {"c": "d\\u00e9\\n\\"q\\""}, "e": []}',
+    '[{"x": -Infinity}, 123456789012345678901234567890, "' + 'long ' * 40 + '"]',
+    '  "just a string"  ',
+    '0',
+])
+def test_read_value_matches_json_loads(text, chunk_size):
+    stream = JSONStream(TrickleIO(text, chunk_size), chunk_size=chunk_size)
+    assert stream.read_value() == json.loads(text)
+    stream.expect_end()
+
+@pytest.mark.parametrize('chunk_size', PACK_CHUNK_SIZES)
+def test_flashcard_stream_matches_json_load(chunk_size):
+    text = load('flashcards.json')
+    expected = list(iter_flashcard_records(json.loads(text)))
+    assert list(iter_flashcard_records(TrickleIO(text, chunk_size))) == expected
+
+@pytest.mark.parametrize('chunk_size', PACK_CHUNK_SIZES)
+def test_quiz_stream_matches_json_load(chunk_size):
+    text = load('quizzes.json')
+    assert list(iter_quizzes(TrickleIO(text, chunk_size))) == json.loads(text)['quizzes']
+
+def test_children_before_fields_are_replayed_after_their_parent():
+    pack = {'categories': [{
+        'chapters': [{
+            'decks': [{'cards': [{'id': 'c1', 'question': 'Q', 'answer': 'A'}],
+                       'id': 'd1', 'name': 'Deck', 'difficulty': 'beginner'}],
+            'id': 'ch1', 'name': 'Chapter',
+        }],
+        'id': 'cat1', 'name': 'Category',
+    }]}
+    records = list(iter_flashcard_records(TrickleIO(json.dumps(pack), 5)))
+    assert records == [
+        ('category', {'id': 'cat1', 'name': 'Category'}, None, 0),
+        ('chapter', {'id': 'ch1', 'name': 'Chapter'}, 'cat1', 0),
+        ('deck', {'id': 'd1', 'name': 'Deck', 'difficulty': 'beginner'}, 'ch1', 0),
+        ('card', {'id': 'c1', 'question': 'Q', 'answer': 'A'}, 'd1', 0),
+    ]
+    assert records == list(iter_flashcard_records(pack))
+
+def test_ndjson_flashcards_emit_each_parent_once():
+    lines = [
+        {'category_id': 'cat', 'category_name': 'Category', 'chapter_id': 'ch', 'chapter_name': 'Chapter',
+         'deck_id': deck, 'deck_name': deck.title(), 'difficulty': 'beginner', 'id': card,
+         'question': f"Q {card}", 'answer': f"A {card}"}
+        for deck, card in (('d1', 'c1'), ('d1', 'c2'), ('d2', 'c3'))
+    ]
+    text = '\n'.join(json.dumps(line) for line in lines) + '\n\n'
+    records = list(iter_flashcard_records(io.StringIO(text), 'ndjson'))
+    assert [(kind, fields.get('id'), parent, position) for kind, fields, parent, position in records] == [
+        ('category', 'cat', None, 0),
+        ('chapter', 'ch', 'cat', 0),
+        ('deck', 'd1', 'ch', 0),
+        ('card', 'c1', 'd1', 0),
+        ('card', 'c2', 'd1', 1),
+        ('deck', 'd2', 'ch', 0),
+        ('card', 'c3', 'd2', 0),
+    ]
+    assert records[-1][1] == {'id': 'c3', 'question': 'Q c3', 'answer': 'A c3'}
+
+def test_ndjson_quizzes():
+    quizzes = json.loads(load('quizzes.json'))['quizzes']
+    text = '\n'.join(json.dumps(quiz) for quiz in quizzes)
+    assert list(iter_quizzes(io.StringIO(text), 'ndjson')) == quizzes
+
+@pytest.mark.parametrize('text', [
+    '{"categories": [x]}',
+    '{"categories": [{"id": "a" "name": "b"}]}',
+    '{"categories": [{"id": "a", "name": "b", "chapters": [}]}',
+    '{"categories": []} trailing',
+    '{"categories": [{"id": "a", "name": "b"',
+    '{"categories": [{"id": 1, "name": "\u0001"}]}',
+    '',
+])
+@pytest.mark.parametrize('chunk_size', (1, 4, 64))
+def test_malformed_flashcard_json_raises_content_format_error(text, chunk_size):
+    with pytest.raises(ContentFormatError):
+        list(iter_flashcard_records(TrickleIO(text, chunk_size)))
+
+def test_malformed_ndjson_reports_the_line():
+    with pytest.raises(ContentFormatError, match='Line 2'):
+        list(iter_quizzes(io.StringIO('{"id": "q1"}\n{"id": \n'), 'ndjson'))
+
+def test_quiz_pack_without_quizzes_raises():
+    with pytest.raises(ContentFormatError):
+        list(iter_quizzes(io.StringIO('{"other": []}')))
+
+def test_malformed_value_fails_without_reading_to_the_end():
+    text = '{"categories": [{"id": "a", "name": "b", "extra": [1, 2, x]}, ' + '"padding", ' * 100000 + '1]}'
+    fp = TrickleIO(text, 1024)
+    with pytest.raises(ContentFormatError, match=f"Expecting value at character {text.index('x]')}$"):
+        list(iter_flashcard_records(fp))
+    assert fp.reads <= 3